@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import LLMUsageDaily
 
-# Register your models here.
+@admin.register(LLMUsageDaily)
+class LLMUsageDailyAdmin(admin.ModelAdmin):
+    list_display = ['day', 'endpoint', 'model', 'user', 'requests', 'prompt_tokens', 'completion_tokens', 'latency_ms_max']
+    list_filter = ['endpoint', 'model', 'day']
+    search_fields = ['user__email']
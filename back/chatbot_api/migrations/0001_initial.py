@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMUsageDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('endpoint', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=100)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('cached_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('context_chars', models.PositiveBigIntegerField(default=0)),
+                ('latency_ms_total', models.FloatField(default=0)),
+                ('latency_ms_max', models.FloatField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='llm_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Uso de LLM (diário)',
+                'verbose_name_plural': 'Usos de LLM (diário)',
+                'ordering': ['-day', 'endpoint'],
+                'indexes': [models.Index(fields=['day', 'endpoint'], name='chatbot_api_day_318321_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('day', 'endpoint', 'model', 'user'), name='llm_usage_daily_unique_user'), models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('day', 'endpoint', 'model'), name='llm_usage_daily_unique_anonymous')],
+            },
+        ),
+    ]
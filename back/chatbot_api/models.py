@@ -1,3 +1,49 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class LLMUsageDaily(models.Model):
+    """Daily rollup of LLM token usage and latency per endpoint, model and user"""
+    day = models.DateField()
+    endpoint = models.CharField(max_length=50)  # Ex: 'chat', 'challenge', 'quiz'
+    model = models.CharField(max_length=100)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='llm_usage'
+    )
+    
+    # Counters
+    requests = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    cached_tokens = models.PositiveBigIntegerField(default=0)  # Prompt tokens served from the provider's prompt cache
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    context_chars = models.PositiveBigIntegerField(default=0)  # Size of the retrieved context sent to the model
+    latency_ms_total = models.FloatField(default=0)
+    latency_ms_max = models.FloatField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'endpoint', 'model', 'user'],
+                condition=models.Q(user__isnull=False),
+                name='llm_usage_daily_unique_user',
+            ),
+            # NULLs never collide in a plain unique constraint: anonymous calls need their own
+            models.UniqueConstraint(
+                fields=['day', 'endpoint', 'model'],
+                condition=models.Q(user__isnull=True),
+                name='llm_usage_daily_unique_anonymous',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'endpoint']),
+        ]
+        verbose_name = 'Uso de LLM (diário)'
+        verbose_name_plural = 'Usos de LLM (diário)'
+        ordering = ['-day', 'endpoint']
+    
+    def __str__(self):
+        return f"{self.day} - {self.endpoint} ({self.model}): {self.requests} req"
+    
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
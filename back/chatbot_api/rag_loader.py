@@ -74,7 +74,9 @@ def get_rag_pipeline():
                 documents_path=documents_path,
                 persist_directory=persist_directory,
                 chunk_size=1000,
-                chunk_overlap=200
+                chunk_overlap=200,
+                chunking_strategy=os.getenv("RAG_CHUNKING_STRATEGY", "recursive"),
+                retrieval_mode=os.getenv("RAG_RETRIEVAL_MODE", "chunks")
             )
             
             # Build the knowledge base with force rebuild
@@ -4,9 +4,11 @@ from rest_framework import serializers
 class ChatMessageSerializer(serializers.Serializer):
     """Serializer for chat messages"""
     message = serializers.CharField(max_length=1000, help_text="User message to send to chatbot")
+    program = serializers.CharField(max_length=100, required=False, allow_blank=True, help_text="Program being studied; restricts the search to its documents")
+    debug = serializers.BooleanField(required=False, default=False, help_text="Include per-stage timings in the response")
     
     class Meta:
-        fields = ['message']
+        fields = ['message', 'program', 'debug']
 
 
 class ChatResponseSerializer(serializers.Serializer):
@@ -31,9 +33,10 @@ class QuestionGenerationSerializer(serializers.Serializer):
     topic = serializers.CharField(max_length=200, help_text="Topic for question generation")
     difficulty = serializers.CharField(max_length=50, required=True, help_text="Difficulty level")
     type = serializers.CharField(max_length=50, required=True, help_text="Challenge type")
+    debug = serializers.BooleanField(required=False, default=False, help_text="Include per-stage timings in the response")
     
     class Meta:
-        fields = ['program', 'track', 'topic', 'difficulty', 'type']
+        fields = ['program', 'track', 'topic', 'difficulty', 'type', 'debug']
 
 
 class QuestionResponseSerializer(serializers.Serializer):
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ChatbotChatView, QuestionGenerationView, health_check
+from .views import ChatbotChatView, QuestionGenerationView, LLMUsageSummaryView, health_check, metrics
 
 app_name = 'chatbot_api'
 
@@ -7,9 +7,15 @@ urlpatterns = [
     # Health check endpoint
     path('health/', health_check, name='health_check'),
     
+    # Prometheus metrics endpoint (staff or METRICS_TOKEN; per worker process)
+    path('metrics/', metrics, name='metrics'),
+    
     # Chat endpoint
     path('chat/', ChatbotChatView.as_view(), name='chat'),
     
     # Question generation endpoint
     path('generate-question/', QuestionGenerationView.as_view(), name='generate_question'),
+    
+    # LLM token usage summaries (admin only)
+    path('usage/', LLMUsageSummaryView.as_view(), name='llm_usage'),
 ] 
\ No newline at end of file
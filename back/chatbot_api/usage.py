@@ -0,0 +1,174 @@
+"""
+LLM usage accounting - Records the token usage reported by the RAG pipeline
+and summarizes it per day, endpoint and user
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import LLMUsageDaily
+
+logger = logging.getLogger(__name__)
+
+
+def record_llm_usage(usage: Optional[Dict[str, Any]], user=None):
+    """
+    Add one LLM call to the daily usage rollup
+
+    Args:
+        usage: Usage record returned by the RAG pipeline (endpoint, model, tokens, latency, context size)
+        user: Authenticated user that made the request, if any
+    """
+    if not usage:
+        return
+    
+    if user is not None and not user.is_authenticated:
+        user = None
+    
+    key = {
+        'day': timezone.localdate(),
+        'endpoint': usage.get('endpoint', 'unknown'),
+        'model': usage.get('model') or 'unknown',
+        'user': user,
+    }
+    prompt_tokens = int(usage.get('prompt_tokens') or 0)
+    cached_tokens = int(usage.get('cached_tokens') or 0)
+    completion_tokens = int(usage.get('completion_tokens') or 0)
+    context_chars = int(usage.get('context_chars') or 0)
+    latency_ms = float(usage.get('latency_ms') or 0)
+    
+    try:
+        updated = _increment(key, prompt_tokens, cached_tokens, completion_tokens, context_chars, latency_ms)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    LLMUsageDaily.objects.create(
+                        **key,
+                        requests=1,
+                        prompt_tokens=prompt_tokens,
+                        cached_tokens=cached_tokens,
+                        completion_tokens=completion_tokens,
+                        context_chars=context_chars,
+                        latency_ms_total=latency_ms,
+                        latency_ms_max=latency_ms,
+                    )
+            except IntegrityError:
+                # Another request created the row first
+                _increment(key, prompt_tokens, cached_tokens, completion_tokens, context_chars, latency_ms)
+    except Exception as e:
+        # Accounting must never break the user request
+        logger.error(f"Could not record LLM usage: {e}")
+
+
+def _increment(key, prompt_tokens, cached_tokens, completion_tokens, context_chars, latency_ms) -> int:
+    return LLMUsageDaily.objects.filter(**key).update(
+        requests=F('requests') + 1,
+        prompt_tokens=F('prompt_tokens') + prompt_tokens,
+        cached_tokens=F('cached_tokens') + cached_tokens,
+        completion_tokens=F('completion_tokens') + completion_tokens,
+        context_chars=F('context_chars') + context_chars,
+        latency_ms_total=F('latency_ms_total') + latency_ms,
+        latency_ms_max=Greatest(F('latency_ms_max'), latency_ms),
+    )
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """
+    Estimate the cost in USD of a token count using settings.LLM_PRICING
+
+    Cached prompt tokens are billed at the 'cached_prompt' price when configured.
+
+    Returns:
+        Optional[float]: Cost in USD, or None when the model has no price configured
+    """
+    prices = getattr(settings, 'LLM_PRICING', {})
+    pricing = prices.get(model)
+    if pricing is None:
+        # The API reports dated snapshots, e.g. 'gpt-4o-mini-2024-07-18'
+        matches = [name for name in prices if model.startswith(f"{name}-")]
+        if not matches:
+            return None
+        pricing = prices[max(matches, key=len)]
+    cached_price = pricing.get('cached_prompt', pricing['prompt'])
+    return (
+        (prompt_tokens - cached_tokens) * pricing['prompt']
+        + cached_tokens * cached_price
+        + completion_tokens * pricing['completion']
+    ) / 1_000_000
+
+
+def summarize_usage(days: int = 30) -> Dict[str, Any]:
+    """
+    Summarize the LLM usage of the last days per day, per endpoint and per user
+
+    Args:
+        days (int): Number of days (including today) to summarize
+
+    Returns:
+        Dict[str, Any]: Totals and the per-day, per-endpoint and per-user breakdowns
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    queryset = LLMUsageDaily.objects.filter(day__gte=since)
+    
+    def breakdown(*fields):
+        rows = (
+            queryset.values(*fields, 'model')
+            .annotate(
+                requests=Sum('requests'),
+                prompt_tokens=Sum('prompt_tokens'),
+                cached_tokens=Sum('cached_tokens'),
+                completion_tokens=Sum('completion_tokens'),
+                context_chars=Sum('context_chars'),
+                latency_ms_total=Sum('latency_ms_total'),
+                latency_ms_max=Max('latency_ms_max'),
+            )
+            .order_by(*fields, 'model')
+        )
+        # Fold the per-model rows so the cost uses each model's price
+        groups = {}
+        for row in rows:
+            group_key = tuple(row[field] for field in fields)
+            group = groups.setdefault(group_key, {
+                **{field: row[field] for field in fields},
+                'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0,
+                'context_chars': 0, 'latency_ms_total': 0.0, 'latency_ms_max': 0.0,
+                'cost_usd': 0.0,
+            })
+            for counter in ('requests', 'prompt_tokens', 'cached_tokens', 'completion_tokens', 'context_chars', 'latency_ms_total'):
+                group[counter] += row[counter]
+            group['latency_ms_max'] = max(group['latency_ms_max'], row['latency_ms_max'])
+            cost = estimate_cost(row['model'], row['prompt_tokens'], row['completion_tokens'], row['cached_tokens'])
+            if cost is None or group['cost_usd'] is None:
+                group['cost_usd'] = None
+            else:
+                group['cost_usd'] += cost
+        
+        results = []
+        for group in groups.values():
+            requests = group['requests'] or 1
+            group['avg_latency_ms'] = round(group.pop('latency_ms_total') / requests, 3)
+            group['avg_prompt_tokens'] = round(group['prompt_tokens'] / requests, 1)
+            group['avg_context_chars'] = round(group['context_chars'] / requests, 1)
+            group['cache_hit_ratio'] = round(group['cached_tokens'] / group['prompt_tokens'], 4) if group['prompt_tokens'] else 0.0
+            if group['cost_usd'] is not None:
+                group['cost_usd'] = round(group['cost_usd'], 6)
+            results.append(group)
+        return results
+    
+    totals = breakdown()
+    return {
+        'since': since,
+        'days': days,
+        'totals': totals[0] if totals else None,
+        'by_day': breakdown('day'),
+        'by_endpoint': breakdown('endpoint'),
+        'by_day_endpoint': breakdown('day', 'endpoint'),
+        'by_user': breakdown('user__email'),
+    }
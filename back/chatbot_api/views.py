@@ -1,10 +1,14 @@
 import sys
 import os
 import json
+import hmac
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.permissions import IsAdminUser
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from .serializers import (
     ChatMessageSerializer, 
     ChatResponseSerializer,
@@ -14,8 +18,19 @@ from .serializers import (
 
 # Import the loader of the RAGPipeline
 from .rag_loader import get_rag_pipeline, is_initialized
-from django.db import transaction
-from questions.models import Program, Track, Challenge, Source, ProblemQuestion, DiscursiveQuestion, MultipleChoiceQuestion, Question
+from .usage import record_llm_usage, summarize_usage
+# Available once rag_loader has added the chatbot app to the Python path
+from rag_pipeline.tracing import metrics_registry
+from rag_pipeline.schemas import validate_challenge_set
+from questions.serializers import ChallengeSerializer
+from questions.services import GeneratedChallenge, persist_generated_challenges
+
+
+def _debug_requested(request, serializer):
+    """Whether the client asked for per-stage timings (body field or ?debug=1)"""
+    if serializer.validated_data.get('debug'):
+        return True
+    return request.query_params.get('debug', '').lower() in ('1', 'true', 'yes')
 
 
 class ChatbotChatView(APIView):
@@ -41,6 +56,7 @@ class ChatbotChatView(APIView):
         
         try:
             user_message = serializer.validated_data['message']
+            program_name = serializer.validated_data.get('program') or None
             
             # Use the loader to get the unique instance of the RAGPipeline
             pipeline = get_rag_pipeline()
@@ -51,7 +67,7 @@ class ChatbotChatView(APIView):
                 return Response({'response': response, 'confidence': 0.8}, status=status.HTTP_200_OK)
             
             # Get response from chatbot
-            response = pipeline.chat(user_message)
+            response = pipeline.chat(user_message, program=program_name)
             
             # Parse the JSON response from the RAG pipeline
             if isinstance(response, str):
@@ -63,6 +79,7 @@ class ChatbotChatView(APIView):
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
 
+            record_llm_usage(response.get('usage'), request.user)
 
             # Create response data
             response_data = {
@@ -72,6 +89,8 @@ class ChatbotChatView(APIView):
                 'avg_score': response.get('avg_score', 0),
                 'documents_used': response.get('documents_used', 0)
             }
+            if _debug_requested(request, serializer):
+                response_data['timings'] = response.get('timings')
             
             return Response(response_data, status=status.HTTP_200_OK)
             
@@ -111,7 +130,7 @@ class QuestionGenerationView(APIView):
                 )
             
             # Generate question
-            question_data = pipeline.generate_challenges_and_questions(topic, difficulty, type)
+            question_data = pipeline.generate_challenges_and_questions(topic, difficulty, type, program=program_name)
             
             # Parse the JSON response from the RAG pipeline
             if isinstance(question_data, str):
@@ -130,97 +149,36 @@ class QuestionGenerationView(APIView):
                     status=status.HTTP_502_BAD_GATEWAY
                 )
 
+            record_llm_usage(question_data.get('usage'), request.user)
+
             if question_data.get("error"):
                 return Response(
                     {"error": question_data.get("error")},
                     status=status.HTTP_502_BAD_GATEWAY
                 )
 
-            required_top_level_keys = ["sources", "challenges", "questions"]
-            missing_keys = [k for k in required_top_level_keys if k not in question_data]
-            if missing_keys:
+            # Same compiled schema the pipeline validates the model output with
+            schema_errors = validate_challenge_set(
+                {key: question_data[key] for key in ("challenges", "questions") if key in question_data}
+            )
+            if schema_errors or "sources" not in question_data:
                 return Response(
-                    {"error": f"Missing keys in AI response: {', '.join(missing_keys)}"},
+                    {"error": f"Invalid AI response: {'; '.join(schema_errors) or 'missing sources'}"},
                     status=status.HTTP_502_BAD_GATEWAY
                 )
 
             # --- Save to database ---
             try:
-                with transaction.atomic():
-                    # Map difficulty from "Médio" to "MEDIUM"
-                    difficulty_map = {v: k for k, v in Question.Difficulty.choices}
-                    difficulty_enum = difficulty_map.get(difficulty.capitalize(), Question.Difficulty.MEDIUM)
-
-                    # Get or create Program and Track
-                    program, _ = Program.objects.get_or_create(name=program_name.upper())
-                    track, _ = Track.objects.get_or_create(program=program, name=track_name.capitalize())
-
-                    # Create Challenge
-                    challenge = Challenge.objects.create(
-                        track=track,
-                        title=f"{topic.capitalize()}",
-                        difficulty=difficulty_enum,
-                        status=Challenge.ChallengeStatus.PENDING
+                challenge, = persist_generated_challenges([
+                    GeneratedChallenge(
+                        program=program_name,
+                        track=track_name,
+                        topic=topic,
+                        difficulty=difficulty,
+                        question_type=type,
+                        data=question_data,
                     )
-
-                    # Create and associate sources
-                    source_objects = []
-                    for source_data in question_data.get('sources', []):
-                        source, _ = Source.objects.get_or_create(file_name=source_data['file_name'])
-                        source_objects.append(source)
-                    challenge.sources.add(*source_objects)
-                    
-                    # Create Discursive or Problem Questions based on type
-                    is_calculation = str(type).strip().lower().startswith(('calc', 'cálc', 'c\u00e1lc'))
-                    is_discursive = str(type).strip().lower().startswith(('disc', 'discur', 'discurs', 'discursiva'))
-                    for pq_data in question_data.get('challenges', []):
-                        if not all(key in pq_data for key in ['challenge', 'challenge_answer', 'challenge_justification']):
-                            raise ValueError("Malformed 'challenges' item from AI response")
-                        if is_discursive and not is_calculation:
-                            DiscursiveQuestion.objects.create(
-                                challenge=challenge,
-                                statement=pq_data['challenge'],
-                                answer_text=pq_data['challenge_answer'],
-                                justification=pq_data['challenge_justification']
-                            )
-                        else:
-                            # Parse decimal answer (accept formats with comma or dot)
-                            from decimal import Decimal, InvalidOperation
-                            import re
-                            raw_answer = str(pq_data['challenge_answer'])
-                            match = re.search(r"[-+]?\d+[\.,]?\d*", raw_answer)
-                            if not match:
-                                raise ValueError("challenge_answer must include a decimal number for calculation type")
-                            normalized_number = match.group(0).replace(',', '.')
-                            try:
-                                decimal_answer = Decimal(normalized_number)
-                            except InvalidOperation:
-                                raise ValueError("Invalid decimal value in challenge_answer")
-                            ProblemQuestion.objects.create(
-                                challenge=challenge,
-                                statement=pq_data['challenge'],
-                                correct_answer=decimal_answer,
-                                justification=pq_data['challenge_justification']
-                            )
-                    
-                    # Create Multiple Choice Questions
-                    for mcq_data in question_data.get('questions', []):
-                        if not all(key in mcq_data for key in ['question', 'options', 'correct_answer', 'question_justification']):
-                            raise ValueError("Malformed 'questions' item from AI response")
-                        options = mcq_data['options']
-                        if not isinstance(options, dict) or not all(k in options for k in ['A','B','C','D','E']):
-                            raise ValueError("Options must include A, B, C, D, E")
-                        MultipleChoiceQuestion.objects.create(
-                            challenge=challenge,
-                            statement=mcq_data['question'],
-                            option_a=mcq_data['options']['A'],
-                            option_b=mcq_data['options']['B'],
-                            option_c=mcq_data['options']['C'],
-                            option_d=mcq_data['options']['D'],
-                            option_e=mcq_data['options']['E'],
-                            correct_option=mcq_data['correct_answer'],
-                            justification=mcq_data['question_justification']
-                        )
+                ])
             except Exception as e:
                 # If database saving fails, return an error but don't expose details
                 return Response(
@@ -230,9 +188,12 @@ class QuestionGenerationView(APIView):
             # --- End of save to database ---
 
             # Return the persisted challenge with IDs so the frontend can edit
-            from questions.serializers import ChallengeSerializer
+            # (track, sources and questions are already in memory: no extra queries)
             serialized = ChallengeSerializer(challenge)
-            return Response(serialized.data, status=status.HTTP_200_OK)
+            response_data = serialized.data
+            if _debug_requested(request, serializer):
+                response_data['timings'] = question_data.get('timings')
+            return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
             return Response(
@@ -241,6 +202,20 @@ class QuestionGenerationView(APIView):
             )
 
 
+class LLMUsageSummaryView(APIView):
+    """API endpoint with the LLM token usage, latency and cost summaries"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Summarize the usage of the last `days` days (default 30)"""
+        try:
+            days = max(1, min(int(request.query_params.get('days', 30)), 365))
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(summarize_usage(days), status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 def health_check(request):
     """Health check endpoint"""
@@ -250,3 +225,31 @@ def health_check(request):
         "service": "chatbot-api",
         "rag_pipeline": rag_status
     }, status=status.HTTP_200_OK)
+
+
+def _metrics_authorized(request):
+    """Staff sessions, or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`"""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        return False
+    scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip(), token)
+
+
+def metrics(request):
+    """
+    Prometheus metrics endpoint with the RAG pipeline stage timings
+
+    Restricted to staff users or to the METRICS_TOKEN bearer token. The registry
+    lives in memory, so the numbers are those of the worker process that serves
+    the scrape, not of the whole deployment: with several workers, each scrape
+    may hit a different process.
+    """
+    if not _metrics_authorized(request):
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(
+        metrics_registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -208,7 +208,63 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 AUTH_USER_MODEL = "users.CustomUser"
 
+# Bearer token for Prometheus scrapes of /api/chatbot/metrics/ (staff users can
+# always read it). The metrics are kept in memory, per worker process
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# LLM prices in USD per 1M tokens, used to estimate costs in /api/chatbot/usage/
+LLM_PRICING = {
+    'gpt-4o-mini': {'prompt': 0.15, 'cached_prompt': 0.075, 'completion': 0.60},
+}
+
+# Caches. 'progress' holds the per-user dashboard snapshots (progress/dashboard.py)
+# and 'questions' the certificate question pools. Writes done anywhere (web
+# workers, the progress flusher, management commands) invalidate them, so every
+# process must see the same cache: they live in Redis (CACHE_REDIS_URL), one key
+# prefix per alias. Run Redis with maxmemory-policy volatile-lru so that only
+# entries with a timeout (snapshots, pools) are evicted, never the versions.
+# FileBasedCache (<ALIAS>_CACHE_BACKEND/<ALIAS>_CACHE_LOCATION) is a development
+# opt-in for a single host: it lists the whole directory on every set, so writes
+# get slower as the number of users grows
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+REDIS_CACHE_BACKEND = 'django.core.cache.backends.redis.RedisCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'progress': {
+        'BACKEND': os.getenv('PROGRESS_CACHE_BACKEND', REDIS_CACHE_BACKEND),
+        'LOCATION': os.getenv('PROGRESS_CACHE_LOCATION', CACHE_REDIS_URL),
+        'KEY_PREFIX': 'progress',
+        'TIMEOUT': 3600,
+    },
+    # Versions that snapshot keys depend on (badge catalog version, per-user
+    # snapshot generations). Stored without timeout so they are never evicted
+    'progress_versions': {
+        'BACKEND': os.getenv('PROGRESS_VERSIONS_CACHE_BACKEND', REDIS_CACHE_BACKEND),
+        'LOCATION': os.getenv('PROGRESS_VERSIONS_CACHE_LOCATION', CACHE_REDIS_URL),
+        'KEY_PREFIX': 'progress_versions',
+        'TIMEOUT': None,
+    },
+    # Per-track certificate question pools (questions/certificate_pool.py)
+    'questions': {
+        'BACKEND': os.getenv('QUESTIONS_CACHE_BACKEND', REDIS_CACHE_BACKEND),
+        'LOCATION': os.getenv('QUESTIONS_CACHE_LOCATION', CACHE_REDIS_URL),
+        'KEY_PREFIX': 'questions',
+    },
+}
+
+# Trail access tracking (POST /api/progress/track/): 'sync' writes the access and
+# progress in the request; 'buffered' only queues it (TrailAccessEvent) and the
+# flush_trail_access_events command applies the queue in batches
+PROGRESS_TRACKING_MODE = os.getenv('PROGRESS_TRACKING_MODE', 'sync')
+
 # Logging configuration
+# RAG pipeline log level. Request payloads (context, prompts, responses) are
+# never logged at this level; see RAG_DEBUG_TRACE in rag_pipeline/debug_trace.py
+RAG_LOG_LEVEL = os.getenv('RAG_LOG_LEVEL', 'INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -240,32 +296,32 @@ LOGGING = {
         },
         'rag_pipeline': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
         'step1_extraction': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
         'step2_chunking': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
         'step3_embedding': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
         'step4_search': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
         'step5_chat': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': RAG_LOG_LEVEL,
             'propagate': False,
         },
     },
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    TrailAccess, UserProgramProgress, UserOverallProgress,
+    TrailAccess, TrailAccessEvent, UserProgramProgress, UserOverallProgress,
     BadgeDefinition, ChallengeCompletion, UserBadge, UserBadgeStats
 )
 
@@ -11,6 +11,12 @@ class TrailAccessAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'trail_id']
     readonly_fields = ['first_access', 'last_access']
 
+@admin.register(TrailAccessEvent)
+class TrailAccessEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'program', 'trail_number', 'trail_id', 'created_at']
+    list_filter = ['program']
+    search_fields = ['user__email', 'trail_id']
+
 @admin.register(UserProgramProgress)
 class UserProgramProgressAdmin(admin.ModelAdmin):
     list_display = ['user', 'program', 'progress_percentage', 'last_accessed_trail', 'updated_at']
@@ -49,4 +55,10 @@ class UserBadgeAdmin(admin.ModelAdmin):
 class UserBadgeStatsAdmin(admin.ModelAdmin):
     list_display = ['user', 'total_badges', 'completion_percentage', 'bronze_badges', 'silver_badges', 'gold_badges']
     search_fields = ['user__email']
-    readonly_fields = ['updated_at', 'first_badge_earned', 'last_badge_earned']
\ No newline at end of file
+    readonly_fields = ['updated_at', 'first_badge_earned', 'last_badge_earned']
+    actions = ['recompute_stats']
+
+    @admin.action(description='Recalcular estatísticas selecionadas')
+    def recompute_stats(self, request, queryset):
+        written = UserBadgeStats.recompute_all(user_ids=list(queryset.values_list('user_id', flat=True)))
+        self.message_user(request, f"{written} estatísticas recalculadas")
@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+
+from .models import BadgeDefinition
+
+# Catálogo de badges em memória, por processo. As definições (36 linhas) só
+# mudam pelo create_badges_definitions ou pelo admin: os signals de
+# BadgeDefinition trocam a versão no cache compartilhado 'progress_versions'
+# (separado dos snapshots, para não ser descartado pelo cull), e cada
+# processo recarrega o catálogo quando vê uma versão diferente da sua
+CACHE_ALIAS = 'progress_versions'
+VERSION_KEY = 'badge_catalog:version'
+VERSION_CHECK_INTERVAL = 5  # segundos entre as consultas da versão
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+class BadgeCatalog:
+    """Definições de badges carregadas uma vez, com os dados serializados já calculados"""
+
+    def __init__(self, version, definitions):
+        self.version = version
+        self.by_id = {definition.id: definition for definition in definitions}
+        self.by_key = {
+            (definition.program, definition.trail_number, definition.difficulty): definition
+            for definition in definitions if definition.is_active
+        }
+        self.data = {definition.id: self._serialize(definition) for definition in definitions}
+        self.active_ids = [
+            definition.id
+            for definition in sorted(definitions, key=lambda d: (d.program, d.trail_number, d.difficulty))
+            if definition.is_active
+        ]
+
+    @staticmethod
+    def _serialize(definition):
+        return {
+            'id': definition.id,
+            'name': definition.name,
+            'description': definition.description,
+            'image_url': definition.badge_image_url,  # URL da imagem
+            'image_path': definition.badge_image,     # Caminho relativo
+            'type': definition.badge_type,
+            'program': definition.program,
+            'trail_number': definition.trail_number,
+            'difficulty': definition.difficulty,
+        }
+
+    def get(self, program, trail_number, difficulty):
+        """
+        Definição ativa do badge de um desafio
+
+        Args:
+            program: Programa (PROIND, PRODEPE, PRODEAUTO)
+            trail_number: Número da trilha (1-4)
+            difficulty: Dificuldade (EASY, MEDIUM, HARD)
+
+        Returns:
+            BadgeDefinition | None: Definição, ou None se não existe ou está inativa
+        """
+        try:
+            trail_number = int(trail_number)
+        except (TypeError, ValueError):
+            return None
+        return self.by_key.get((program, trail_number, difficulty))
+
+    def available(self, earned_ids):
+        """Dados dos badges ativos ainda não conquistados, ordenados por programa, trilha e dificuldade"""
+        earned_ids = set(earned_ids)
+        return [dict(self.data[badge_id]) for badge_id in self.active_ids if badge_id not in earned_ids]
+
+
+def get_catalog(force=False):
+    """
+    Retorna o catálogo de badges do processo, recarregando-o se a versão mudou
+
+    Args:
+        force: Recarrega as definições do banco mesmo dentro do intervalo entre
+            as consultas da versão (ex: um badge de uma definição que este
+            processo ainda não conhece)
+
+    Returns:
+        BadgeCatalog: Catálogo atual
+    """
+    global _catalog, _checked_at
+    now = time.monotonic()
+    catalog = _catalog
+    if not force and catalog is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return catalog
+
+    with _lock:
+        cache = caches[CACHE_ALIAS]
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(VERSION_KEY)
+        if force or _catalog is None or _catalog.version != version:
+            _catalog = BadgeCatalog(version, list(BadgeDefinition.objects.all()))
+        _checked_at = now
+        return _catalog
+
+
+def bump_catalog_version():
+    """Invalida o catálogo de todos os processos (chamado pelos signals de BadgeDefinition)"""
+    global _catalog
+    caches[CACHE_ALIAS].set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _catalog = None
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import uuid
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .badge_catalog import get_catalog
+from .models import (
+    TrailAccess, UserProgramProgress, UserOverallProgress,
+    ChallengeCompletion, UserBadge, UserBadgeStats, CertificateTest
+)
+from .serializers import (
+    UserProgramProgressSerializer,
+    UserOverallProgressSerializer,
+    TrailAccessSerializer
+)
+
+# Snapshot do painel do usuário: um documento com as respostas de todos os
+# endpoints de leitura do progresso, guardado no cache 'progress'.
+# A chave inclui a geração global e a do usuário (cache 'progress_versions'): os caminhos
+# de escrita (acessos, desafios, badges e certificados) trocam a geração em vez
+# de apagar o snapshot, então um snapshot montado antes de uma escrita e gravado
+# depois dela fica numa chave que ninguém mais lê
+CACHE_ALIAS = 'progress'
+VERSIONS_CACHE_ALIAS = 'progress_versions'
+SNAPSHOT_VERSION = 2
+ALL_USERS = 'all'  # geração global, trocada por invalidate_all_snapshots
+
+
+def _generation_key(user_id):
+    return f"dashboard:generation:{user_id}"
+
+
+def _generations(user_id):
+    """Gerações atuais (global e do usuário) do snapshot, criadas na primeira leitura"""
+    versions = caches[VERSIONS_CACHE_ALIAS]
+    keys = [_generation_key(ALL_USERS), _generation_key(user_id)]
+    generations = versions.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            versions.add(key, uuid.uuid4().hex)
+            generations[key] = versions.get(key)
+    return f"{generations[keys[0]]}:{generations[keys[1]]}"
+
+
+def _cache_key(user_id, generations):
+    # A versão do catálogo de badges entra na chave: mudanças no catálogo invalidam todos os snapshots
+    return f"dashboard:v{SNAPSHOT_VERSION}:{get_catalog().version}:{user_id}:{generations}"
+
+
+def get_snapshot(user):
+    """
+    Retorna o snapshot do painel do usuário (uma leitura de cache quando já existe)
+
+    Returns:
+        dict: {'etag': str, 'sections': {nome da seção: dados da resposta}}
+    """
+    cache = caches[CACHE_ALIAS]
+    # As gerações são lidas antes do banco: se uma escrita terminar durante a
+    # montagem, o snapshot antigo é gravado na chave das gerações anteriores
+    key = _cache_key(user.pk, _generations(user.pk))
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(user)
+        cache.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_all_snapshots():
+    """Troca a geração global dos snapshots após o commit da transação atual"""
+    transaction.on_commit(lambda: caches[VERSIONS_CACHE_ALIAS].set(_generation_key(ALL_USERS), uuid.uuid4().hex))
+
+
+def invalidate_snapshot(*user_ids):
+    """
+    Troca a geração do snapshot dos usuários após o commit da transação atual
+
+    Args:
+        *user_ids: Ids dos usuários cujos dados mudaram
+    """
+    if user_ids:
+        transaction.on_commit(lambda: caches[VERSIONS_CACHE_ALIAS].set_many({
+            _generation_key(user_id): uuid.uuid4().hex for user_id in user_ids
+        }))
+
+
+def build_snapshot(user):
+    """Monta todas as seções do painel a partir do banco"""
+    badge_stats = UserBadgeStats.objects.filter(user=user).first() or UserBadgeStats(user=user)
+    certificates = certificates_section(user)
+    sections = {
+        'progress': progress_section(user),
+        'badges': user_badges_section(user, badge_stats),
+        'available_badges': available_badges_section(user),
+        'badge_stats': badge_stats_section(badge_stats),
+        'certificates': certificates,
+        'completed_certificates': completed_certificates_section(certificates),
+    }
+    encoded = json.dumps(sections, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        'etag': hashlib.md5(encoded.encode('utf-8')).hexdigest(),
+        'sections': sections,
+    }
+
+
+def progress_section(user):
+    """Progresso completo do usuário (GET /api/progress/user/)"""
+    # Progresso por programa
+    program_progresses = UserProgramProgress.objects.filter(user=user)
+    program_data = UserProgramProgressSerializer(program_progresses, many=True).data
+
+    # Progresso geral (mantido incrementalmente no registro dos acessos)
+    overall_progress = UserOverallProgress.objects.filter(user=user).first() or UserOverallProgress(user=user)
+    overall_data = UserOverallProgressSerializer(overall_progress).data
+
+    total_challenges = ChallengeCompletion.objects.filter(user=user).count()
+
+    # Acessos recentes (últimos 10)
+    recent_accesses = TrailAccess.objects.filter(
+        user=user
+    ).order_by('-last_access')[:10]
+    recent_data = TrailAccessSerializer(recent_accesses, many=True).data
+
+    return {
+        'program_progress': list(program_data),
+        'overall_progress': dict(overall_data),
+        'recent_accesses': list(recent_data),
+        'total_challenges_completed': total_challenges,
+    }
+
+
+def user_badges_section(user, badge_stats):
+    """Badges do usuário com URLs de imagem (GET /api/progress/badges/)"""
+    catalog = get_catalog()
+    user_badges = UserBadge.objects.filter(user=user).values_list(
+        'id', 'badge_definition_id', 'earned_at', 'challenge_completion__score'
+    ).order_by('-earned_at')
+
+    badges_data = []
+    for badge_id, definition_id, earned_at, score in user_badges:
+        if definition_id not in catalog.data:
+            # Definição criada por outro processo depois da última consulta da versão
+            catalog = get_catalog(force=True)
+            if definition_id not in catalog.data:
+                continue
+        badges_data.append({
+            **catalog.data[definition_id],
+            'id': badge_id,
+            'earned_at': earned_at,
+            'score': float(score) if score else None,
+        })
+
+    return {
+        'badges': badges_data,
+        'stats': {
+            **_badge_stats_data(badge_stats),
+            'proind_badges': badge_stats.proind_badges,
+            'prodepe_badges': badge_stats.prodepe_badges,
+            'prodeauto_badges': badge_stats.prodeauto_badges,
+        }
+    }
+
+
+def available_badges_section(user):
+    """Badges ainda não conquistados (GET /api/progress/badges/available/)"""
+    catalog = get_catalog()
+    earned_badge_ids = UserBadge.objects.filter(user=user).values_list(
+        'badge_definition_id', flat=True
+    )
+    available_data = catalog.available(earned_badge_ids)
+
+    return {
+        'available_badges': available_data,
+        'total_available': len(available_data),
+        'total_possible': len(catalog.active_ids)
+    }
+
+
+def _badge_stats_data(badge_stats):
+    return {
+        'total_badges': badge_stats.total_badges,
+        'bronze_badges': badge_stats.bronze_badges,
+        'silver_badges': badge_stats.silver_badges,
+        'gold_badges': badge_stats.gold_badges,
+        'completion_percentage': float(badge_stats.completion_percentage),
+        'first_badge_earned': badge_stats.first_badge_earned,
+        'last_badge_earned': badge_stats.last_badge_earned,
+    }
+
+
+def badge_stats_section(badge_stats):
+    """Estatísticas detalhadas de badges (GET /api/progress/badges/stats/)"""
+    # Progresso por programa
+    program_stats = []
+    for program in ['PROIND', 'PRODEPE', 'PRODEAUTO']:
+        program_badges = getattr(badge_stats, f"{program.lower()}_badges")
+
+        program_stats.append({
+            'program': program,
+            'badges_earned': program_badges,
+            'total_possible': 12,  # 4 trilhas x 3 níveis
+            'percentage': round((program_badges / 12) * 100, 1)
+        })
+
+    return {
+        'overall_stats': _badge_stats_data(badge_stats),
+        'program_stats': program_stats
+    }
+
+
+def certificates_section(user):
+    """Certificados do usuário (GET /api/progress/certificates/)"""
+    certificates = CertificateTest.objects.filter(user=user).order_by('-completed_at')
+
+    certificates_data = []
+    for cert in certificates:
+        certificates_data.append({
+            'id': cert.id,
+            'program': cert.program,
+            'track': cert.track,
+            'score': float(cert.score),
+            'correct_answers': cert.correct_answers,
+            'total_questions': cert.total_questions,
+            'passed': cert.passed,
+            'completed_at': cert.completed_at,
+            'status': 'Aprovado' if cert.passed else 'Reprovado'
+        })
+
+    return {
+        'certificates': certificates_data,
+        'total_certificates': len(certificates_data),
+        'passed_certificates': len([c for c in certificates_data if c['passed']]),
+        'failed_certificates': len([c for c in certificates_data if not c['passed']])
+    }
+
+
+def completed_certificates_section(certificates):
+    """Certificados aprovados (GET /api/progress/certificates/completed/), derivados da seção de certificados"""
+    completed_data = [
+        {
+            'program': cert['program'],
+            'track': cert['track'],
+            'score': cert['score'],
+            'completed_at': cert['completed_at'],
+            'certificate_id': f"{cert['program']}-{cert['track']}"
+        }
+        for cert in certificates['certificates'] if cert['passed']
+    ]
+
+    return {
+        'completed_certificates': completed_data,
+        'total_completed': len(completed_data)
+    }
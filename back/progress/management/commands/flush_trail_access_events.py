@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from progress.services import flush_trail_access_events
+
+
+class Command(BaseCommand):
+    help = 'Aplica os acessos às trilhas enfileirados no modo buffered (PROGRESS_TRACKING_MODE=buffered)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Número máximo de eventos aplicados por transação'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Continua rodando, esvaziando a fila a cada intervalo'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30,
+            help='Segundos entre os flushes no modo --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = self.flush(options['batch_size'])
+            if total:
+                self.stdout.write(self.style.SUCCESS(f"{total} acessos aplicados"))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def flush(self, batch_size):
+        """Esvazia a fila em lotes de batch_size"""
+        total = 0
+        while True:
+            applied = flush_trail_access_events(batch_size=batch_size)
+            total += applied
+            if applied < batch_size:
+                return total
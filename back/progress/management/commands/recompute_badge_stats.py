@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from progress.models import UserBadgeStats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as estatísticas de badges de todos os usuários em uma única agregação'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Linhas por comando de upsert'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = UserBadgeStats.recompute_all(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} estatísticas recalculadas em {elapsed:.1f}s"
+        ))
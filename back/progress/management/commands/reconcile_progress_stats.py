@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from progress.services import reconcile_user_stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os progressos e estatísticas de badges a partir dos acessos e badges, corrigindo divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='E-mail de um usuário específico'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas lista as divergências, sem gravar'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(trail_accesses__isnull=False) | Q(badges__isnull=False) |
+            Q(program_progress__isnull=False) | Q(overall_progress__isnull=False) |
+            Q(badge_stats__isnull=False)
+        ).distinct().order_by('pk')
+        if options['user']:
+            users = users.filter(email=options['user'])
+
+        checked = drifted = 0
+        for user in users.iterator():
+            with transaction.atomic():
+                fields = reconcile_user_stats(user)
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+            checked += 1
+            if fields:
+                drifted += 1
+                self.stdout.write(f"{user.email}: {', '.join(fields)}")
+
+        action = 'encontradas' if options['dry_run'] else 'corrigidas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} usuários verificados, divergências {action} em {drifted}"
+        ))
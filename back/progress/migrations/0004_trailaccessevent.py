@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:32
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0003_certificatetest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrailAccessEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('program', models.CharField(choices=[('PROIND', 'PROIND'), ('PRODEPE', 'PRODEPE'), ('PRODEAUTO', 'PRODEAUTO')], max_length=10)),
+                ('trail_id', models.CharField(max_length=100)),
+                ('trail_number', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(4)])),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_trail_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Acesso à Trilha Pendente',
+                'verbose_name_plural': 'Acessos às Trilhas Pendentes',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_trailaccessevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trailaccess',
+            name='first_access',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='trailaccess',
+            name='last_access',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
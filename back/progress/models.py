@@ -30,9 +30,9 @@ class TrailAccess(models.Model):
     trail_id = models.CharField(max_length=100)  # Ex: 'proind-calculo-incentivo'
     trail_number = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(4)])
     
-    # Tracking temporal
-    first_access = models.DateTimeField(auto_now_add=True)
-    last_access = models.DateTimeField(auto_now=True)
+    # Tracking temporal (gravados pelos serviços com as datas dos acessos, não as da gravação)
+    first_access = models.DateTimeField(default=timezone.now)
+    last_access = models.DateTimeField(default=timezone.now)
     access_count = models.PositiveIntegerField(default=1)
     
     class Meta:
@@ -48,6 +48,21 @@ class TrailAccess(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.trail_id} ({self.access_count}x)"
 
+class TrailAccessEvent(models.Model):
+    """Acesso à trilha recebido no modo buffered, aguardando o flush (flush_trail_access_events)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_trail_accesses')
+    program = models.CharField(max_length=10, choices=TrailAccess.PROGRAMS)
+    trail_id = models.CharField(max_length=100)
+    trail_number = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(4)])
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Acesso à Trilha Pendente'
+        verbose_name_plural = 'Acessos às Trilhas Pendentes'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.trail_id} ({self.created_at:%Y-%m-%d %H:%M:%S})"
+
 class UserProgramProgress(models.Model):
     """Mantém o progresso consolidado do usuário por programa"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='program_progress')
@@ -301,47 +316,104 @@ class UserBadgeStats(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.total_badges}/36 badges"
     
+    # Contadores calculados por agregação condicional sobre UserBadge
+    TYPE_FIELDS = {badge_type: f"{badge_type.lower()}_badges" for badge_type in BadgeType.values}
+    PROGRAM_FIELDS = {program: f"{program.lower()}_badges" for program, _ in BadgeDefinition.PROGRAMS}
+    STATS_FIELDS = [
+        *TYPE_FIELDS.values(), *PROGRAM_FIELDS.values(), 'total_badges',
+        'completion_percentage', 'first_badge_earned', 'last_badge_earned'
+    ]
+    
+    @classmethod
+    def _aggregates(cls):
+        """Expressões de agregação dos contadores (uma consulta, sem iterar os badges)"""
+        aggregates = {
+            field: models.Count('id', filter=models.Q(badge_definition__badge_type=badge_type))
+            for badge_type, field in cls.TYPE_FIELDS.items()
+        }
+        aggregates.update({
+            field: models.Count('id', filter=models.Q(badge_definition__program=program))
+            for program, field in cls.PROGRAM_FIELDS.items()
+        })
+        aggregates.update({
+            'total_badges': models.Count('id'),
+            'first_badge_earned': models.Min('earned_at'),
+            'last_badge_earned': models.Max('earned_at'),
+        })
+        return aggregates
+    
+    def _set_stats(self, values):
+        for field in self.TYPE_FIELDS.values():
+            setattr(self, field, values[field])
+        for field in self.PROGRAM_FIELDS.values():
+            setattr(self, field, values[field])
+        self.total_badges = values['total_badges']
+        self.completion_percentage = (self.total_badges / 36) * 100
+        self.first_badge_earned = values['first_badge_earned']
+        self.last_badge_earned = values['last_badge_earned']
+    
     def update_stats(self):
         """Recalcula todas as estatísticas baseado nos badges do usuário"""
-        user_badges = UserBadge.objects.filter(user=self.user).select_related('badge_definition')
+        self._set_stats(UserBadge.objects.filter(user=self.user).aggregate(**self._aggregates()))
+        self.save()
+    
+    @classmethod
+    def recompute_all(cls, user_ids=None, batch_size=1000):
+        """
+        Recalcula as estatísticas de vários usuários em uma única passada (GROUP BY user)
         
-        # Resetar contadores
-        self.bronze_badges = 0
-        self.silver_badges = 0
-        self.gold_badges = 0
-        self.proind_badges = 0
-        self.prodepe_badges = 0
-        self.prodeauto_badges = 0
+        Args:
+            user_ids: Usuários a recalcular (None = todos)
+            batch_size: Linhas por comando de upsert
         
-        for badge in user_badges:
-            # Contar por tipo
-            if badge.badge_definition.badge_type == 'BRONZE':
-                self.bronze_badges += 1
-            elif badge.badge_definition.badge_type == 'SILVER':
-                self.silver_badges += 1
-            elif badge.badge_definition.badge_type == 'GOLD':
-                self.gold_badges += 1
-            
-            # Contar por programa
-            if badge.badge_definition.program == 'PROIND':
-                self.proind_badges += 1
-            elif badge.badge_definition.program == 'PRODEPE':
-                self.prodepe_badges += 1
-            elif badge.badge_definition.program == 'PRODEAUTO':
-                self.prodeauto_badges += 1
+        Returns:
+            int: Número de estatísticas gravadas
+        """
+        badges = UserBadge.objects.all()
+        if user_ids is not None:
+            badges = badges.filter(user_id__in=user_ids)
+        rows = badges.values('user_id').annotate(**cls._aggregates()).order_by()
         
-        # Totais
-        self.total_badges = self.bronze_badges + self.silver_badges + self.gold_badges
-        self.completion_percentage = (self.total_badges / 36) * 100
+        written = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            stats = cls(user_id=row['user_id'])
+            stats._set_stats(row)
+            batch.append(stats)
+            if len(batch) >= batch_size:
+                written += cls._upsert(batch)
+                batch = []
+        if batch:
+            written += cls._upsert(batch)
         
-        # Timestamps
-        if user_badges:
-            first_badge = user_badges.order_by('earned_at').first()
-            last_badge = user_badges.order_by('-earned_at').first()
-            self.first_badge_earned = first_badge.earned_at if first_badge else None
-            self.last_badge_earned = last_badge.earned_at if last_badge else None
+        # Usuários com estatísticas mas sem badges
+        without_badges = cls.objects.exclude(user_id__in=UserBadge.objects.values('user_id'))
+        if user_ids is not None:
+            without_badges = without_badges.filter(user_id__in=user_ids)
+        written += without_badges.update(
+            **{field: 0 for field in [*cls.TYPE_FIELDS.values(), *cls.PROGRAM_FIELDS.values(), 'total_badges']},
+            completion_percentage=0,
+            first_badge_earned=None,
+            last_badge_earned=None,
+            updated_at=timezone.now(),
+        )
         
-        self.save()
+        from .dashboard import invalidate_all_snapshots, invalidate_snapshot
+        if user_ids is None:
+            invalidate_all_snapshots()
+        else:
+            invalidate_snapshot(*user_ids)
+        return written
+    
+    @classmethod
+    def _upsert(cls, batch):
+        cls.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[*cls.STATS_FIELDS, 'updated_at'],
+        )
+        return len(batch)
 
 class CertificateTest(models.Model):
     """Registra testes de certificado realizados pelos usuários"""
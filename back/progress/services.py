@@ -0,0 +1,486 @@
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .dashboard import invalidate_snapshot
+from .models import (
+    TrailAccess, TrailAccessEvent, UserProgramProgress, UserOverallProgress,
+    UserBadgeStats
+)
+
+TRAILS_PER_PROGRAM = 4
+TOTAL_BADGES = 36
+# Chave do lock consultivo (pg_try_advisory_xact_lock) que garante um único flush por vez
+TRAIL_ACCESS_FLUSH_LOCK_ID = 7_310_001
+
+
+@dataclass
+class TrailAccessResult:
+    """Resultado do registro de um acesso à trilha"""
+    trail_id: str
+    access_count: int
+    created: bool
+    program_progress: UserProgramProgress
+
+
+@dataclass
+class PendingAccess:
+    """Acessos de um usuário a uma trilha, agregados para aplicação em lote"""
+    user_id: int
+    program: str
+    trail_id: str
+    trail_number: int
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+
+def _json_value(value):
+    """JSONB lido por cursor bruto (o backend do Django devolve texto)"""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _jsonb_union(column, value):
+    """Expressão SQL: união ordenada e sem repetição de dois arrays JSONB"""
+    return (
+        f"COALESCE((SELECT jsonb_agg(DISTINCT t.value ORDER BY t.value) "
+        f"FROM jsonb_array_elements({column} || {value}) AS t(value)), '[]'::jsonb)"
+    )
+
+
+def record_trail_access(user, program, trail_id, trail_number):
+    """
+    Registra um acesso à trilha e aplica incrementos aos progressos do usuário.
+
+    No PostgreSQL são 3 comandos em uma única transação (upserts com
+    INSERT ... ON CONFLICT), sem recalcular agregados: o acesso incrementa
+    access_count e os progressos do programa e geral recebem apenas os deltas.
+    Para recalcular tudo a partir dos acessos use UserOverallProgress.update_stats().
+
+    Args:
+        user: Usuário autenticado
+        program: Programa da trilha (PROIND, PRODEPE, PRODEAUTO)
+        trail_id: Identificador da trilha (ex: 'proind-calculo-incentivo')
+        trail_number: Número da trilha no programa (1-4)
+
+    Returns:
+        TrailAccessResult: contagem de acessos e progresso atualizado do programa
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            return _record_trail_access_postgresql(user, program, trail_id, trail_number, now)
+        return _record_trail_access_orm(user, program, trail_id, trail_number, now)
+
+
+def _record_trail_access_postgresql(user, program, trail_id, trail_number, now):
+    qn = connection.ops.quote_name
+    trail_table = qn(TrailAccess._meta.db_table)
+    program_table = qn(UserProgramProgress._meta.db_table)
+    overall_table = qn(UserOverallProgress._meta.db_table)
+    params = {
+        'user_id': user.pk,
+        'program': program,
+        'trail_id': trail_id,
+        'trail_number': trail_number,
+        'now': now,
+    }
+
+    with connection.cursor() as cursor:
+        # 1. Acesso à trilha (xmax = 0 identifica a linha recém-inserida)
+        cursor.execute(f"""
+            INSERT INTO {trail_table} AS ta
+                (user_id, program, trail_id, trail_number, first_access, last_access, access_count)
+            VALUES (%(user_id)s, %(program)s, %(trail_id)s, %(trail_number)s, %(now)s, %(now)s, 1)
+            ON CONFLICT (user_id, trail_id) DO UPDATE SET
+                access_count = ta.access_count + 1,
+                last_access = EXCLUDED.last_access
+            RETURNING ta.access_count, (ta.xmax = 0)
+        """, params)
+        access_count, created = cursor.fetchone()
+
+        # 2. Progresso do programa (a CTE lê as trilhas antes da atualização)
+        cursor.execute(f"""
+            WITH previous AS (
+                SELECT trails_accessed FROM {program_table}
+                WHERE user_id = %(user_id)s AND program = %(program)s
+            )
+            INSERT INTO {program_table} AS pp
+                (user_id, program, last_accessed_trail, trails_accessed, total_access_count, created_at, updated_at)
+            VALUES (%(user_id)s, %(program)s, %(trail_number)s,
+                    jsonb_build_array(%(trail_number)s::integer), 1, %(now)s, %(now)s)
+            ON CONFLICT (user_id, program) DO UPDATE SET
+                last_accessed_trail = GREATEST(pp.last_accessed_trail, EXCLUDED.last_accessed_trail),
+                trails_accessed = {_jsonb_union('pp.trails_accessed', 'EXCLUDED.trails_accessed')},
+                total_access_count = pp.total_access_count + 1,
+                updated_at = EXCLUDED.updated_at
+            RETURNING pp.last_accessed_trail, pp.trails_accessed, pp.total_access_count,
+                NOT COALESCE((SELECT trails_accessed FROM previous)
+                             @> jsonb_build_array(%(trail_number)s::integer), FALSE)
+        """, params)
+        last_accessed_trail, trails_accessed, total_access_count, trail_added = cursor.fetchone()
+        trails_accessed = _json_value(trails_accessed)
+
+        # 3. Progresso geral, com os deltas deste acesso
+        completed = trail_added and len(trails_accessed) == TRAILS_PER_PROGRAM
+        cursor.execute(f"""
+            INSERT INTO {overall_table} AS op
+                (user_id, total_trails_accessed, total_access_count, programs_started,
+                 programs_completed, first_access, last_access, created_at, updated_at)
+            VALUES (%(user_id)s, %(trail_delta)s, 1, jsonb_build_array(%(program)s::text),
+                    %(completed)s::jsonb, %(now)s, %(now)s, %(now)s, %(now)s)
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_trails_accessed = op.total_trails_accessed + EXCLUDED.total_trails_accessed,
+                total_access_count = op.total_access_count + 1,
+                programs_started = {_jsonb_union('op.programs_started', 'EXCLUDED.programs_started')},
+                programs_completed = {_jsonb_union('op.programs_completed', 'EXCLUDED.programs_completed')},
+                first_access = COALESCE(op.first_access, EXCLUDED.first_access),
+                last_access = EXCLUDED.last_access,
+                updated_at = EXCLUDED.updated_at
+        """, {
+            **params,
+            'trail_delta': 1 if trail_added else 0,
+            'completed': json.dumps([program] if completed else []),
+        })
+
+    invalidate_snapshot(user.pk)
+    program_progress = UserProgramProgress(
+        user=user,
+        program=program,
+        last_accessed_trail=last_accessed_trail,
+        trails_accessed=trails_accessed,
+        total_access_count=total_access_count,
+    )
+    return TrailAccessResult(trail_id, access_count, created, program_progress)
+
+
+def _record_trail_access_orm(user, program, trail_id, trail_number, now):
+    """Mesmo fluxo com o ORM, para bancos sem o upsert do PostgreSQL (ex: SQLite local)"""
+    access = PendingAccess(user.pk, program, trail_id, trail_number, 1, now, now)
+    return apply_trail_accesses([access])[(user.pk, trail_id)]
+
+
+def apply_trail_accesses(accesses):
+    """
+    Aplica acessos agregados por (usuário, trilha) com upserts em lote.
+
+    Lê e bloqueia as linhas atuais (acessos, progressos dos programas e gerais)
+    e grava os novos valores com bulk_create(update_conflicts=True): 6 comandos
+    por lote, independente do número de acessos. Deve rodar em transaction.atomic().
+
+    Os valores gravados são absolutos (atual + delta) e select_for_update não
+    bloqueia linhas que ainda não existem: dois escritores simultâneos perdem
+    incrementos. Por isso só há um escritor por vez — flush_trail_access_events
+    segura um lock consultivo e, fora do PostgreSQL, o registro síncrono usa
+    este caminho apenas no desenvolvimento local.
+
+    Args:
+        accesses: Lista de PendingAccess (no máximo um por usuário e trilha)
+
+    Returns:
+        dict: TrailAccessResult por (user_id, trail_id)
+    """
+    if not accesses:
+        return {}
+    user_ids = {access.user_id for access in accesses}
+
+    # 1. Acessos às trilhas
+    current_accesses = {
+        (row.user_id, row.trail_id): row
+        for row in TrailAccess.objects.select_for_update().filter(
+            user_id__in=user_ids, trail_id__in={access.trail_id for access in accesses}
+        ).only('user_id', 'trail_id', 'access_count', 'last_access')
+    }
+    trail_rows = []
+    for access in accesses:
+        # As datas são as dos eventos (no modo buffered o flush acontece depois do acesso)
+        current = current_accesses.get((access.user_id, access.trail_id))
+        trail_rows.append(TrailAccess(
+            user_id=access.user_id,
+            program=access.program,
+            trail_id=access.trail_id,
+            trail_number=access.trail_number,
+            first_access=access.first_at,
+            last_access=max(current.last_access, access.last_at) if current else access.last_at,
+            access_count=(current.access_count if current else 0) + access.count,
+        ))
+    TrailAccess.objects.bulk_create(
+        trail_rows,
+        update_conflicts=True,
+        unique_fields=['user', 'trail_id'],
+        update_fields=['access_count', 'last_access'],
+    )
+
+    # 2. Progresso dos programas
+    current_programs = {
+        (row.user_id, row.program): row
+        for row in UserProgramProgress.objects.select_for_update().filter(user_id__in=user_ids)
+    }
+    program_progresses = {}
+    overall_deltas = defaultdict(lambda: {'trails': 0, 'accesses': 0, 'started': set(), 'completed': set(),
+                                          'first_at': None, 'last_at': None})
+    for access in accesses:
+        key = (access.user_id, access.program)
+        progress = program_progresses.get(key)
+        if progress is None:
+            current = current_programs.get(key)
+            progress = UserProgramProgress(
+                user_id=access.user_id,
+                program=access.program,
+                last_accessed_trail=current.last_accessed_trail if current else 0,
+                trails_accessed=list(current.trails_accessed) if current else [],
+                total_access_count=current.total_access_count if current else 0,
+            )
+            program_progresses[key] = progress
+
+        delta = overall_deltas[access.user_id]
+        if access.trail_number not in progress.trails_accessed:
+            progress.trails_accessed = sorted(progress.trails_accessed + [access.trail_number])
+            delta['trails'] += 1
+            if progress.is_completed:
+                delta['completed'].add(access.program)
+        progress.last_accessed_trail = max(progress.last_accessed_trail, access.trail_number)
+        progress.total_access_count += access.count
+
+        delta['accesses'] += access.count
+        delta['started'].add(access.program)
+        delta['first_at'] = min(filter(None, [delta['first_at'], access.first_at]))
+        delta['last_at'] = max(filter(None, [delta['last_at'], access.last_at]))
+
+    UserProgramProgress.objects.bulk_create(
+        list(program_progresses.values()),
+        update_conflicts=True,
+        unique_fields=['user', 'program'],
+        update_fields=['last_accessed_trail', 'trails_accessed', 'total_access_count', 'updated_at'],
+    )
+
+    # 3. Progresso geral
+    current_overall = {
+        row.user_id: row
+        for row in UserOverallProgress.objects.select_for_update().filter(user_id__in=user_ids)
+    }
+    overall_rows = []
+    for user_id, delta in overall_deltas.items():
+        current = current_overall.get(user_id)
+        overall_rows.append(UserOverallProgress(
+            user_id=user_id,
+            total_trails_accessed=(current.total_trails_accessed if current else 0) + delta['trails'],
+            total_access_count=(current.total_access_count if current else 0) + delta['accesses'],
+            programs_started=sorted(set(current.programs_started if current else []) | delta['started']),
+            programs_completed=sorted(set(current.programs_completed if current else []) | delta['completed']),
+            first_access=min(filter(None, [current and current.first_access, delta['first_at']])),
+            last_access=max(filter(None, [current and current.last_access, delta['last_at']])),
+        ))
+    UserOverallProgress.objects.bulk_create(
+        overall_rows,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['total_trails_accessed', 'total_access_count', 'programs_started',
+                       'programs_completed', 'first_access', 'last_access', 'updated_at'],
+    )
+
+    invalidate_snapshot(*user_ids)
+    return {
+        (access.user_id, access.trail_id): TrailAccessResult(
+            trail_id=access.trail_id,
+            access_count=trail_row.access_count,
+            created=(access.user_id, access.trail_id) not in current_accesses,
+            program_progress=program_progresses[(access.user_id, access.program)],
+        )
+        for access, trail_row in zip(accesses, trail_rows)
+    }
+
+
+def enqueue_trail_access(user, program, trail_id, trail_number):
+    """
+    Registra o acesso na fila (modo buffered) sem tocar nos agregados.
+
+    O acesso é aplicado pelo próximo flush_trail_access_events. O progresso
+    devolvido é o do modelo de leitura (UserProgramProgress) com este acesso
+    já refletido, sem ser salvo.
+
+    Args:
+        user: Usuário autenticado
+        program: Programa da trilha
+        trail_id: Identificador da trilha
+        trail_number: Número da trilha no programa (1-4)
+
+    Returns:
+        UserProgramProgress: Progresso do programa (não salvo)
+    """
+    TrailAccessEvent.objects.create(
+        user=user, program=program, trail_id=trail_id, trail_number=trail_number
+    )
+    progress = UserProgramProgress.objects.filter(user=user, program=program).first()
+    if progress is None:
+        progress = UserProgramProgress(user=user, program=program)
+    if trail_number not in progress.trails_accessed:
+        progress.trails_accessed = sorted(progress.trails_accessed + [trail_number])
+    progress.last_accessed_trail = max(progress.last_accessed_trail, trail_number)
+    progress.total_access_count += 1
+    return progress
+
+
+def flush_trail_access_events(batch_size=5000):
+    """
+    Aplica um lote de acessos enfileirados (modo buffered).
+
+    Os eventos são agregados por (usuário, trilha) e aplicados com
+    apply_trail_accesses na mesma transação em que são removidos da fila.
+    No PostgreSQL o flush segura o lock consultivo TRAIL_ACCESS_FLUSH_LOCK_ID
+    até o fim da transação: se outro processo já estiver aplicando um lote,
+    este retorna 0 sem ler a fila, em vez de gravar valores concorrentes.
+
+    Args:
+        batch_size: Número máximo de eventos lidos da fila
+
+    Returns:
+        int: Número de eventos aplicados
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [TRAIL_ACCESS_FLUSH_LOCK_ID])
+                if not cursor.fetchone()[0]:
+                    return 0
+        events = list(
+            TrailAccessEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'user_id', 'program', 'trail_id', 'trail_number', 'created_at')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        pending = {}
+        for _, user_id, program, trail_id, trail_number, created_at in events:
+            access = pending.get((user_id, trail_id))
+            if access is None:
+                pending[(user_id, trail_id)] = PendingAccess(
+                    user_id, program, trail_id, trail_number, 1, created_at, created_at
+                )
+            else:
+                access.count += 1
+                access.first_at = min(access.first_at, created_at)
+                access.last_at = max(access.last_at, created_at)
+
+        apply_trail_accesses(list(pending.values()))
+        TrailAccessEvent.objects.filter(id__in=[event[0] for event in events]).delete()
+    return len(events)
+
+
+def record_badge_earned(user, badge_definition, earned_at):
+    """
+    Incrementa as estatísticas de badges do usuário com um badge recém-conquistado.
+
+    Um único UPDATE com expressões F(); se o usuário ainda não tem estatísticas,
+    elas são criadas com o recálculo completo (UserBadgeStats.update_stats),
+    que já inclui o novo badge.
+
+    Args:
+        user: Usuário que conquistou o badge
+        badge_definition: BadgeDefinition do badge
+        earned_at: Data da conquista (UserBadge.earned_at)
+    """
+    type_field = f"{badge_definition.badge_type.lower()}_badges"
+    program_field = f"{badge_definition.program.lower()}_badges"
+    updated = UserBadgeStats.objects.filter(user=user).update(**{
+        type_field: F(type_field) + 1,
+        program_field: F(program_field) + 1,
+        'total_badges': F('total_badges') + 1,
+        'completion_percentage': (F('total_badges') + 1) * 100.0 / TOTAL_BADGES,
+        'first_badge_earned': Coalesce(F('first_badge_earned'), Value(earned_at)),
+        'last_badge_earned': earned_at,
+        'updated_at': timezone.now(),
+    })
+    if not updated:
+        stats, _ = UserBadgeStats.objects.get_or_create(user=user)
+        stats.update_stats()
+
+
+def rebuild_program_progress(user):
+    """
+    Recalcula o progresso dos programas do usuário a partir dos acessos (TrailAccess).
+
+    Args:
+        user: Usuário
+
+    Returns:
+        bool: True se algum progresso estava divergente
+    """
+    accessed = {}
+    for program, trail_number in TrailAccess.objects.filter(user=user).values_list('program', 'trail_number'):
+        accessed.setdefault(program, set()).add(trail_number)
+    totals = TrailAccess.objects.filter(user=user).values('program').annotate(
+        total=Sum('access_count'), last=Max('trail_number')
+    )
+    current = {
+        progress.program: (progress.trails_accessed, progress.total_access_count, progress.last_accessed_trail)
+        for progress in UserProgramProgress.objects.filter(user=user)
+    }
+
+    rows = [
+        UserProgramProgress(
+            user=user,
+            program=row['program'],
+            trails_accessed=sorted(accessed[row['program']]),
+            total_access_count=row['total'],
+            last_accessed_trail=row['last'],
+        )
+        for row in totals
+    ]
+    changed = [
+        row for row in rows
+        if current.get(row.program) != (row.trails_accessed, row.total_access_count, row.last_accessed_trail)
+    ]
+    UserProgramProgress.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=['user', 'program'],
+        update_fields=['last_accessed_trail', 'trails_accessed', 'total_access_count', 'updated_at'],
+    )
+    return bool(changed)
+
+
+def reconcile_user_stats(user):
+    """
+    Recalcula todos os agregados do usuário (programas, progresso geral e badges).
+
+    Usado pelo comando reconcile_progress_stats para corrigir divergências dos
+    contadores incrementais.
+
+    Args:
+        user: Usuário
+
+    Returns:
+        list: Nomes dos agregados que estavam divergentes
+    """
+    drifted = []
+    with transaction.atomic():
+        if rebuild_program_progress(user):
+            drifted.append('program_progress')
+
+        # Datas não entram na comparação: no modo buffered o acesso guarda a hora do flush
+        overall_fields = ['total_trails_accessed', 'total_access_count', 'programs_started',
+                          'programs_completed']
+        overall, _ = UserOverallProgress.objects.get_or_create(user=user)
+        before = [getattr(overall, field) for field in overall_fields]
+        overall.update_stats()
+        if before != [getattr(overall, field) for field in overall_fields]:
+            drifted.append('overall_progress')
+
+        badge_fields = ['bronze_badges', 'silver_badges', 'gold_badges', 'total_badges',
+                        'proind_badges', 'prodepe_badges', 'prodeauto_badges',
+                        'first_badge_earned', 'last_badge_earned']
+        badge_stats, _ = UserBadgeStats.objects.get_or_create(user=user)
+        before = [getattr(badge_stats, field) for field in badge_fields]
+        badge_stats.update_stats()
+        if before != [getattr(badge_stats, field) for field in badge_fields]:
+            drifted.append('badge_stats')
+        invalidate_snapshot(user.pk)
+    return drifted
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .badge_catalog import bump_catalog_version
+from .models import BadgeDefinition
+
+
+@receiver(post_save, sender=BadgeDefinition)
+@receiver(post_delete, sender=BadgeDefinition)
+def badge_definition_changed(sender, **kwargs):
+    """Troca a versão do catálogo de badges quando uma definição muda"""
+    transaction.on_commit(bump_catalog_version)
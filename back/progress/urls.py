@@ -8,6 +8,7 @@ urlpatterns = [
     path('track/', views.track_trail_access, name='track_trail_access'),
     path('user/', views.get_user_progress, name='get_user_progress'),
     path('program/<str:program>/', views.get_program_progress, name='get_program_progress'),
+    path('dashboard/', views.get_dashboard, name='get_dashboard'),
     
     # Badge system
     path('challenges/complete/', views.complete_challenge, name='complete_challenge'),
@@ -2,23 +2,22 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.utils import timezone
+from django.conf import settings
+from django.utils.cache import parse_etags
 from django.db import transaction
-from django.db import models
 
 from .models import (
-    TrailAccess, UserProgramProgress, UserOverallProgress,
-    ChallengeCompletion, UserBadge, UserBadgeStats, BadgeDefinition,
-    CertificateTest
+    UserProgramProgress, ChallengeCompletion, UserBadge, CertificateTest
 )
 from .serializers import (
     TrackTrailAccessSerializer, 
     UserProgramProgressSerializer,
-    UserOverallProgressSerializer,
-    TrailAccessSerializer,
     CertificateTestSubmissionSerializer,
     CertificateTestSerializer
 )
+from .badge_catalog import get_catalog
+from .dashboard import get_snapshot, invalidate_snapshot
+from .services import enqueue_trail_access, record_badge_earned, record_trail_access
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -33,70 +32,52 @@ def track_trail_access(request):
     data = serializer.validated_data
     user = request.user
     
+    if settings.PROGRESS_TRACKING_MODE == 'buffered':
+        # Apenas enfileira; o flush_trail_access_events aplica os acessos em lote
+        program_progress = enqueue_trail_access(
+            user,
+            program=data['program'],
+            trail_id=data['trail_id'],
+            trail_number=data['trail_number'],
+        )
+        return Response({
+            'status': 'queued',
+            'message': 'Acesso recebido',
+            'trail_access': {
+                'trail_id': data['trail_id'],
+            },
+            'program_progress': {
+                'program': program_progress.program,
+                'progress_percentage': program_progress.progress_percentage,
+                'trails_accessed': program_progress.trails_accessed,
+                'next_trail': program_progress.next_trail
+            }
+        }, status=status.HTTP_202_ACCEPTED)
+    
     try:
-        with transaction.atomic():
-            # 1. Registrar/atualizar acesso à trilha
-            trail_access, created = TrailAccess.objects.get_or_create(
-                user=user,
-                trail_id=data['trail_id'],
-                defaults={
-                    'program': data['program'],
-                    'trail_number': data['trail_number'],
-                }
-            )
-            
-            if not created:
-                trail_access.access_count += 1
-                trail_access.last_access = timezone.now()
-                trail_access.save()
-            
-            # 2. Atualizar progresso do programa
-            program_progress, _ = UserProgramProgress.objects.get_or_create(
-                user=user,
-                program=data['program'],
-            )
-            
-            # Adicionar trilha se não estiver na lista
-            if data['trail_number'] not in program_progress.trails_accessed:
-                program_progress.trails_accessed.append(data['trail_number'])
-                program_progress.trails_accessed.sort()
-            
-            # Atualizar última trilha acessada
-            program_progress.last_accessed_trail = max(
-                program_progress.last_accessed_trail, 
-                data['trail_number']
-            )
-            
-            # Recalcular total de acessos do programa
-            program_progress.total_access_count = TrailAccess.objects.filter(
-                user=user, program=data['program']
-            ).aggregate(
-                total=models.Sum('access_count')
-            )['total'] or 0
-            
-            program_progress.save()
-            
-            # 3. Atualizar/criar progresso geral
-            overall_progress, _ = UserOverallProgress.objects.get_or_create(
-                user=user
-            )
-            overall_progress.update_stats()
-            
-            return Response({
-                'status': 'success',
-                'message': 'Acesso registrado com sucesso',
-                'trail_access': {
-                    'trail_id': trail_access.trail_id,
-                    'access_count': trail_access.access_count,
-                    'is_first_access': created
-                },
-                'program_progress': {
-                    'program': program_progress.program,
-                    'progress_percentage': program_progress.progress_percentage,
-                    'trails_accessed': program_progress.trails_accessed,
-                    'next_trail': program_progress.next_trail
-                }
-            }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        result = record_trail_access(
+            user,
+            program=data['program'],
+            trail_id=data['trail_id'],
+            trail_number=data['trail_number'],
+        )
+        program_progress = result.program_progress
+        
+        return Response({
+            'status': 'success',
+            'message': 'Acesso registrado com sucesso',
+            'trail_access': {
+                'trail_id': result.trail_id,
+                'access_count': result.access_count,
+                'is_first_access': result.created
+            },
+            'program_progress': {
+                'program': program_progress.program,
+                'progress_percentage': program_progress.progress_percentage,
+                'trails_accessed': program_progress.trails_accessed,
+                'next_trail': program_progress.next_trail
+            }
+        }, status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK)
     
     except Exception as e:
         return Response({
@@ -104,37 +85,37 @@ def track_trail_access(request):
             'message': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _snapshot_response(request, section=None):
+    """
+    Responde com o snapshot do painel do usuário (ou uma seção dele), com
+    ETag e 304 Not Modified quando o cliente já tem a versão atual
+    """
+    snapshot = get_snapshot(request.user)
+    etag = f'"{snapshot["etag"]}"'
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(snapshot['sections'] if section is None else snapshot['sections'][section])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_dashboard(request):
+    """
+    Retorna o painel completo do usuário (progresso, badges e certificados) em um único documento
+    """
+    return _snapshot_response(request)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_progress(request):
     """
     Retorna o progresso completo do usuário
     """
-    user = request.user
-    
-    # Progresso por programa
-    program_progresses = UserProgramProgress.objects.filter(user=user)
-    program_data = UserProgramProgressSerializer(program_progresses, many=True).data
-    
-    # Progresso geral
-    overall_progress, _ = UserOverallProgress.objects.get_or_create(user=user)
-    overall_progress.update_stats()  # Garantir dados atualizados
-    overall_data = UserOverallProgressSerializer(overall_progress).data
-    
-    total_challenges = ChallengeCompletion.objects.filter(user=user).count()
-    
-    # Acessos recentes (últimos 10)
-    recent_accesses = TrailAccess.objects.filter(
-        user=user
-    ).order_by('-last_access')[:10]
-    recent_data = TrailAccessSerializer(recent_accesses, many=True).data
-    
-    return Response({
-        'program_progress': program_data,
-        'overall_progress': overall_data,
-        'recent_accesses': recent_data,
-        'total_challenges_completed': total_challenges,
-    })
+    return _snapshot_response(request, 'progress')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -192,14 +173,15 @@ def complete_challenge(request):
             badge_earned = None
             if created:  # Primeira conclusão
                 # Buscar definição do badge correspondente
-                try:
-                    badge_def = BadgeDefinition.objects.get(
-                        program=serializer_data['program'],
-                        trail_number=serializer_data['trail_number'],
-                        difficulty=serializer_data['difficulty'],
-                        is_active=True
-                    )
-                    
+                catalog = get_catalog()
+                badge_def = catalog.get(
+                    serializer_data['program'],
+                    serializer_data['trail_number'],
+                    serializer_data['difficulty']
+                )
+                
+                # Sem definição: pode acontecer se não rodou o command
+                if badge_def is not None:
                     # Criar badge para o usuário
                     user_badge = UserBadge.objects.create(
                         user=user,
@@ -208,26 +190,25 @@ def complete_challenge(request):
                     )
                     
                     # Atualizar estatísticas de badges
-                    badge_stats, _ = UserBadgeStats.objects.get_or_create(user=user)
-                    badge_stats.update_stats()
+                    record_badge_earned(user, badge_def, user_badge.earned_at)
                     
+                    badge_data = catalog.data[badge_def.id]
                     badge_earned = {
                         'id': user_badge.id,
-                        'name': badge_def.name,
-                        'image_url': badge_def.badge_image_url,
-                        'image_path': badge_def.badge_image,
-                        'type': badge_def.badge_type,
-                        'description': badge_def.description
+                        'name': badge_data['name'],
+                        'image_url': badge_data['image_url'],
+                        'image_path': badge_data['image_path'],
+                        'type': badge_data['type'],
+                        'description': badge_data['description']
                     }
-                    
-                except BadgeDefinition.DoesNotExist:
-                    # Badge definition não existe - pode acontecer se não rodou o command
-                    pass
             else:
                 # Atualizar tentativas se não é primeira vez
                 completion.attempts += 1
                 completion.save()
             
+            if created:
+                invalidate_snapshot(user.pk)
+            
             return Response({
                 'status': 'success',
                 'completion_id': completion.id,
@@ -249,45 +230,7 @@ def get_user_badges(request):
     """
     Retorna todos os badges do usuário com URLs de imagem
     """
-    user_badges = UserBadge.objects.filter(user=request.user).select_related(
-        'badge_definition', 'challenge_completion'
-    ).order_by('-earned_at')
-    
-    badges_data = []
-    for badge in user_badges:
-        badges_data.append({
-            'id': badge.id,
-            'name': badge.badge_definition.name,
-            'description': badge.badge_definition.description,
-            'image_url': badge.badge_definition.badge_image_url,  # URL da imagem
-            'image_path': badge.badge_definition.badge_image,     # Caminho relativo
-            'type': badge.badge_definition.badge_type,
-            'program': badge.badge_definition.program,
-            'trail_number': badge.badge_definition.trail_number,
-            'difficulty': badge.badge_definition.difficulty,
-            'earned_at': badge.earned_at,
-            'score': float(badge.challenge_completion.score) if badge.challenge_completion.score else None,
-        })
-    
-    # Estatísticas
-    badge_stats, _ = UserBadgeStats.objects.get_or_create(user=request.user)
-    badge_stats.update_stats()
-    
-    return Response({
-        'badges': badges_data,
-        'stats': {
-            'total_badges': badge_stats.total_badges,
-            'bronze_badges': badge_stats.bronze_badges,
-            'silver_badges': badge_stats.silver_badges,
-            'gold_badges': badge_stats.gold_badges,
-            'completion_percentage': float(badge_stats.completion_percentage),
-            'proind_badges': badge_stats.proind_badges,
-            'prodepe_badges': badge_stats.prodepe_badges,
-            'prodeauto_badges': badge_stats.prodeauto_badges,
-            'first_badge_earned': badge_stats.first_badge_earned,
-            'last_badge_earned': badge_stats.last_badge_earned,
-        }
-    })
+    return _snapshot_response(request, 'badges')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -295,35 +238,7 @@ def get_available_badges(request):
     """
     Retorna badges disponíveis com URLs de imagem
     """
-    # Badges já conquistados
-    earned_badge_ids = UserBadge.objects.filter(user=request.user).values_list(
-        'badge_definition_id', flat=True
-    )
-    
-    # Badges disponíveis
-    available_badges = BadgeDefinition.objects.filter(
-        is_active=True
-    ).exclude(id__in=earned_badge_ids).order_by('program', 'trail_number', 'difficulty')
-    
-    available_data = []
-    for badge in available_badges:
-        available_data.append({
-            'id': badge.id,
-            'name': badge.name,
-            'description': badge.description,
-            'image_url': badge.badge_image_url,  # URL da imagem
-            'image_path': badge.badge_image,     # Caminho relativo
-            'type': badge.badge_type,
-            'program': badge.program,
-            'trail_number': badge.trail_number,
-            'difficulty': badge.difficulty,
-        })
-    
-    return Response({
-        'available_badges': available_data,
-        'total_available': len(available_data),
-        'total_possible': BadgeDefinition.objects.filter(is_active=True).count()
-    })
+    return _snapshot_response(request, 'available_badges')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -331,36 +246,7 @@ def get_badge_stats(request):
     """
     Retorna estatísticas detalhadas de badges do usuário
     """
-    badge_stats, _ = UserBadgeStats.objects.get_or_create(user=request.user)
-    badge_stats.update_stats()
-    
-    # Progresso por programa
-    program_stats = []
-    for program in ['PROIND', 'PRODEPE', 'PRODEAUTO']:
-        program_badges = UserBadge.objects.filter(
-            user=request.user,
-            badge_definition__program=program
-        ).count()
-        
-        program_stats.append({
-            'program': program,
-            'badges_earned': program_badges,
-            'total_possible': 12,  # 4 trilhas x 3 níveis
-            'percentage': round((program_badges / 12) * 100, 1)
-        })
-    
-    return Response({
-        'overall_stats': {
-            'total_badges': badge_stats.total_badges,
-            'bronze_badges': badge_stats.bronze_badges,
-            'silver_badges': badge_stats.silver_badges,
-            'gold_badges': badge_stats.gold_badges,
-            'completion_percentage': float(badge_stats.completion_percentage),
-            'first_badge_earned': badge_stats.first_badge_earned,
-            'last_badge_earned': badge_stats.last_badge_earned,
-        },
-        'program_stats': program_stats
-    })
+    return _snapshot_response(request, 'badge_stats')
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -393,6 +279,7 @@ def submit_certificate_test(request):
                 passed=data['passed'],
                 answers=answers
             )
+            invalidate_snapshot(user.pk)
             
             return Response({
                 'status': 'success',
@@ -416,29 +303,7 @@ def get_user_certificates(request):
     """
     Retorna todos os certificados do usuário
     """
-    user = request.user
-    certificates = CertificateTest.objects.filter(user=user).order_by('-completed_at')
-    
-    certificates_data = []
-    for cert in certificates:
-        certificates_data.append({
-            'id': cert.id,
-            'program': cert.program,
-            'track': cert.track,
-            'score': float(cert.score),
-            'correct_answers': cert.correct_answers,
-            'total_questions': cert.total_questions,
-            'passed': cert.passed,
-            'completed_at': cert.completed_at,
-            'status': 'Aprovado' if cert.passed else 'Reprovado'
-        })
-    
-    return Response({
-        'certificates': certificates_data,
-        'total_certificates': len(certificates_data),
-        'passed_certificates': len([c for c in certificates_data if c['passed']]),
-        'failed_certificates': len([c for c in certificates_data if not c['passed']])
-    })
+    return _snapshot_response(request, 'certificates')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -446,39 +311,4 @@ def get_completed_certificates(request):
     """
     Retorna apenas os certificados aprovados (completados) pelo usuário
     """
-    user = request.user
-    print(f"🔍 Buscando certificados completados para usuário: {user.email}")
-    print(f"🔍 Headers da requisição: {dict(request.headers)}")
-    print(f"🔍 Authorization header: {request.headers.get('Authorization', 'Não encontrado')}")
-    
-    # Buscar todos os certificados do usuário (aprovados e reprovados)
-    all_certificates = CertificateTest.objects.filter(user=user).order_by('-completed_at')
-    print(f"🔍 Total de certificados do usuário: {all_certificates.count()}")
-    
-    for cert in all_certificates:
-        print(f"🔍 Certificado: {cert.program}-{cert.track}, passed: {cert.passed}, score: {cert.score}")
-    
-    # Buscar apenas os aprovados
-    completed_certificates = CertificateTest.objects.filter(
-        user=user, 
-        passed=True
-    ).order_by('-completed_at')
-    
-    print(f"🔍 Certificados aprovados: {completed_certificates.count()}")
-    
-    completed_data = []
-    for cert in completed_certificates:
-        completed_data.append({
-            'program': cert.program,
-            'track': cert.track,
-            'score': float(cert.score),
-            'completed_at': cert.completed_at,
-            'certificate_id': f"{cert.program}-{cert.track}"
-        })
-    
-    print(f"🔍 Dados retornados: {completed_data}")
-    
-    return Response({
-        'completed_certificates': completed_data,
-        'total_completed': len(completed_data)
-    })
\ No newline at end of file
+    return _snapshot_response(request, 'completed_certificates')
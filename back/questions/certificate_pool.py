@@ -0,0 +1,77 @@
+"""
+Per-track pools of certificate question ids.
+
+A certificate test draws 5 random ProblemQuestions from the approved HARD
+challenges of a track. The ids of those questions are cached per track, so a
+test only samples ids in Python and fetches the 5 chosen rows. The pools are
+invalidated by the Challenge/ProblemQuestion signals (see signals.py).
+"""
+import random
+
+from django.core.cache import caches
+
+from .models import Challenge, ProblemQuestion
+
+CACHE_ALIAS = 'questions'
+POOL_TIMEOUT = 3600
+CERTIFICATE_DIFFICULTY = 'HARD'
+
+
+def _pool_key(track_id):
+    return f"certificate_pool:{track_id}"
+
+
+def get_question_pool(track_id):
+    """
+    Return the ids of the problem questions eligible for certificates of a track
+
+    Args:
+        track_id (int): Track id
+
+    Returns:
+        list: ProblemQuestion ids
+    """
+    cache = caches[CACHE_ALIAS]
+    pool = cache.get(_pool_key(track_id))
+    if pool is None:
+        pool = list(
+            ProblemQuestion.objects.filter(
+                challenge__track_id=track_id,
+                challenge__status=Challenge.ChallengeStatus.APPROVED,
+                challenge__difficulty=CERTIFICATE_DIFFICULTY,
+            ).values_list('id', flat=True)
+        )
+        cache.set(_pool_key(track_id), pool, POOL_TIMEOUT)
+    return pool
+
+
+def invalidate_question_pool(track_id):
+    """Drop the cached pool of a track"""
+    caches[CACHE_ALIAS].delete(_pool_key(track_id))
+
+
+def sample_questions(track_id, count):
+    """
+    Pick random certificate questions of a track
+
+    Args:
+        track_id (int): Track id
+        count (int): Number of questions
+
+    Returns:
+        tuple: (list of ProblemQuestions in random order, size of the pool);
+        the list is empty when the pool has fewer than `count` questions
+    """
+    for attempt in range(2):
+        pool = get_question_pool(track_id)
+        if len(pool) < count:
+            return [], len(pool)
+
+        chosen = random.sample(pool, count)
+        questions = ProblemQuestion.objects.in_bulk(chosen)
+        if len(questions) == count:
+            return [questions[question_id] for question_id in chosen], len(pool)
+
+        # A question was deleted after the pool was cached: rebuild it once
+        invalidate_question_pool(track_id)
+    return [], len(pool)
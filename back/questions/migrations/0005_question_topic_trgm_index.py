@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Trigram index for the substring search of QuestionViewSet.by_topic.
+# Django compiles topic__icontains to UPPER("topic"::text) LIKE UPPER(...) on
+# PostgreSQL, so the index is built on that same expression. Other databases
+# (SQLite in development), or servers without the pg_trgm contrib module,
+# keep the plain scan.
+INDEX_NAME = 'questions_question_topic_trgm'
+
+
+def create_topic_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON questions_question '
+        f'USING gin (UPPER(topic::text) gin_trgm_ops)'
+    )
+
+
+def drop_topic_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_discursivequestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_topic_trgm_index, drop_topic_trgm_index),
+    ]
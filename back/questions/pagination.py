@@ -0,0 +1,37 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class ChallengeCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the challenge lists (newest first)
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class QuestionCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the AI generated questions (newest first).
+    The total is only counted when the client asks for it with ?count=true.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data, **extra):
+        payload = dict(extra)
+        if self.count is not None:
+            payload['count'] = self.count
+        payload.update(next=self.get_next_link(), previous=self.get_previous_link(), results=data)
+        return Response(payload)
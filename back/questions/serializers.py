@@ -110,6 +110,36 @@ class ChallengeSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('track',)
 
+class ChallengeListSerializer(serializers.ModelSerializer):
+    """
+    Challenge without the nested question bodies, for the list endpoints.
+    The question counts come from annotations of the list queryset.
+    """
+    sources = SourceSerializer(many=True, read_only=True)
+    track_name = serializers.CharField(source='track.name', read_only=True)
+    program_name = serializers.CharField(source='track.program.name', read_only=True)
+    problem_questions_count = serializers.IntegerField(read_only=True)
+    discursive_questions_count = serializers.IntegerField(read_only=True)
+    multiple_choice_questions_count = serializers.IntegerField(read_only=True)
+    questions_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Challenge
+        fields = (
+            'id', 'title', 'difficulty', 'status',
+            'track', 'track_name', 'program_name', 'sources',
+            'problem_questions_count', 'discursive_questions_count',
+            'multiple_choice_questions_count', 'questions_count'
+        )
+        read_only_fields = fields
+
+    def get_questions_count(self, obj):
+        return (
+            obj.problem_questions_count
+            + obj.discursive_questions_count
+            + obj.multiple_choice_questions_count
+        )
+
 class ChallengeUpdateStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = Challenge
@@ -0,0 +1,209 @@
+"""
+Bulk persistence of AI generated challenges.
+
+The generation endpoint (and batch generation, which writes hundreds of
+challenges at once) hands the validated pipeline output to
+persist_generated_challenges, which writes everything with a fixed number of
+queries: Programs, Tracks and Sources are resolved with IN queries, every
+table is written with bulk_create and the related objects of the returned
+challenges are loaded with prefetch_related_objects (one query per relation,
+whatever the number of challenges), so serializing them does not query again.
+
+bulk_create does not send post_save. That is fine for the certificate pool
+signals (signals.py): generated challenges are PENDING and only approved
+challenges enter the pools.
+"""
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from .models import (
+    Challenge, DiscursiveQuestion, MultipleChoiceQuestion, ProblemQuestion,
+    Program, Question, Source, Track
+)
+
+DECIMAL_PATTERN = re.compile(r"[-+]?\d+[\.,]?\d*")
+
+
+@dataclass
+class GeneratedChallenge:
+    """One pipeline output to persist, with the parameters it was generated for"""
+    program: str
+    track: str
+    topic: str
+    difficulty: str
+    question_type: str
+    data: dict
+
+    @property
+    def program_name(self):
+        return self.program.upper()
+
+    @property
+    def track_name(self):
+        return self.track.capitalize()
+
+    @property
+    def difficulty_enum(self):
+        # Map difficulty from "Médio" to "MEDIUM"
+        difficulty_map = {label: value for value, label in Question.Difficulty.choices}
+        return difficulty_map.get(self.difficulty.capitalize(), Question.Difficulty.MEDIUM)
+
+    @property
+    def is_discursive(self):
+        question_type = str(self.question_type).strip().lower()
+        is_calculation = question_type.startswith(('calc', 'cálc'))
+        return question_type.startswith('disc') and not is_calculation
+
+
+def parse_decimal_answer(raw_answer):
+    """
+    Parse the numeric answer of a calculation challenge (accepts comma or dot)
+
+    Raises:
+        ValueError: If the answer has no valid decimal number
+    """
+    match = DECIMAL_PATTERN.search(str(raw_answer))
+    if not match:
+        raise ValueError("challenge_answer must include a decimal number for calculation type")
+    try:
+        return Decimal(match.group(0).replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError("Invalid decimal value in challenge_answer")
+
+
+def _resolve_programs(names):
+    """Program by name, creating the missing ones (one IN query plus one insert)"""
+    Program.objects.bulk_create([Program(name=name) for name in names], ignore_conflicts=True)
+    return {program.name: program for program in Program.objects.filter(name__in=names)}
+
+
+def _resolve_tracks(keys, programs):
+    """Track by (program name, track name), creating the missing ones"""
+    program_ids = {programs[program_name].id for program_name, _ in keys}
+    track_names = {track_name for _, track_name in keys}
+
+    def lookup():
+        tracks = {}
+        # Track has no unique constraint: keep the oldest row, like get_or_create would find
+        for track in Track.objects.filter(program_id__in=program_ids, name__in=track_names).order_by('-id'):
+            tracks[(track.program_id, track.name)] = track
+        return tracks
+
+    tracks = lookup()
+    missing = [
+        Track(program=programs[program_name], name=track_name)
+        for program_name, track_name in keys
+        if (programs[program_name].id, track_name) not in tracks
+    ]
+    if missing:
+        Track.objects.bulk_create(missing)
+        tracks = lookup()
+
+    resolved = {}
+    for program_name, track_name in keys:
+        track = tracks[(programs[program_name].id, track_name)]
+        track.program = programs[program_name]
+        resolved[(program_name, track_name)] = track
+    return resolved
+
+
+def _resolve_sources(file_names):
+    """Source by file name: one insert ignoring the existing ones, then one IN query"""
+    Source.objects.bulk_create([Source(file_name=name) for name in file_names], ignore_conflicts=True)
+    return {source.file_name: source for source in Source.objects.filter(file_name__in=file_names)}
+
+
+def persist_generated_challenges(items):
+    """
+    Persist generated challenges with their sources and questions in bulk
+
+    Args:
+        items (list[GeneratedChallenge]): Validated pipeline outputs
+
+    Returns:
+        list[Challenge]: The created challenges (PENDING), in the order of
+        items, with track, program, sources and questions already loaded
+
+    Raises:
+        ValueError: If a calculation answer has no decimal number (nothing is saved)
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    with transaction.atomic():
+        programs = _resolve_programs({item.program_name for item in items})
+        tracks = _resolve_tracks({(item.program_name, item.track_name) for item in items}, programs)
+        sources = _resolve_sources({
+            source_data['file_name']
+            for item in items
+            for source_data in item.data.get('sources', [])
+        })
+
+        challenges = Challenge.objects.bulk_create([
+            Challenge(
+                track=tracks[(item.program_name, item.track_name)],
+                title=f"{item.topic.capitalize()}",
+                difficulty=item.difficulty_enum,
+                status=Challenge.ChallengeStatus.PENDING
+            )
+            for item in items
+        ])
+
+        through_rows = []
+        problem_questions, discursive_questions, multiple_choice_questions = [], [], []
+        for challenge, item in zip(challenges, items):
+            challenge_sources = list({
+                source_data['file_name']: sources[source_data['file_name']]
+                for source_data in item.data.get('sources', [])
+            }.values())
+            through_rows.extend(
+                Challenge.sources.through(challenge_id=challenge.id, source_id=source.id)
+                for source in challenge_sources
+            )
+
+            # Discursive or Problem Questions based on type
+            for pq_data in item.data.get('challenges', []):
+                if item.is_discursive:
+                    discursive_questions.append(DiscursiveQuestion(
+                        challenge=challenge,
+                        statement=pq_data['challenge'],
+                        answer_text=pq_data['challenge_answer'],
+                        justification=pq_data['challenge_justification']
+                    ))
+                else:
+                    problem_questions.append(ProblemQuestion(
+                        challenge=challenge,
+                        statement=pq_data['challenge'],
+                        correct_answer=parse_decimal_answer(pq_data['challenge_answer']),
+                        justification=pq_data['challenge_justification']
+                    ))
+
+            multiple_choice_questions.extend(
+                MultipleChoiceQuestion(
+                    challenge=challenge,
+                    statement=mcq_data['question'],
+                    option_a=mcq_data['options']['A'],
+                    option_b=mcq_data['options']['B'],
+                    option_c=mcq_data['options']['C'],
+                    option_d=mcq_data['options']['D'],
+                    option_e=mcq_data['options']['E'],
+                    correct_option=mcq_data['correct_answer'],
+                    justification=mcq_data['question_justification']
+                )
+                for mcq_data in item.data.get('questions', [])
+            )
+
+        Challenge.sources.through.objects.bulk_create(through_rows)
+        ProblemQuestion.objects.bulk_create(problem_questions)
+        DiscursiveQuestion.objects.bulk_create(discursive_questions)
+        MultipleChoiceQuestion.objects.bulk_create(multiple_choice_questions)
+
+    prefetch_related_objects(
+        challenges, 'sources', 'problem_questions', 'discursive_questions', 'multiple_choice_questions'
+    )
+    return challenges
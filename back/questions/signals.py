@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .certificate_pool import invalidate_question_pool
+from .models import Challenge, ProblemQuestion
+
+
+def _invalidate_on_commit(track_id):
+    transaction.on_commit(lambda: invalidate_question_pool(track_id))
+
+
+def _origin_model(origin):
+    """Model of the instance or queryset a delete() was called on"""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def challenge_changed(sender, instance, **kwargs):
+    """Approval, edits and deletions change the certificate pool of the track"""
+    _invalidate_on_commit(instance.track_id)
+
+
+@receiver(post_save, sender=ProblemQuestion)
+@receiver(post_delete, sender=ProblemQuestion)
+def problem_question_changed(sender, instance, origin=None, **kwargs):
+    # Deleting a challenge (or its track) cascades into its questions: the
+    # challenge handler already invalidates the track once, skip the per-row query
+    if origin is not None and _origin_model(origin) is not ProblemQuestion:
+        return
+    track_id = Challenge.objects.filter(pk=instance.challenge_id).values_list('track_id', flat=True).first()
+    if track_id is not None:
+        _invalidate_on_commit(track_id)
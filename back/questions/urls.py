@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import QuestionViewSet, PendingChallengeListView, AllChallengesListView, ChallengeDetailView, ProblemQuestionDetailView, DiscursiveQuestionDetailView, MultipleChoiceQuestionDetailView, CertificateQuestionsView
+from .views import QuestionViewSet, PendingChallengeListView, AllChallengesListView, ChallengeCountsView, ChallengeDetailView, ProblemQuestionDetailView, DiscursiveQuestionDetailView, MultipleChoiceQuestionDetailView, CertificateQuestionsView
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/challenges/', AllChallengesListView.as_view(), name='all-challenges'),
     path('api/challenges/pending/', PendingChallengeListView.as_view(), name='pending-challenges'),
+    path('api/challenges/counts/', ChallengeCountsView.as_view(), name='challenge-counts'),
     path('api/challenges/<int:pk>/', ChallengeDetailView.as_view(), name='challenge-detail'),
     path('api/problem-questions/<int:pk>/', ProblemQuestionDetailView.as_view(), name='problem-question-detail'),
     path('api/discursive-questions/<int:pk>/', DiscursiveQuestionDetailView.as_view(), name='discursive-question-detail'),
@@ -4,8 +4,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-import random
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from .certificate_pool import sample_questions
 from .models import Question, Option, Challenge, ProblemQuestion, DiscursiveQuestion, MultipleChoiceQuestion, Program, Track
 from .serializers import (
     QuestionSerializer, 
@@ -13,18 +14,21 @@ from .serializers import (
     QuestionUpdateSerializer,
     OptionSerializer,
     ChallengeSerializer,
+    ChallengeListSerializer,
     ChallengeUpdateStatusSerializer,
     ProblemQuestionSerializer,
     DiscursiveQuestionSerializer,
     MultipleChoiceQuestionSerializer,
 )
+from .pagination import ChallengeCursorPagination, QuestionCursorPagination
 
 class QuestionViewSet(viewsets.ModelViewSet):
     """
     ViewSet to manage multiple choice questions
     """
-    queryset = Question.objects.all()
+    queryset = Question.objects.prefetch_related('options')
     serializer_class = QuestionSerializer
+    pagination_class = QuestionCursorPagination
     permission_classes = [AllowAny]  # Temporarily for development
     
     def get_serializer_class(self):
@@ -34,14 +38,15 @@ class QuestionViewSet(viewsets.ModelViewSet):
             return QuestionUpdateSerializer
         return QuestionSerializer
     
+    def _paginated_list(self, questions, **extra):
+        """Serialize one cursor page of questions (count only with ?count=true)"""
+        page = self.paginate_queryset(questions)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, **extra)
+    
     def list(self, request):
         """List all questions"""
-        questions = self.get_queryset()
-        serializer = self.get_serializer(questions, many=True)
-        return Response({
-            'count': questions.count(),
-            'results': serializer.data
-        })
+        return self._paginated_list(self.get_queryset())
     
     def retrieve(self, request, pk=None):
         """Get a specific question"""
@@ -77,46 +82,80 @@ class QuestionViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def by_topic(self, request):
-        """List questions by topic"""
+        """List questions by topic (substring search, backed by a trigram index on PostgreSQL)"""
         topic = request.query_params.get('topic', '')
         if topic:
             questions = self.get_queryset().filter(topic__icontains=topic)
         else:
             questions = self.get_queryset()
         
-        serializer = self.get_serializer(questions, many=True)
-        return Response({
-            'topic': topic,
-            'count': questions.count(),
-            'results': serializer.data
-        })
+        return self._paginated_list(questions, topic=topic)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
         """List only active questions"""
-        questions = self.get_queryset().filter(is_active=True)
-        serializer = self.get_serializer(questions, many=True)
-        return Response({
-            'count': questions.count(),
-            'results': serializer.data
-        })
+        return self._paginated_list(self.get_queryset().filter(is_active=True))
+
+def _question_count(model):
+    """Correlated COUNT of a question type per challenge (avoids the row explosion of joining three tables)"""
+    counts = model.objects.filter(challenge=OuterRef('pk')).order_by().values('challenge').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def challenge_list_queryset():
+    """
+    Challenges for the list endpoints: track and program joined, sources
+    prefetched and the question counts annotated, so a page is served in a
+    constant number of queries
+    """
+    return Challenge.objects.select_related('track__program').prefetch_related('sources').annotate(
+        problem_questions_count=_question_count(ProblemQuestion),
+        discursive_questions_count=_question_count(DiscursiveQuestion),
+        multiple_choice_questions_count=_question_count(MultipleChoiceQuestion),
+    )
+
 
 class PendingChallengeListView(generics.ListAPIView):
     """
     API endpoint to list all challenges with PENDING status.
     """
-    queryset = Challenge.objects.filter(status=Challenge.ChallengeStatus.PENDING).order_by('-id')
-    serializer_class = ChallengeSerializer
+    serializer_class = ChallengeListSerializer
+    pagination_class = ChallengeCursorPagination
     permission_classes = [AllowAny] # TODO: Change to IsAdminUser or similar in production
 
+    def get_queryset(self):
+        return challenge_list_queryset().filter(status=Challenge.ChallengeStatus.PENDING)
+
 class AllChallengesListView(generics.ListAPIView):
     """
-    API endpoint to list all challenges.
+    API endpoint to list all challenges, optionally filtered by ?status=PENDING|APPROVED.
     """
-    queryset = Challenge.objects.all().order_by('-id')
-    serializer_class = ChallengeSerializer
+    serializer_class = ChallengeListSerializer
+    pagination_class = ChallengeCursorPagination
     permission_classes = [AllowAny] # TODO: Change to IsAdminUser or similar in production
 
+    def get_queryset(self):
+        queryset = challenge_list_queryset()
+        challenge_status = self.request.query_params.get('status', '').upper()
+        if challenge_status in Challenge.ChallengeStatus.values:
+            queryset = queryset.filter(status=challenge_status)
+        return queryset
+
+class ChallengeCountsView(generics.GenericAPIView):
+    """
+    API endpoint with the number of challenges per status (admin stats cards).
+    """
+    permission_classes = [AllowAny] # TODO: Change to IsAdminUser or similar in production
+
+    def get(self, request):
+        counts = Challenge.objects.aggregate(
+            pending=Count('id', filter=Q(status=Challenge.ChallengeStatus.PENDING)),
+            approved=Count('id', filter=Q(status=Challenge.ChallengeStatus.APPROVED)),
+        )
+        return Response(counts)
+
 class ChallengeDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to retrieve, update (approve), or delete (reject) a challenge.
@@ -125,6 +164,14 @@ class ChallengeDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ChallengeSerializer
     permission_classes = [AllowAny] # TODO: Change to IsAdminUser or similar in production
 
+    def get_queryset(self):
+        if self.request.method != 'GET':
+            return super().get_queryset()
+        # Full nesting for the detail view, loaded with one query per relation
+        return super().get_queryset().select_related('track__program').prefetch_related(
+            'sources', 'problem_questions', 'discursive_questions', 'multiple_choice_questions'
+        )
+
     def get_serializer_class(self):
         if self.request.method == 'PATCH':
             return ChallengeUpdateStatusSerializer
@@ -199,21 +246,11 @@ class CertificateQuestionsView(generics.GenericAPIView):
             program = Program.objects.get(name__iexact=program_name)
             track = Track.objects.get(program=program, name__iexact=track_name)
             
-            # Get approved challenges for this track with HARD difficulty only
-            challenges = Challenge.objects.filter(
-                track=track,
-                status=Challenge.ChallengeStatus.APPROVED,
-                difficulty='HARD'  # Only HARD difficulty for certificates
-            )
-            
-            # Get all problem questions from these challenges
-            problem_questions = ProblemQuestion.objects.filter(
-                challenge__in=challenges
-            ).select_related('challenge')
+            # Sample from the cached ids of the approved HARD (certificate) questions of the track
+            selected_questions, total_questions = sample_questions(track.id, 5)
             
             # Check if there are at least 5 problem questions available
-            total_questions = problem_questions.count()
-            if total_questions < 5:
+            if not selected_questions:
                 return Response(
                     {
                         "error": f"Not enough problem questions available for certificate. Found {total_questions} questions, need at least 5. Please create more challenges with calculation questions for this program and track.",
@@ -225,9 +262,6 @@ class CertificateQuestionsView(generics.GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Randomly select 5 questions
-            selected_questions = random.sample(list(problem_questions), 5)
-            
             # Serialize the questions
             serializer = ProblemQuestionSerializer(selected_questions, many=True)
             
@@ -0,0 +1,49 @@
+"""
+Common helpers shared by the benchmark scripts
+"""
+
+from typing import List, Dict, Any
+import json
+import math
+
+
+def load_gold_set(path: str) -> Dict[str, Any]:
+    """
+    Load and validate a gold set file
+
+    Args:
+        path (str): Path to the gold set JSON file
+
+    Returns:
+        Dict[str, Any]: Gold set with its version and items
+    """
+    with open(path, encoding="utf-8") as f:
+        gold_set = json.load(f)
+
+    if "version" not in gold_set or not gold_set.get("items"):
+        raise ValueError(f"Gold set {path} must define 'version' and a non-empty 'items' list")
+
+    for item in gold_set["items"]:
+        if not item.get("question") or not item.get("expected"):
+            raise ValueError(f"Gold set item {item.get('id')} must define 'question' and 'expected'")
+
+    return gold_set
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values
+
+    Args:
+        values (List[float]): Sample values
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value (0.0 for an empty sample)
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,299 @@
+"""
+Load Test - End-to-end throughput and tail latency of the chatbot API
+
+Drives the Django chatbot endpoints (chat and challenge generation) with a pool
+of concurrent asyncio workers and reports throughput, error rate, latency
+percentiles and the server-side stage timings (retrieval, LLM, ...) returned by
+the API in debug mode. Questions come from the retrieval gold set.
+
+Run the backend with the offline LLM stand-in so the numbers measure retrieval,
+serialization and database writes without network access or API spend:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=lognormal:800:0.4 python back/manage.py runserver
+
+Usage (from the project root):
+    python -m chatbot.app.benchmarks.load_test --scenario chat --concurrency 16 --requests 200
+    python -m chatbot.app.benchmarks.load_test --scenario mixed --challenge-ratio 0.2 --duration 120
+"""
+
+from .common import load_gold_set, percentile
+
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GOLD_SET = os.path.join(BENCHMARKS_DIR, "gold_sets", "sefaz_gold_v1.json")
+DEFAULT_REPORTS_DIR = os.path.join(BENCHMARKS_DIR, "reports")
+REPORT_SCHEMA_VERSION = 1
+
+CHAT_PATH = "/api/chatbot/chat/"
+CHALLENGE_PATH = "/api/chatbot/generate-question/"
+SCENARIOS = ("chat", "challenge", "mixed")
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """
+    Summarize a latency sample
+
+    Args:
+        latencies_ms (List[float]): Latencies in milliseconds
+
+    Returns:
+        Dict[str, float]: Mean, percentiles and max in milliseconds
+    """
+    if not latencies_ms:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": round(sum(latencies_ms) / len(latencies_ms), 3),
+        "p50": round(percentile(latencies_ms, 50), 3),
+        "p90": round(percentile(latencies_ms, 90), 3),
+        "p95": round(percentile(latencies_ms, 95), 3),
+        "p99": round(percentile(latencies_ms, 99), 3),
+        "max": round(max(latencies_ms), 3),
+    }
+
+
+class LoadTest:
+    """Concurrent load generator for the chatbot API"""
+
+    def __init__(self,
+                 base_url: str,
+                 scenario: str = "chat",
+                 concurrency: int = 8,
+                 total_requests: Optional[int] = 100,
+                 duration: Optional[float] = None,
+                 warmup_requests: int = 4,
+                 challenge_ratio: float = 0.2,
+                 gold_set_path: str = DEFAULT_GOLD_SET,
+                 timeout: float = 120.0,
+                 auth_token: Optional[str] = None,
+                 seed: int = 0):
+        """
+        Initialize the load test
+
+        Args:
+            base_url (str): Backend base URL, e.g. http://localhost:8000
+            scenario (str): "chat", "challenge" or "mixed"
+            concurrency (int): Number of concurrent workers
+            total_requests (Optional[int]): Measured requests to send (ignored when duration is set)
+            duration (Optional[float]): Measured run time in seconds
+            warmup_requests (int): Requests sent before measuring (pipeline/index warmup)
+            challenge_ratio (float): Fraction of challenge requests in the mixed scenario
+            gold_set_path (str): Gold set used as the source of questions/topics
+            timeout (float): Per-request timeout in seconds
+            auth_token (Optional[str]): JWT access token, if the endpoints require authentication
+            seed (int): Seed of the request mix
+        """
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{scenario}' (expected one of {', '.join(SCENARIOS)})")
+
+        self.base_url = base_url.rstrip("/")
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.duration = duration
+        self.warmup_requests = warmup_requests
+        self.challenge_ratio = challenge_ratio
+        self.timeout = timeout
+        self.headers = {"Authorization": f"JWT {auth_token}"} if auth_token else {}
+        self.rng = random.Random(seed)
+        self.questions = [item["question"] for item in load_gold_set(gold_set_path)["items"]]
+
+    def _next_request(self) -> Dict[str, Any]:
+        """Pick the endpoint and payload of the next request"""
+        question = self.rng.choice(self.questions)
+        if self.scenario == "challenge" or (self.scenario == "mixed" and self.rng.random() < self.challenge_ratio):
+            return {
+                "endpoint": "challenge",
+                "path": CHALLENGE_PATH,
+                "json": {
+                    "program": "LOADTEST",
+                    "track": "Trilha de carga",
+                    "topic": question,
+                    "difficulty": self.rng.choice(["Fácil", "Médio", "Difícil"]),
+                    "type": self.rng.choice(["Discursiva", "Cálculo"]),
+                    "debug": True
+                }
+            }
+        return {"endpoint": "chat", "path": CHAT_PATH, "json": {"message": question, "debug": True}}
+
+    async def _send(self, client: httpx.AsyncClient, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and capture its latency, status and server-side timings"""
+        start = time.perf_counter()
+        sample = {"endpoint": request["endpoint"], "status": None, "error": None, "timings": None}
+        try:
+            response = await client.post(request["path"], json=request["json"])
+            sample["status"] = response.status_code
+            if response.status_code >= 400:
+                sample["error"] = f"HTTP {response.status_code}"
+            else:
+                body = response.json()
+                sample["timings"] = body.get("timings") if isinstance(body, dict) else None
+        except (httpx.HTTPError, ValueError) as e:
+            sample["error"] = type(e).__name__
+        sample["latency_ms"] = (time.perf_counter() - start) * 1000.0
+        return sample
+
+    async def _worker(self, client: httpx.AsyncClient, samples: List[Dict[str, Any]], state: Dict[str, Any]):
+        while True:
+            if self.duration is not None:
+                if time.perf_counter() >= state["deadline"]:
+                    return
+            elif state["issued"] >= self.total_requests:
+                return
+            state["issued"] += 1
+            samples.append(await self._send(client, self._next_request()))
+
+    async def run_async(self) -> Dict[str, Any]:
+        """
+        Run the warmup and the measured phase
+
+        Returns:
+            Dict[str, Any]: Load test report
+        """
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits, headers=self.headers) as client:
+            for _ in range(self.warmup_requests):
+                await self._send(client, self._next_request())
+
+            samples: List[Dict[str, Any]] = []
+            state = {"issued": 0, "deadline": time.perf_counter() + (self.duration or 0.0)}
+            started = time.perf_counter()
+            await asyncio.gather(*(self._worker(client, samples, state) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return self._build_report(samples, elapsed)
+
+    def run(self) -> Dict[str, Any]:
+        """Synchronous entry point of run_async"""
+        return asyncio.run(self.run_async())
+
+    def _build_report(self, samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        for endpoint in sorted({s["endpoint"] for s in samples}):
+            endpoint_samples = [s for s in samples if s["endpoint"] == endpoint]
+            ok = [s for s in endpoint_samples if s["error"] is None]
+
+            # Server-side stage timings (from the API debug mode)
+            stages: Dict[str, List[float]] = {}
+            for s in ok:
+                for stage in (s["timings"] or {}).get("stages", []):
+                    stages.setdefault(stage["name"], []).append(stage["ms"])
+
+            status_codes: Dict[str, int] = {}
+            for s in endpoint_samples:
+                key = str(s["status"] or s["error"])
+                status_codes[key] = status_codes.get(key, 0) + 1
+
+            endpoints[endpoint] = {
+                "requests": len(endpoint_samples),
+                "errors": len(endpoint_samples) - len(ok),
+                "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+                "latency_ms": latency_summary([s["latency_ms"] for s in ok]),
+                "status_codes": status_codes,
+                "server_stages_ms": {name: latency_summary(values) for name, values in sorted(stages.items())},
+            }
+
+        ok_samples = [s for s in samples if s["error"] is None]
+        return {
+            "schema_version": REPORT_SCHEMA_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "base_url": self.base_url,
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 3),
+            "requests": len(samples),
+            "errors": len(samples) - len(ok_samples),
+            "error_rate": round((len(samples) - len(ok_samples)) / len(samples), 4) if samples else 0.0,
+            "throughput_rps": round(len(ok_samples) / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": latency_summary([s["latency_ms"] for s in ok_samples]),
+            "endpoints": endpoints,
+        }
+
+
+def summarize_report(report: Dict[str, Any]) -> str:
+    """
+    Render a load test report as a human-readable table
+
+    Args:
+        report (Dict[str, Any]): Report produced by LoadTest.run
+
+    Returns:
+        str: Text summary
+    """
+    lines = [
+        f"Scenario: {report['scenario']} | concurrency: {report['concurrency']} | "
+        f"duration: {report['duration_s']}s | requests: {report['requests']} | error rate: {report['error_rate']:.2%}",
+        f"{'endpoint':<12} {'req':>6} {'err':>5} {'rps':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}",
+    ]
+    rows = list(report["endpoints"].items()) + [("total", report)]
+    for name, data in rows:
+        latency = data["latency_ms"]
+        lines.append(
+            f"{name:<12} {data['requests']:>6} {data['errors']:>5} {data['throughput_rps']:>8.2f} "
+            f"{latency['p50']:>10.1f} {latency['p95']:>10.1f} {latency['p99']:>10.1f} {latency['max']:>10.1f}"
+        )
+    for name, data in report["endpoints"].items():
+        if data["server_stages_ms"]:
+            lines.append(f"\nServer stages ({name}):")
+            for stage, latency in data["server_stages_ms"].items():
+                lines.append(f"  {stage:<22} p50 {latency['p50']:>9.1f} ms   p95 {latency['p95']:>9.1f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of the chatbot API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="chat")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Measured run time in seconds")
+    parser.add_argument("--warmup", type=int, default=4)
+    parser.add_argument("--challenge-ratio", type=float, default=0.2, help="Share of challenge requests in the mixed scenario")
+    parser.add_argument("--gold-set", default=DEFAULT_GOLD_SET)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--token", default=os.getenv("LOAD_TEST_TOKEN"), help="JWT access token (or LOAD_TEST_TOKEN)")
+    parser.add_argument("--output", help="Where to write the JSON report (defaults to benchmarks/reports/<timestamp>.json)")
+    args = parser.parse_args()
+
+    load_test = LoadTest(
+        base_url=args.base_url,
+        scenario=args.scenario,
+        concurrency=args.concurrency,
+        total_requests=args.requests,
+        duration=args.duration,
+        warmup_requests=args.warmup,
+        challenge_ratio=args.challenge_ratio,
+        gold_set_path=args.gold_set,
+        timeout=args.timeout,
+        auth_token=args.token
+    )
+    report = load_test.run()
+
+    output = args.output or os.path.join(
+        DEFAULT_REPORTS_DIR, f"load_{args.scenario}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(summarize_report(report))
+    print(f"\nReport written to: {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,348 @@
+"""
+Retrieval Benchmark - Measures retrieval quality and latency of the RAG pipeline
+
+Runs a versioned gold set of (question -> expected file/page) pairs against one or
+more pipeline configurations and reports recall@k, MRR, retrieval latency
+percentiles and indexing throughput (embeddings/sec). Every run can be saved as a
+JSON report so that two runs can be compared before changing hot-path parameters.
+
+Usage (from the project root):
+    python -m chatbot.app.benchmarks.retrieval_benchmark
+    python -m chatbot.app.benchmarks.retrieval_benchmark --configs my_configs.json --output reports/run.json
+    python -m chatbot.app.benchmarks.retrieval_benchmark --compare reports/old.json reports/new.json
+"""
+
+from ..rag_pipeline.step1_extraction import DocumentExtractor
+from ..rag_pipeline.step2_chunking import DocumentChunker
+from ..rag_pipeline.legal_chunking import LegalDocumentChunker
+from ..rag_pipeline.step3_embedding import EmbeddingManager
+from ..rag_pipeline.step4_search import SearchEngine
+from ..rag_pipeline.step5_chat import extract_keywords
+from .common import load_gold_set, percentile
+
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GOLD_SET = os.path.join(BENCHMARKS_DIR, "gold_sets", "sefaz_gold_v1.json")
+DEFAULT_REPORTS_DIR = os.path.join(BENCHMARKS_DIR, "reports")
+REPORT_SCHEMA_VERSION = 1
+RECALL_AT = (1, 3, 5, 10)
+
+# Configurations mirroring the ones used in production (rag_loader) and in main_rag.
+# Latency is measured with the retrieval cache disabled; add "cache_size" to a
+# configuration to benchmark cached retrieval as a separate configuration.
+DEFAULT_CONFIGURATIONS = [
+    {"name": "loader_hybrid_k24", "chunk_size": 1000, "chunk_overlap": 200, "search": "hybrid", "k": 24},
+    {"name": "loader_similarity_k10", "chunk_size": 1000, "chunk_overlap": 200, "search": "similarity", "k": 10},
+    {"name": "main_rag_similarity_k10", "chunk_size": 2000, "chunk_overlap": 200, "search": "similarity", "k": 10},
+    {"name": "legal_hybrid_k12", "chunking": "legal", "chunk_tokens": 350, "chunk_overlap_tokens": 40, "search": "hybrid", "k": 12},
+]
+
+
+def first_relevant_rank(retrieved: List[Tuple[str, Optional[int]]],
+                        expected: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Return the 1-based rank of the first retrieved chunk matching an expected location
+
+    Args:
+        retrieved (List[Tuple[str, Optional[int]]]): Ranked (file_name, page) pairs
+        expected (List[Dict[str, Any]]): Expected locations; 'page' is optional
+
+    Returns:
+        Optional[int]: Rank of the first hit or None if nothing relevant was retrieved
+    """
+    for rank, (file_name, page) in enumerate(retrieved, start=1):
+        for target in expected:
+            if file_name != target["file_name"]:
+                continue
+            if target.get("page") is None or target["page"] == page:
+                return rank
+    return None
+
+
+def _chunk_location(doc) -> Tuple[str, Optional[int]]:
+    """Extract the (file_name, page) pair used to match gold set entries"""
+    page = doc.metadata.get("page", doc.metadata.get("page_index"))
+    return doc.metadata.get("file_name", "N/A"), int(page) if page is not None else None
+
+
+class RetrievalBenchmark:
+    """Class to benchmark retrieval quality and latency for several pipeline configurations"""
+
+    def __init__(self,
+                 documents_path: str = "chatbot/app/data/sefaz_documents",
+                 gold_set_path: str = DEFAULT_GOLD_SET,
+                 embedding_model: str = "neuralmind/bert-base-portuguese-cased",
+                 warmup_queries: int = 2):
+        """
+        Initialize the benchmark
+
+        Args:
+            documents_path (str): Path to the documents of the corpus
+            gold_set_path (str): Path to the gold set JSON file
+            embedding_model (str): Embedding model shared by all configurations
+            warmup_queries (int): Number of untimed queries run before measuring latency
+        """
+        self.documents_path = documents_path
+        self.gold_set_path = gold_set_path
+        self.gold_set = load_gold_set(gold_set_path)
+        self.embedding_model = embedding_model
+        self.warmup_queries = warmup_queries
+
+        self._documents = None
+        self._embedding_manager = None
+
+    def _get_documents(self):
+        """Extract the corpus once and share it between configurations"""
+        if self._documents is None:
+            self._documents = DocumentExtractor(self.documents_path).extract_documents()
+        return self._documents
+
+    def _get_embedding_manager(self, collection_name: str, persist_directory: str) -> EmbeddingManager:
+        """Reuse the loaded embedding model, pointing it to a fresh collection"""
+        if self._embedding_manager is None:
+            self._embedding_manager = EmbeddingManager(
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+                embedding_model=self.embedding_model
+            )
+        else:
+            self._embedding_manager.collection_name = collection_name
+            self._embedding_manager.persist_directory = persist_directory
+        return self._embedding_manager
+
+    def _retrieve(self, search_engine: SearchEngine, config: Dict[str, Any], question: str):
+        """Run the search strategy of a configuration for a single question"""
+        if config.get("search", "similarity") == "hybrid":
+            return search_engine.hybrid_search_with_keywords(
+                question,
+                keywords=extract_keywords(question),
+                k=config["k"]
+            )
+        return search_engine.similarity_search(question, k=config["k"])
+
+    def run_configuration(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build an index for a configuration and evaluate the gold set against it
+
+        Args:
+            config (Dict[str, Any]): Configuration with name, search, k and either chunk_size/chunk_overlap
+                or chunking="legal" with chunk_tokens/chunk_overlap_tokens. The optional cache_size
+                (default 0) enables the SearchEngine retrieval cache
+
+        Returns:
+            Dict[str, Any]: Index and retrieval metrics for the configuration
+        """
+        logger.info(f"Running benchmark configuration: {config['name']}")
+        documents = self._get_documents()
+
+        start = time.perf_counter()
+        if config.get("chunking") == "legal":
+            chunker = LegalDocumentChunker(config["chunk_tokens"], config["chunk_overlap_tokens"])
+        else:
+            chunker = DocumentChunker(config["chunk_size"], config["chunk_overlap"])
+        chunks = chunker.chunk_documents(documents)
+        chunking_seconds = time.perf_counter() - start
+
+        persist_directory = tempfile.mkdtemp(prefix="rag_benchmark_")
+        try:
+            embedding_manager = self._get_embedding_manager(f"bench_{config['name']}", persist_directory)
+
+            start = time.perf_counter()
+            vector_store = embedding_manager.create_vector_store(chunks)
+            build_seconds = time.perf_counter() - start
+            if vector_store is None:
+                raise RuntimeError(f"Could not build the vector store for configuration {config['name']}")
+
+            # Without cache by default: warmup queries and repeated gold questions would be timed as cache hits
+            search_engine = SearchEngine(vector_store, cache_size=config.get("cache_size", 0))
+            items = self.gold_set["items"]
+
+            for item in items[:self.warmup_queries]:
+                self._retrieve(search_engine, config, item["question"])
+
+            latencies_ms = []
+            per_question = []
+            for item in items:
+                start = time.perf_counter()
+                results = self._retrieve(search_engine, config, item["question"])
+                latencies_ms.append((time.perf_counter() - start) * 1000.0)
+
+                retrieved = [_chunk_location(doc) for doc in results]
+                per_question.append({
+                    "id": item.get("id"),
+                    "rank": first_relevant_rank(retrieved, item["expected"]),
+                    "retrieved": [{"file_name": f, "page": p} for f, p in retrieved[:max(RECALL_AT)]],
+                    "latency_ms": round(latencies_ms[-1], 3)
+                })
+        finally:
+            shutil.rmtree(persist_directory, ignore_errors=True)
+
+        total = len(per_question)
+        ranks = [q["rank"] for q in per_question]
+        retrieval = {
+            f"recall@{n}": round(sum(1 for r in ranks if r is not None and r <= n) / total, 4)
+            for n in RECALL_AT
+        }
+        retrieval["mrr"] = round(sum(1.0 / r for r in ranks if r is not None) / total, 4)
+        retrieval["latency_ms"] = {
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p95": round(percentile(latencies_ms, 95), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+            "mean": round(sum(latencies_ms) / total, 3)
+        }
+
+        return {
+            "config": config,
+            "index": {
+                "documents": len(documents),
+                "chunks": len(chunks),
+                "chunking_seconds": round(chunking_seconds, 3),
+                "build_seconds": round(build_seconds, 3),
+                "embeddings_per_second": round(len(chunks) / build_seconds, 2) if build_seconds else None
+            },
+            "retrieval": retrieval,
+            "per_question": per_question
+        }
+
+    def run(self, configurations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run every configuration and build the JSON report
+
+        Args:
+            configurations (List[Dict[str, Any]]): Configurations to evaluate
+
+        Returns:
+            Dict[str, Any]: Complete benchmark report
+        """
+        return {
+            "schema_version": REPORT_SCHEMA_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "gold_set": {
+                "path": self.gold_set_path,
+                "version": self.gold_set["version"],
+                "items": len(self.gold_set["items"])
+            },
+            "documents_path": self.documents_path,
+            "embedding_model": self.embedding_model,
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "configurations": [self.run_configuration(config) for config in configurations]
+        }
+
+
+def summarize_report(report: Dict[str, Any]) -> str:
+    """
+    Format the headline metrics of a report as a text table
+
+    Args:
+        report (Dict[str, Any]): Benchmark report
+
+    Returns:
+        str: Table with one line per configuration
+    """
+    header = f"{'configuration':<28}" + "".join(f"{'R@' + str(n):>8}" for n in RECALL_AT)
+    header += f"{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'emb/s':>10}"
+    lines = [f"Gold set v{report['gold_set']['version']} ({report['gold_set']['items']} questions)", header, "-" * len(header)]
+
+    for result in report["configurations"]:
+        retrieval = result["retrieval"]
+        line = f"{result['config']['name']:<28}"
+        line += "".join(f"{retrieval[f'recall@{n}']:>8.3f}" for n in RECALL_AT)
+        line += f"{retrieval['mrr']:>8.3f}"
+        line += "".join(f"{retrieval['latency_ms'][p]:>10.1f}" for p in ("p50", "p95", "p99"))
+        line += f"{result['index']['embeddings_per_second'] or 0:>10.1f}"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> str:
+    """
+    Compare two reports configuration by configuration
+
+    Args:
+        baseline (Dict[str, Any]): Reference report
+        candidate (Dict[str, Any]): Report of the run being evaluated
+
+    Returns:
+        str: Table with the metric deltas (candidate - baseline)
+    """
+    if baseline["gold_set"]["version"] != candidate["gold_set"]["version"]:
+        logger.warning("Reports were produced with different gold set versions; deltas are not comparable")
+
+    metrics = [f"recall@{n}" for n in RECALL_AT] + ["mrr"]
+    header = f"{'configuration':<28}" + "".join(f"{m:>11}" for m in metrics) + f"{'p95 ms':>11}{'emb/s':>11}"
+    lines = [header, "-" * len(header)]
+
+    baseline_by_name = {r["config"]["name"]: r for r in baseline["configurations"]}
+    for result in candidate["configurations"]:
+        name = result["config"]["name"]
+        reference = baseline_by_name.get(name)
+        if reference is None:
+            lines.append(f"{name:<28} (not present in baseline)")
+            continue
+
+        line = f"{name:<28}"
+        for metric in metrics:
+            line += f"{result['retrieval'][metric] - reference['retrieval'][metric]:>+11.3f}"
+        line += f"{result['retrieval']['latency_ms']['p95'] - reference['retrieval']['latency_ms']['p95']:>+11.1f}"
+        line += f"{(result['index']['embeddings_per_second'] or 0) - (reference['index']['embeddings_per_second'] or 0):>+11.1f}"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency benchmark for the SEFAZ corpus")
+    parser.add_argument("--documents-path", default="chatbot/app/data/sefaz_documents")
+    parser.add_argument("--gold-set", default=DEFAULT_GOLD_SET)
+    parser.add_argument("--configs", help="JSON file with a list of configurations (defaults to the built-in ones)")
+    parser.add_argument("--output", help="Where to write the JSON report (defaults to benchmarks/reports/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two existing reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            candidate = json.load(f)
+        print(compare_reports(baseline, candidate))
+        return
+
+    configurations = DEFAULT_CONFIGURATIONS
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configurations = json.load(f)
+
+    benchmark = RetrievalBenchmark(documents_path=args.documents_path, gold_set_path=args.gold_set)
+    report = benchmark.run(configurations)
+
+    output = args.output or os.path.join(
+        DEFAULT_REPORTS_DIR, f"retrieval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(summarize_report(report))
+    print(f"\nReport written to: {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
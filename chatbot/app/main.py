@@ -1,7 +1,7 @@
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
 from utils.log_functions import log_AI_api_response_to_file
+from rag_pipeline.llm_gateway import get_llm_gateway, LLMUnavailableError
 from utils.string_functions import get_most_relevant_knowledge_paths
 import unicodedata
 import openai
@@ -9,11 +9,8 @@ import openai
 # Load variables from .env 
 load_dotenv()
 
-# Gets API key from .env
-api_key = os.getenv("OPENAI_API_KEY")
-
-# Global OpenAI client instance (for reuse)
-client = OpenAI(api_key=api_key)
+# Shared LLM gateway (reads OPENAI_API_KEY from .env)
+gateway = get_llm_gateway()
 
 # Sends a prompt to gpt-4o-mini model
 # Log the response into openai_response_log.txt
@@ -22,7 +19,7 @@ def chat_with_gpt(prompt: str):
     normalized_prompt = unicodedata.normalize('NFC', prompt)
 
     try: 
-        response = client.chat.completions.create(
+        response = gateway.chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {"role": "user", "content": prompt}
@@ -40,7 +37,10 @@ def chat_with_gpt(prompt: str):
             return "Sorry, I couldn't get a clear response from the AI."
 
 
-    except openai.APICallError as e:
+    except LLMUnavailableError as e:
+        print(f"OpenIA API unavailable: {e}")
+        return "Desculpe, o serviço do chatbot está temporariamente indisponível. Tente novamente em instantes."
+    except openai.APIStatusError as e:
         print(f"OpenIA API error: {e}")
         if hasattr(e, 'status_code'):
             if e.status_code == 401:
@@ -75,7 +75,8 @@ def chat_with_rag(pipeline, user_input: str):
         # Log the response
         log_AI_api_response_to_file(
             {"choices": [{"message": {"content": result["response"]}}]},
-            filename=os.path.join("logs", "rag_response_log.txt")
+            filename=os.path.join("logs", "rag_response_log.txt"),
+            timings=result.get("timings")
         )
         
         return result
@@ -0,0 +1,183 @@
+"""
+Debug Trace Module - Sampled, size-capped payload logging for the RAG pipeline
+
+Large payloads (retrieved context, prompts, model responses) are useful while
+debugging retrieval quality but too expensive to log on every request. This
+module emits them as compact JSON records only when payload tracing is
+enabled, the request is sampled and the logger accepts DEBUG records. Records
+are handed to a QueueHandler so the actual I/O happens on a background
+listener thread instead of the request path.
+
+Configuration (environment variables):
+    RAG_DEBUG_TRACE: "1"/"true" to enable payload tracing (default: off)
+    RAG_DEBUG_TRACE_SAMPLE_RATE: Fraction of requests traced, 0.0-1.0 (default: 0.1)
+    RAG_DEBUG_TRACE_MAX_CHARS: Maximum characters kept per string field (default: 500)
+    RAG_DEBUG_TRACE_MAX_ITEMS: Maximum items kept per list field (default: 10)
+"""
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class DebugTraceConfig:
+    """Payload tracing settings, read from the environment by default"""
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.1,
+                 max_chars: int = 500, max_items: int = 10):
+        self.enabled = enabled
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_chars = max(max_chars, 0)
+        self.max_items = max(max_items, 0)
+
+    @classmethod
+    def from_env(cls) -> "DebugTraceConfig":
+        """
+        Build the configuration from the RAG_DEBUG_TRACE* environment variables
+
+        Returns:
+            DebugTraceConfig: Configuration instance
+        """
+        return cls(
+            enabled=os.getenv("RAG_DEBUG_TRACE", "").strip().lower() in _TRUE_VALUES,
+            sample_rate=_env_float("RAG_DEBUG_TRACE_SAMPLE_RATE", 0.1),
+            max_chars=_env_int("RAG_DEBUG_TRACE_MAX_CHARS", 500),
+            max_items=_env_int("RAG_DEBUG_TRACE_MAX_ITEMS", 10)
+        )
+
+
+_config = DebugTraceConfig.from_env()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def configure(config: Optional[DebugTraceConfig] = None):
+    """
+    Replace the active configuration (defaults to re-reading the environment)
+
+    Args:
+        config (Optional[DebugTraceConfig]): New configuration
+    """
+    global _config
+    _config = config or DebugTraceConfig.from_env()
+
+
+def _ensure_listener():
+    """Attach the queue handler and start the background listener once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        # Write through whatever handlers the logging config gave us, or stderr
+        target_handlers = list(logger.handlers) or [logging.StreamHandler(sys.stderr)]
+        for handler in target_handlers:
+            if handler.formatter is None:
+                handler.setFormatter(logging.Formatter("%(levelname)s %(asctime)s %(name)s %(message)s"))
+
+        record_queue: queue.Queue = queue.Queue(maxsize=1000)
+        logger.handlers = [_DroppingQueueHandler(record_queue)]
+        logger.propagate = False
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.DEBUG)
+
+        _listener = QueueListener(record_queue, *target_handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _truncate(value: Any, config: DebugTraceConfig) -> Any:
+    """Cap strings and lists so a single record stays small"""
+    if isinstance(value, str):
+        if len(value) > config.max_chars:
+            return f"{value[:config.max_chars]}... [{len(value) - config.max_chars} chars truncated]"
+        return value
+    if isinstance(value, (list, tuple)):
+        items = [_truncate(item, config) for item in value[:config.max_items]]
+        if len(value) > config.max_items:
+            items.append(f"... [{len(value) - config.max_items} items truncated]")
+        return items
+    if isinstance(value, dict):
+        return {key: _truncate(item, config) for key, item in value.items()}
+    return value
+
+
+def should_trace() -> bool:
+    """
+    Decide whether the current call should emit a payload record
+
+    Cheap enough to call on every request: no payload is built unless this
+    returns True.
+
+    Returns:
+        bool: True when tracing is enabled, sampled in and DEBUG is enabled
+    """
+    config = _config
+    if not config.enabled or config.sample_rate <= 0.0:
+        return False
+    if config.sample_rate < 1.0 and random.random() >= config.sample_rate:
+        return False
+    _ensure_listener()
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def trace_payload(event: str, **fields: Any):
+    """
+    Emit a sampled, size-capped JSON debug record
+
+    Field values may be callables; they are only evaluated when the record is
+    actually emitted, so expensive payloads cost nothing when not sampled.
+
+    Args:
+        event (str): Event name, e.g. "chat.context"
+        **fields: Record fields
+    """
+    if not should_trace():
+        return
+
+    config = _config
+    payload: Dict[str, Any] = {"event": event}
+    for key, value in fields.items():
+        if callable(value):
+            value = value()
+        payload[key] = _truncate(value, config)
+
+    logger.debug(json.dumps(payload, ensure_ascii=False, default=str))
@@ -0,0 +1,141 @@
+"""
+Document Metadata Module - Structured metadata derived from document paths and headings
+
+The knowledge base is organized as <base_directory>/<program>/<file>.pdf, with
+file names such as "Decreto 44.650 - Anexo 36.pdf" or "Lei 13.484.pdf". The
+program, document kind, number and annex are derived from the path at
+ingestion, and the article from the "Art. N" headings of the text, so searches
+can be pre-filtered (e.g. only PROIND documents) instead of ranking every chunk.
+"""
+
+from typing import Any, Dict, List, Optional
+import os
+import re
+import unicodedata
+
+# Document kinds recognized at the start of a file name (longest prefixes first)
+_DOCUMENT_KINDS = (
+    ("lei complementar", "lei_complementar"),
+    ("lc", "lei_complementar"),
+    ("decreto", "decreto"),
+    ("lei", "lei"),
+    ("portaria", "portaria"),
+    ("apostila", "apostila"),
+)
+
+_NUMBER_RE = re.compile(r"\b(\d{1,3}(?:\.\d{3})+|\d+)\b")
+_ANNEX_RE = re.compile(r"\banexo\s+([0-9]+|[IVXLC]+)\b", re.IGNORECASE)
+ARTICLE_HEADING_RE = re.compile(r"^\s*Art\.?\s*(\d+)\s*[º°o]?(?:\s*-\s*([A-Z])\b)?", re.MULTILINE)
+
+
+def normalize_program(program: Optional[str]) -> Optional[str]:
+    """
+    Normalize a program name for metadata and filters ("PROIND", "Proind " -> "proind")
+
+    Args:
+        program (Optional[str]): Program name or folder name
+
+    Returns:
+        Optional[str]: Lowercase ASCII name, or None if empty
+    """
+    if not program:
+        return None
+    text = unicodedata.normalize("NFKD", program).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9_]+", "_", text.lower()).strip("_")
+    return text or None
+
+
+def derive_path_metadata(file_path: str, base_directory: str) -> Dict[str, Any]:
+    """
+    Derive program, document kind, number and annex from a document path
+
+    Args:
+        file_path (str): Path of the document
+        base_directory (str): Root directory of the knowledge base
+
+    Returns:
+        Dict[str, Any]: Metadata (only the keys that could be derived; Chroma rejects None values)
+    """
+    metadata: Dict[str, Any] = {}
+
+    relative = os.path.relpath(file_path, base_directory)
+    parts = relative.split(os.sep)
+    if len(parts) > 1:
+        program = normalize_program(parts[0])
+        if program:
+            metadata["program"] = program
+
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    lowered = stem.lower()
+    for prefix, kind in _DOCUMENT_KINDS:
+        if re.match(rf"{prefix}\b", lowered):
+            metadata["doc_kind"] = kind
+            break
+
+    annex = _ANNEX_RE.search(stem)
+    if annex:
+        metadata["annex"] = annex.group(1).upper()
+
+    number = _NUMBER_RE.search(stem[:annex.start()] if annex else stem)
+    if number:
+        if metadata.get("doc_kind") == "decreto":
+            metadata["decree_number"] = number.group(1)
+        else:
+            metadata["document_number"] = number.group(1)
+
+    return metadata
+
+
+def _article_label(match: "re.Match") -> str:
+    return f"{match.group(1)}-{match.group(2)}" if match.group(2) else match.group(1)
+
+
+def find_article_headings(text: str) -> List[str]:
+    """
+    Return the article labels ("5", "12-A") of the headings found in a text, in order
+
+    Args:
+        text (str): Page or chunk text
+
+    Returns:
+        List[str]: Article labels
+    """
+    return [_article_label(match) for match in ARTICLE_HEADING_RE.finditer(text or "")]
+
+
+def article_at(text: str, position: int, default: Optional[str] = None) -> Optional[str]:
+    """
+    Return the article in force at a position of a text (the last heading before it)
+
+    Args:
+        text (str): Page text
+        position (int): Character offset
+        default (Optional[str]): Article in force at the start of the text
+
+    Returns:
+        Optional[str]: Article label, or default when no heading precedes the position
+    """
+    article = default
+    for match in ARTICLE_HEADING_RE.finditer(text or ""):
+        if match.start() > position:
+            break
+        article = _article_label(match)
+    return article
+
+
+def build_metadata_filter(program: Optional[str] = None, **fields: Any) -> Optional[Dict[str, Any]]:
+    """
+    Build a Chroma `where` filter from metadata values (None values are ignored)
+
+    Args:
+        program (Optional[str]): Program to restrict the search to
+        **fields: Other metadata equality constraints (e.g. doc_kind="decreto")
+
+    Returns:
+        Optional[Dict[str, Any]]: Chroma filter, or None when there are no constraints
+    """
+    constraints = {"program": normalize_program(program), **fields}
+    clauses = [{key: value} for key, value in constraints.items() if value is not None]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,209 @@
+"""
+Fake LLM Module - Offline, deterministic stand-in for the OpenAI chat completion API
+
+Used to load test the chatbot stack (retrieval, serialization, database writes)
+without network access or API spend. The fake client exposes the subset of the
+OpenAI client used by the LLM gateway (`with_options` and
+`chat.completions.create`) and returns OpenAI-shaped responses whose content is
+schema-valid for the chat, quiz and challenge flows. Responses are seeded by the
+request messages, so the same prompt always produces the same output.
+
+Enable it with LLM_BACKEND=fake. Latency is configured with distribution specs:
+    FAKE_LLM_LATENCY: Default latency of every call (default: "lognormal:800:0.4")
+    FAKE_LLM_LATENCY_CHAT / FAKE_LLM_LATENCY_QUIZ / FAKE_LLM_LATENCY_CHALLENGE: Per-flow overrides
+
+Supported specs (milliseconds):
+    "fixed:<ms>", "uniform:<min>:<max>", "normal:<mean>:<std>", "lognormal:<median>:<sigma>"
+"""
+
+from openai.types.chat import ChatCompletion
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import math
+import os
+import random
+import time
+
+DEFAULT_LATENCY = "lognormal:800:0.4"
+
+
+class LatencyDistribution:
+    """Latency distribution parsed from a "<kind>:<param>[:<param>]" spec"""
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, spec: str):
+        """
+        Args:
+            spec (str): Distribution spec, e.g. "lognormal:800:0.4"
+        """
+        parts = spec.split(":")
+        self.kind = parts[0].strip().lower()
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{self.kind}' (expected one of {', '.join(self.KINDS)})")
+        self.params = [float(p) for p in parts[1:]]
+        expected = 1 if self.kind == "fixed" else 2
+        if len(self.params) != expected:
+            raise ValueError(f"Latency distribution '{self.kind}' expects {expected} parameter(s): '{spec}'")
+        self.spec = spec
+
+    def sample_ms(self, rng: random.Random) -> float:
+        """
+        Draw a latency in milliseconds
+
+        Args:
+            rng (random.Random): Random generator
+
+        Returns:
+            float: Non-negative latency in milliseconds
+        """
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            value = rng.gauss(self.params[0], self.params[1])
+        else:
+            value = rng.lognormvariate(math.log(max(self.params[0], 1e-6)), self.params[1])
+        return max(value, 0.0)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self._owner = owner
+
+    def create(self, **params) -> ChatCompletion:
+        return self._owner.create_completion(**params)
+
+
+class _FakeChat:
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self.completions = _FakeCompletions(owner)
+
+
+class FakeOpenAIClient:
+    """Deterministic fake of the OpenAI client used by the LLM gateway"""
+
+    def __init__(self,
+                 latency: Optional[str] = None,
+                 latency_overrides: Optional[Dict[str, str]] = None,
+                 seed: int = 0):
+        """
+        Initialize the fake client
+
+        Args:
+            latency (Optional[str]): Default latency spec (defaults to FAKE_LLM_LATENCY)
+            latency_overrides (Optional[Dict[str, str]]): Per-flow specs ("chat", "quiz", "challenge")
+            seed (int): Base seed mixed into every response
+        """
+        self.seed = seed
+        self.default_latency = LatencyDistribution(latency or os.getenv("FAKE_LLM_LATENCY", DEFAULT_LATENCY))
+        self.latencies: Dict[str, LatencyDistribution] = {}
+        for flow in ("chat", "quiz", "challenge"):
+            spec = (latency_overrides or {}).get(flow) or os.getenv(f"FAKE_LLM_LATENCY_{flow.upper()}")
+            if spec:
+                self.latencies[flow] = LatencyDistribution(spec)
+        self.chat = _FakeChat(self)
+
+    def with_options(self, **kwargs) -> "FakeOpenAIClient":
+        """Mirror OpenAI.with_options; per-call options have no effect on the fake"""
+        return self
+
+    def create_completion(self, **params) -> ChatCompletion:
+        """
+        Build a chat completion for the given request parameters
+
+        Returns:
+            ChatCompletion: OpenAI-shaped response
+        """
+        messages: List[Dict[str, Any]] = params.get("messages", [])
+        system_prompt = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user_prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+        digest = hashlib.sha256(f"{self.seed}|{system_prompt}|{user_prompt}".encode("utf-8")).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+
+        flow = self._detect_flow(system_prompt, params)
+        if flow == "challenge":
+            content = json.dumps(self._challenge_payload(user_prompt, rng), ensure_ascii=False)
+        elif flow == "quiz":
+            content = json.dumps(self._quiz_payload(rng), ensure_ascii=False)
+        else:
+            content = self._chat_payload(rng)
+
+        time.sleep(self.latencies.get(flow, self.default_latency).sample_ms(rng) / 1000.0)
+
+        prompt_tokens = sum(_estimate_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = _estimate_tokens(content)
+        return ChatCompletion.model_validate({
+            "id": f"chatcmpl-fake-{digest[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": f"fake-{params.get('model', 'llm')}",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    @staticmethod
+    def _detect_flow(system_prompt: str, params: Dict[str, Any]) -> str:
+        """Identify the generator from the prompt shape (chat, quiz or challenge)"""
+        schema_name = ((params.get("response_format") or {}).get("json_schema") or {}).get("name", "")
+        if schema_name.startswith("challenge") or '"challenges"' in system_prompt:
+            return "challenge"
+        if schema_name == "quiz" or ('"options"' in system_prompt and '"answer"' in system_prompt):
+            return "quiz"
+        return "chat"
+
+    @staticmethod
+    def _options(rng: random.Random, label: str) -> Dict[str, str]:
+        return {letter: f"Alternativa {letter} ({label}-{rng.randint(100, 999)})" for letter in "ABCDE"}
+
+    def _chat_payload(self, rng: random.Random) -> str:
+        sentences = rng.randint(3, 8)
+        return " ".join(
+            f"Resposta simulada {i + 1}: conforme o documento de referência, o benefício fiscal se aplica nas condições descritas."
+            for i in range(sentences)
+        )
+
+    def _quiz_payload(self, rng: random.Random) -> Dict[str, Any]:
+        return {
+            "question": f"Questão simulada {rng.randint(1000, 9999)} sobre o contexto fornecido?",
+            "options": self._options(rng, "quiz"),
+            "answer": rng.choice("ABCDE"),
+            "explanation": "Explicação simulada baseada no contexto fornecido."
+        }
+
+    def _challenge_payload(self, user_prompt: str, rng: random.Random) -> Dict[str, Any]:
+        is_calculation = 'Tipo dos Desafios: "C' in user_prompt or 'Tipo dos Desafios: "c' in user_prompt
+        challenges = []
+        for i in range(2):
+            answer = f"{rng.uniform(100, 100000):.2f}" if is_calculation else "Resposta discursiva simulada " * 10
+            challenges.append({
+                "challenge": f"Desafio simulado {i + 1}. " + "Cenário contextualizado de uma empresa incentivada. " * 18,
+                "challenge_answer": answer.strip(),
+                "challenge_justification": "Justificativa simulada passo a passo. " * 13
+            })
+        questions = [
+            {
+                "question": f"Questão de contextualização simulada {i + 1}?",
+                "options": self._options(rng, f"q{i + 1}"),
+                "correct_answer": rng.choice("ABCDE"),
+                "question_justification": "Justificativa simulada da questão."
+            }
+            for i in range(5)
+        ]
+        return {"challenges": challenges, "questions": questions}
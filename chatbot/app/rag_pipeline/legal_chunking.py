@@ -0,0 +1,345 @@
+"""
+Legal Chunking Module - Structure-aware chunking of decrees, laws and ordinances
+
+Instead of splitting each page on blank lines, the pages of a document are joined
+and the text is split on its legal structure: annex and chapter/section headers,
+articles ("Art. 5º"), paragraphs ("§ 1º", "Parágrafo único") and incisos ("I -").
+Articles are kept whole when they fit the token budget, continue across page
+breaks, and only fall back to paragraph/inciso (and finally character) splits
+when they are too long. Every chunk records its article and parent section.
+"""
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import bisect
+import logging
+import re
+
+from .document_metadata import ARTICLE_HEADING_RE
+
+logger = logging.getLogger(__name__)
+
+# Structural boundaries, in hierarchy order (annex > section > article > paragraph > inciso)
+ANNEX_RE = re.compile(r"^[ \t]*ANEXO\s+([0-9]+|[IVXLC]+)\b[^\n]*", re.MULTILINE)
+SECTION_RE = re.compile(r"^[ \t]*(?:TÍTULO|CAPÍTULO|SEÇÃO|Seção|SUBSEÇÃO|Subseção)\s+[IVXLC]+\b[^\n]*", re.MULTILINE)
+PARAGRAPH_RE = re.compile(r"^[ \t]*(?:§\s*\d+\s*[º°o]?|Parágrafo\s+único)", re.MULTILINE | re.IGNORECASE)
+INCISO_RE = re.compile(r"^[ \t]*[IVXLC]+\s*[-–—]\s", re.MULTILINE)
+
+_BOUNDARIES = (
+    ("annex", ANNEX_RE),
+    ("section", SECTION_RE),
+    ("article", ARTICLE_HEADING_RE),
+    ("paragraph", PARAGRAPH_RE),
+    ("inciso", INCISO_RE),
+)
+_HARD_BOUNDARIES = ("annex", "section", "article")
+
+# Page-level metadata that does not describe a multi-page chunk
+_PAGE_ONLY_KEYS = ("article", "articles", "page_label", "page_index", "start_index")
+
+
+def _token_counter(encoding_name: str) -> Callable[[str], int]:
+    """
+    Return a token counting function (tiktoken when available, ~4 characters per token otherwise)
+
+    Args:
+        encoding_name (str): tiktoken encoding name
+
+    Returns:
+        Callable[[str], int]: Function returning the number of tokens of a text
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}), estimating tokens from characters")
+        return lambda text: max(1, len(text) // 4)
+
+
+class LegalDocumentChunker:
+    """Class to divide legal documents into chunks aligned with their structure"""
+
+    def __init__(self,
+                 chunk_tokens: int = 350,
+                 chunk_overlap_tokens: int = 40,
+                 min_chunk_tokens: int = 60,
+                 encoding_name: str = "cl100k_base"):
+        """
+        Initialize the legal chunker
+
+        Args:
+            chunk_tokens (int): Maximum size of each chunk in tokens
+            chunk_overlap_tokens (int): Overlap between consecutive chunks of the same article
+            min_chunk_tokens (int): Chunks smaller than this are merged with the next article
+            encoding_name (str): tiktoken encoding used to count tokens
+        """
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.count_tokens = _token_counter(encoding_name)
+
+        # Last resort for a single paragraph/inciso longer than the budget
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_tokens,
+            chunk_overlap=chunk_overlap_tokens,
+            length_function=self.count_tokens,
+            # PDF text is hard-wrapped, so sentence ends are better cut points than line breaks
+            separators=["\n\n", ". ", "; ", "\n", " ", ""]
+        )
+
+    def chunk_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Divide a list of page documents into structure-aligned chunks
+
+        Pages are grouped by source (in their original order) and joined, so
+        articles can span page breaks.
+
+        Args:
+            documents (List[Document]): List of page documents to divide
+
+        Returns:
+            List[Document]: List of document chunks
+        """
+        if not documents:
+            logger.warning("No documents provided for chunking")
+            return []
+
+        groups: Dict[str, List[Document]] = {}
+        for doc in documents:
+            groups.setdefault(doc.metadata.get('source', ''), []).append(doc)
+
+        logger.info(f"Starting legal chunking of {len(documents)} pages from {len(groups)} documents")
+
+        all_chunks = []
+        for doc_index, pages in enumerate(groups.values()):
+            try:
+                chunks = self._chunk_pages(doc_index, pages)
+                all_chunks.extend(chunks)
+                logger.info(f"  - {pages[0].metadata.get('file_name', 'N/A')}: {len(chunks)} chunks created")
+            except Exception as e:
+                logger.error(f"Error chunking document {pages[0].metadata.get('source')}: {e}")
+                continue
+
+        logger.info(f"Total of {len(all_chunks)} chunks created")
+        return all_chunks
+
+    def chunk_single_document(self, document: Document) -> List[Document]:
+        """
+        Divide a single document into chunks
+
+        Args:
+            document (Document): Document to divide
+
+        Returns:
+            List[Document]: List of document chunks
+        """
+        return self.chunk_documents([document])
+
+    def _join_pages(self, pages: List[Document]) -> Tuple[str, List[int]]:
+        """Join the pages of a document, returning the text and the start offset of each page"""
+        parts, offsets, position = [], [], 0
+        for page in pages:
+            offsets.append(position)
+            text = page.page_content.rstrip() + "\n"
+            parts.append(text)
+            position += len(text)
+        return "".join(parts), offsets
+
+    @staticmethod
+    def _segments(text: str) -> List[Tuple[str, int, int, str]]:
+        """
+        Split a text on its structural boundaries
+
+        Returns:
+            List[Tuple[str, int, int, str]]: (kind, start, end, label) segments, in order;
+                text before the first boundary is a "preamble" segment. The label is the
+                header line (annex, section), the article ("12-A") or the paragraph ("1", "único")
+        """
+        boundaries: Dict[int, Tuple[str, str]] = {}
+        for kind, pattern in reversed(_BOUNDARIES):
+            # Higher levels win when two patterns start at the same line
+            for match in pattern.finditer(text):
+                matched = match.group(0)
+                start = match.start() + len(matched) - len(matched.lstrip())
+                if kind == "article":
+                    label = f"{match.group(1)}-{match.group(2)}" if match.group(2) else match.group(1)
+                elif kind == "paragraph":
+                    label = re.sub(r"\D", "", matched) or "único"
+                else:
+                    label = matched.strip()[:80]
+                boundaries[start] = (kind, label)
+
+        starts = sorted(boundaries)
+        segments = []
+        if not starts or starts[0] > 0:
+            segments.append(("preamble", 0, starts[0] if starts else len(text), ""))
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else len(text)
+            kind, label = boundaries[start]
+            segments.append((kind, start, end, label))
+        return segments
+
+    def _chunk_pages(self, doc_index: int, pages: List[Document]) -> List[Document]:
+        """Chunk the joined pages of one document"""
+        text, page_offsets = self._join_pages(pages)
+
+        annex: Optional[str] = None
+        section: Optional[str] = None
+        article: Optional[str] = None
+        paragraph: Optional[str] = None
+        # Offset of the header of the current article (or annex/section): overlaps never start before it
+        scope_start = 0
+
+        spans: List[Dict[str, Any]] = []
+        current: Optional[Dict[str, Any]] = None
+
+        def new_span(start: int) -> Dict[str, Any]:
+            # A span starting inside an article (overlap, continuation) belongs to that article too
+            return {"start": start, "end": start, "tokens": 0, "articles": [article] if article else [],
+                    "has_body": False, "annex": annex, "section": section, "article": article, "paragraph": paragraph}
+
+        def flush():
+            nonlocal current
+            if current and text[current["start"]:current["end"]].strip():
+                spans.append(current)
+            current = None
+
+        for kind, start, end, label in self._segments(text):
+            if kind == "annex":
+                annex, section, article, paragraph = label, None, None, None
+            elif kind == "section":
+                section, article, paragraph = label, None, None
+            elif kind == "article":
+                article, paragraph = label, None
+            elif kind == "paragraph":
+                paragraph = label
+            if kind in _HARD_BOUNDARIES:
+                scope_start = start
+
+            tokens = self.count_tokens(text[start:end])
+
+            if kind in _HARD_BOUNDARIES and current is not None and current["has_body"]:
+                if kind != "article" or current["tokens"] >= self.min_chunk_tokens \
+                        or current["tokens"] + tokens > self.chunk_tokens:
+                    flush()
+            elif current is not None and current["tokens"] + tokens > self.chunk_tokens:
+                # Soft split inside an article: keep the tail of the previous chunk as overlap,
+                # but only from the current article (the previous span may hold merged short articles)
+                overlap_start = max(self._overlap_start(text, current["start"], current["end"]), scope_start)
+                flush()
+                current = new_span(overlap_start)
+                current["tokens"] = self.count_tokens(text[overlap_start:start])
+                current["has_body"] = True
+
+            if current is None:
+                current = new_span(start)
+            current["end"] = end
+            current["tokens"] += tokens
+            if kind == "article" and article:
+                if current["articles"][-1:] != [article]:
+                    current["articles"].append(article)
+                if current["article"] is None:
+                    current["article"] = article
+            if kind not in ("annex", "section"):
+                current["has_body"] = True
+
+            if current["tokens"] > self.chunk_tokens:
+                # A single segment larger than the budget
+                flush()
+        flush()
+
+        chunks: List[Document] = []
+        base_metadata = {key: value for key, value in pages[0].metadata.items() if key not in _PAGE_ONLY_KEYS}
+        for span_info in spans:
+            span_text = text[span_info["start"]:span_info["end"]].strip()
+            pieces = [span_text] if span_info["tokens"] <= self.chunk_tokens else self.text_splitter.split_text(span_text)
+            for piece in pieces:
+                chunks.append(Document(
+                    page_content=piece,
+                    metadata=self._chunk_metadata(base_metadata, pages, page_offsets, span_info)
+                ))
+
+        for j, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                'chunk_id': f"{doc_index}_{j}",
+                'original_document_index': doc_index,
+                'chunk_index': j,
+                'total_chunks_in_doc': len(chunks),
+                'chunk_size': len(chunk.page_content),
+                'chunk_tokens': self.count_tokens(chunk.page_content)
+            })
+        return chunks
+
+    def _overlap_start(self, text: str, start: int, end: int) -> int:
+        """Offset where the last `chunk_overlap_tokens` of text[start:end] begin (on a line start)"""
+        if self.chunk_overlap_tokens <= 0:
+            return end
+        position = end
+        while position > start:
+            previous = text.rfind("\n", start, position - 1)
+            if previous < start:
+                break
+            if self.count_tokens(text[previous + 1:end]) > self.chunk_overlap_tokens:
+                break
+            position = previous + 1
+        return position
+
+    @staticmethod
+    def _chunk_metadata(base_metadata: Dict[str, Any],
+                        pages: List[Document],
+                        page_offsets: List[int],
+                        span_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata of a chunk (document metadata, pages and legal hierarchy)"""
+        first_page = pages[bisect.bisect_right(page_offsets, span_info["start"]) - 1]
+        last_page = pages[bisect.bisect_right(page_offsets, max(span_info["end"] - 1, span_info["start"])) - 1]
+
+        metadata = dict(base_metadata)
+        for key in ("page", "page_index"):
+            if key in first_page.metadata:
+                metadata[key] = first_page.metadata[key]
+        if "page" in last_page.metadata:
+            metadata["page_end"] = last_page.metadata["page"]
+
+        parent = [part for part in (span_info["annex"], span_info["section"]) if part]
+        if parent:
+            metadata["parent_section"] = " > ".join(parent)
+        if span_info["article"]:
+            metadata["article"] = span_info["article"]
+            metadata["article_id"] = "/".join(
+                re.sub(r"\W+", "_", part.lower()).strip("_") for part in parent[:1] + [f"art_{span_info['article']}"]
+            )
+        if span_info["articles"]:
+            metadata["articles"] = ",".join(span_info["articles"])
+        if span_info["paragraph"]:
+            metadata["paragraph"] = span_info["paragraph"]
+        metadata["chunking"] = "legal"
+        return metadata
+
+    def get_chunk_statistics(self, chunks: List[Document]) -> Dict[str, Any]:
+        """
+        Return statistics about the created chunks
+
+        Args:
+            chunks (List[Document]): List of chunks to analyze
+
+        Returns:
+            Dict[str, Any]: Statistics about the created chunks
+        """
+        if not chunks:
+            return {}
+
+        chunk_sizes = [len(chunk.page_content) for chunk in chunks]
+        chunk_tokens = [chunk.metadata.get('chunk_tokens', 0) for chunk in chunks]
+
+        return {
+            'total_chunks': len(chunks),
+            'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes),
+            'min_chunk_size': min(chunk_sizes),
+            'max_chunk_size': max(chunk_sizes),
+            'total_characters': sum(chunk_sizes),
+            'avg_chunk_tokens': sum(chunk_tokens) / len(chunk_tokens),
+            'max_chunk_tokens': max(chunk_tokens),
+            'chunks_with_article': sum(1 for chunk in chunks if chunk.metadata.get('article'))
+        }
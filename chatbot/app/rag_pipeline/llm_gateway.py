@@ -0,0 +1,281 @@
+"""
+LLM Gateway Module - Shared, resilient access to the OpenAI chat completion API
+
+Every generator (chat, quiz, challenge and the legacy CLI chat) goes through a
+single gateway that provides:
+    - pooled HTTP connections (one client per process)
+    - per-call deadlines
+    - exponential backoff with jitter on 429/5xx, timeouts and connection errors
+    - a circuit breaker that fails fast while the upstream is unhealthy
+    - a global concurrency limiter, so a slow upstream cannot tie up every worker
+
+Configuration (environment variables, read by get_llm_gateway):
+    LLM_BACKEND: "openai" (default) or "fake" for the offline stand-in in fake_llm.py
+    LLM_TIMEOUT_SECONDS: Read timeout of a single attempt (default: 30)
+    LLM_DEADLINE_SECONDS: Total time budget of a call, retries included (default: 60)
+    LLM_MAX_RETRIES: Retries after the first attempt (default: 3)
+    LLM_MAX_CONCURRENCY: Maximum simultaneous upstream calls per process (default: 8)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: Consecutive failures that open the circuit (default: 5)
+    LLM_CIRCUIT_RESET_SECONDS: Time the circuit stays open before a probe (default: 30)
+"""
+
+from openai import OpenAI, DefaultHttpxClient
+import openai
+from typing import Any, Optional
+import httpx
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when a call fails fast (open circuit, saturated pool or expired deadline)"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before allowing a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go upstream
+
+        Returns:
+            bool: False while the circuit is open (or a half-open probe is running)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def cancel_probe(self):
+        """Release a half-open probe that never reached the upstream"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("LLM circuit closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call and open the circuit when the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI error is transient (rate limit, server error, timeout, network)"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header (in seconds) of a rate-limited response, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Resilient, shared access point to the chat completion API"""
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 5.0,
+                 deadline: float = 60.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0,
+                 max_concurrency: int = 8,
+                 acquire_timeout: float = 10.0,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 client: Optional[OpenAI] = None):
+        """
+        Initialize the gateway
+
+        Args:
+            api_key (Optional[str]): OpenAI API key (defaults to OPENAI_API_KEY)
+            timeout (float): Read timeout of a single attempt in seconds
+            connect_timeout (float): Connection timeout in seconds
+            deadline (float): Default total time budget of a call, retries included
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): Base delay of the exponential backoff in seconds
+            backoff_max (float): Maximum delay between attempts in seconds
+            max_concurrency (int): Maximum simultaneous upstream calls
+            acquire_timeout (float): Seconds to wait for a free concurrency slot
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe
+            client (Optional[OpenAI]): Preconfigured client (mainly for tests and fakes)
+        """
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        if client is None:
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment variables")
+            # Retries are handled here so they share the deadline and the circuit breaker
+            client = OpenAI(
+                api_key=api_key,
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(max_connections=max_concurrency * 2,
+                                        max_keepalive_connections=max_concurrency)
+                )
+            )
+        self.client = client
+
+    def chat_completion(self, deadline: Optional[float] = None, **params) -> Any:
+        """
+        Create a chat completion with retries, deadline, circuit breaker and concurrency cap
+
+        Args:
+            deadline (Optional[float]): Total time budget in seconds (defaults to the gateway deadline)
+            **params: Parameters of client.chat.completions.create
+
+        Returns:
+            Any: Chat completion response
+
+        Raises:
+            LLMUnavailableError: When the call fails fast or runs out of time
+            openai.APIError: Non-retryable API errors (e.g. invalid request, authentication)
+        """
+        expires_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+
+        if not self.breaker.allow_request():
+            raise LLMUnavailableError("LLM service temporarily unavailable (circuit open)")
+
+        if not self._slots.acquire(timeout=min(self.acquire_timeout, max(expires_at - time.monotonic(), 0.0))):
+            # Nothing reached the upstream: let another request run the probe
+            self.breaker.cancel_probe()
+            raise LLMUnavailableError("LLM service saturated (concurrency limit reached)")
+
+        try:
+            attempt = 0
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    # Only attempts that reached the upstream count as failures, and those were
+                    # already recorded; if the slot wait used the budget, free the probe instead
+                    if attempt == 0:
+                        self.breaker.cancel_probe()
+                    raise LLMUnavailableError("LLM call deadline exceeded")
+
+                try:
+                    response = self.client.with_options(timeout=min(self.timeout, remaining)).chat.completions.create(**params)
+                except Exception as e:
+                    if not _is_retryable(e):
+                        # Client-side errors say nothing about upstream health: leave the breaker
+                        # state as is, only free the half-open probe slot if this call held it
+                        self.breaker.cancel_probe()
+                        raise
+
+                    self.breaker.record_failure()
+                    if attempt >= self.max_retries or not self.breaker.allow_request():
+                        raise LLMUnavailableError(f"LLM call failed after {attempt + 1} attempt(s): {e}") from e
+
+                    delay = _retry_after(e) or random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                    delay = min(delay, max(expires_at - time.monotonic(), 0.0))
+                    logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+                self.breaker.record_success()
+                return response
+        finally:
+            self._slots.release()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Return the process-wide LLM gateway, creating it on first use
+
+    Returns:
+        LLMGateway: Shared gateway instance
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                client = None
+                if os.getenv("LLM_BACKEND", "openai").strip().lower() == "fake":
+                    from .fake_llm import FakeOpenAIClient
+                    client = FakeOpenAIClient()
+                    logger.warning("Using the fake LLM backend (LLM_BACKEND=fake)")
+
+                _gateway = LLMGateway(
+                    client=client,
+                    timeout=_env_number("LLM_TIMEOUT_SECONDS", 30.0),
+                    deadline=_env_number("LLM_DEADLINE_SECONDS", 60.0),
+                    max_retries=int(_env_number("LLM_MAX_RETRIES", 3)),
+                    max_concurrency=int(_env_number("LLM_MAX_CONCURRENCY", 8)),
+                    failure_threshold=int(_env_number("LLM_CIRCUIT_FAILURE_THRESHOLD", 5)),
+                    reset_timeout=_env_number("LLM_CIRCUIT_RESET_SECONDS", 30.0)
+                )
+    return _gateway
@@ -0,0 +1,178 @@
+"""
+Parent-Child Module - Two-level (small-to-big) index support
+
+Parent sections (the chunks produced by DocumentChunker or LegalDocumentChunker)
+are stored once in a local JSON document store next to the vector store, and
+split into small child passages that are embedded for search. Children carry only
+the metadata needed for filtering and citation plus the id of their parent, so
+a few precise child hits expand into whole, deduplicated parent sections.
+"""
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+PARENT_STORE_FILE = "parent_documents.json"
+
+# Parent metadata copied to every child (filters, citations and benchmark matching)
+CHILD_METADATA_KEYS = (
+    "source", "file_name", "program", "doc_kind", "decree_number", "document_number",
+    "annex", "page", "page_index", "article", "article_id"
+)
+
+
+def parent_id_for(document: Document) -> str:
+    """
+    Stable id of a parent section (same source and content -> same id)
+
+    Args:
+        document (Document): Parent section
+
+    Returns:
+        str: Hexadecimal id
+    """
+    digest = hashlib.sha1()
+    digest.update(str(document.metadata.get('source', '')).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(document.page_content.encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+
+class ParentDocumentStore:
+    """JSON-backed store of parent sections, keyed by parent id"""
+
+    def __init__(self, persist_directory: str, file_name: str = PARENT_STORE_FILE):
+        """
+        Initialize the store
+
+        Args:
+            persist_directory (str): Directory of the vector store
+            file_name (str): Name of the JSON file
+        """
+        self.path = os.path.join(persist_directory, file_name)
+        self._documents: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """Whether the store has been persisted"""
+        return os.path.exists(self.path)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._documents is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._documents = json.load(f)
+                logger.info(f"Loaded {len(self._documents)} parent sections from {self.path}")
+            except FileNotFoundError:
+                self._documents = {}
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Error loading the parent document store: {e}")
+                self._documents = {}
+        return self._documents
+
+    def _persist(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._documents, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def save(self, parents: Iterable[Document], replace: bool = True):
+        """
+        Store parent sections (their id is read from metadata['parent_id'])
+
+        Args:
+            parents (Iterable[Document]): Parent sections
+            replace (bool): Drop the existing sections first (full rebuild)
+        """
+        with self._lock:
+            documents = {} if replace else dict(self._load())
+            for parent in parents:
+                documents[parent.metadata['parent_id']] = {
+                    "page_content": parent.page_content,
+                    "metadata": parent.metadata
+                }
+            self._documents = documents
+            self._persist()
+        logger.info(f"Parent document store saved with {len(documents)} sections")
+
+    def get(self, parent_ids: List[str]) -> List[Document]:
+        """
+        Load parent sections by id, in the given order (unknown ids are skipped)
+
+        Args:
+            parent_ids (List[str]): Parent ids
+
+        Returns:
+            List[Document]: Parent sections
+        """
+        documents = self._load()
+        results = []
+        for parent_id in parent_ids:
+            item = documents.get(parent_id)
+            if item is not None:
+                results.append(Document(page_content=item["page_content"], metadata=dict(item["metadata"]), id=parent_id))
+        return results
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+
+class ParentChildSplitter:
+    """Class to split parent sections into small child passages for the search index"""
+
+    def __init__(self, child_size: int = 400, child_overlap: int = 50):
+        """
+        Initialize the splitter
+
+        Args:
+            child_size (int): Maximum size of each child passage in characters
+            child_overlap (int): Overlap between consecutive children of a parent
+        """
+        self.child_size = child_size
+        self.child_overlap = child_overlap
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=child_size,
+            chunk_overlap=child_overlap,
+            separators=["\n\n", ". ", "; ", "\n", " ", ""]
+        )
+
+    def split(self, chunks: List[Document]) -> Tuple[List[Document], List[Document]]:
+        """
+        Turn chunks into (parents, children)
+
+        Args:
+            chunks (List[Document]): Chunks produced by a chunker (they become the parents)
+
+        Returns:
+            Tuple[List[Document], List[Document]]: Parents (with 'parent_id') and their child passages
+        """
+        parents: List[Document] = []
+        children: List[Document] = []
+        seen = set()
+
+        for chunk in chunks:
+            parent_id = parent_id_for(chunk)
+            if parent_id in seen:
+                continue
+            seen.add(parent_id)
+
+            parent = Document(page_content=chunk.page_content, metadata={**chunk.metadata, 'parent_id': parent_id})
+            parents.append(parent)
+
+            child_metadata = {key: chunk.metadata[key] for key in CHILD_METADATA_KEYS if key in chunk.metadata}
+            for i, text in enumerate(self.text_splitter.split_text(chunk.page_content)):
+                children.append(Document(
+                    page_content=text,
+                    metadata={**child_metadata, 'parent_id': parent_id, 'child_index': i}
+                ))
+
+        logger.info(f"Split {len(parents)} parent sections into {len(children)} child passages")
+        return parents, children
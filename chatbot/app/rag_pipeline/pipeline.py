@@ -4,16 +4,23 @@ RAG Pipeline - Main module to integrate all RAG pipelines steps
 
 from .step1_extraction import DocumentExtractor
 from .step2_chunking import DocumentChunker
+from .legal_chunking import LegalDocumentChunker
+from .parent_child import ParentChildSplitter, ParentDocumentStore
 from .step3_embedding import EmbeddingManager
 from .step4_search import SearchEngine
 from .step5_chat import RAGChatbot
+from .tracing import span, start_trace
 
+from langchain_core.documents import Document
 from typing import List, Dict, Any, Optional
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+CHUNKING_STRATEGIES = ("recursive", "legal")
+RETRIEVAL_MODES = ("chunks", "parent_child")
+
 class RAGPipeline:
     """Main class that integrates all the steps of the RAG pipeline"""
     
@@ -22,7 +29,14 @@ class RAGPipeline:
                  collection_name: str = "sefaz_docs",
                  persist_directory: str = "data/chroma_db",
                  chunk_size: int = 1000,
-                 chunk_overlap: int = 200):
+                 chunk_overlap: int = 200,
+                 chunking_strategy: str = "recursive",
+                 chunk_tokens: int = 350,
+                 chunk_overlap_tokens: int = 40,
+                 retrieval_mode: str = "chunks",
+                 child_size: int = 400,
+                 child_overlap: int = 50,
+                 chunking_workers: int = 1):
         """
         Initializes the RAG pipeline
         
@@ -30,19 +44,43 @@ class RAGPipeline:
             documents_path (str): Path to the documents
             collection_name (str): Name of the collection in the vector store
             persist_directory (str): Directory to persist the vector store
-            chunk_size (int): Size of the chunks
-            chunk_overlap (int): Overlap between chunks
+            chunk_size (int): Size of the chunks in characters ("recursive" strategy)
+            chunk_overlap (int): Overlap between chunks in characters ("recursive" strategy)
+            chunking_strategy (str): "recursive" (per-page character splits) or "legal"
+                (structure-aware splits on articles, paragraphs, incisos and annexes)
+            chunk_tokens (int): Size of the chunks in tokens ("legal" strategy)
+            chunk_overlap_tokens (int): Overlap between chunks of an article in tokens ("legal" strategy)
+            retrieval_mode (str): "chunks" (the chunks are embedded and returned) or "parent_child"
+                (the chunks become parent sections stored once; small child passages are embedded
+                and searches return the deduplicated parents)
+            child_size (int): Size of the child passages in characters ("parent_child" mode)
+            child_overlap (int): Overlap between child passages in characters ("parent_child" mode)
+            chunking_workers (int): Processes used by the "recursive" chunker (1 = in-process, 0 = one per CPU)
         """
+        if chunking_strategy not in CHUNKING_STRATEGIES:
+            raise ValueError(f"Unknown chunking strategy '{chunking_strategy}' (expected one of {', '.join(CHUNKING_STRATEGIES)})")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}' (expected one of {', '.join(RETRIEVAL_MODES)})")
+        
         self.documents_path = documents_path
         self.collection_name = collection_name
         self.persist_directory = persist_directory
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunking_strategy = chunking_strategy
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
         
         # Initializes components
         self.extractor = DocumentExtractor(documents_path)
-        self.chunker = DocumentChunker(chunk_size, chunk_overlap)
+        if chunking_strategy == "legal":
+            self.chunker = LegalDocumentChunker(chunk_tokens, chunk_overlap_tokens)
+        else:
+            self.chunker = DocumentChunker(chunk_size, chunk_overlap, workers=chunking_workers)
         self.embedding_manager = EmbeddingManager(collection_name, persist_directory)
+        self.retrieval_mode = retrieval_mode
+        self.parent_store = ParentDocumentStore(persist_directory) if retrieval_mode == "parent_child" else None
+        self.child_splitter = ParentChildSplitter(child_size, child_overlap) if retrieval_mode == "parent_child" else None
         
         # Components that will be initialized after processing
         self.search_engine = None
@@ -50,6 +88,34 @@ class RAGPipeline:
         
         logger.info("RAG pipeline initialized")
     
+    def _init_components(self, vector_store):
+        """Create the search engine and chatbot for a loaded vector store"""
+        self.search_engine = SearchEngine(
+            vector_store,
+            index_version=self.embedding_manager.get_index_version(),
+            parent_store=self.parent_store
+        )
+        self.chatbot = RAGChatbot(self.search_engine)
+    
+    def _index_chunks(self, chunks: List[Document], update: bool = False):
+        """
+        Embed the chunks (or, in parent_child mode, store them as parents and embed their children)
+        
+        Args:
+            chunks (List[Document]): Chunks to index
+            update (bool): Add to the existing knowledge base instead of rebuilding it
+            
+        Returns:
+            Optional[Chroma]: Vector store, or None if there is an error
+        """
+        if self.retrieval_mode == "parent_child":
+            parents, chunks = self.child_splitter.split(chunks)
+            self.parent_store.save(parents, replace=not update)
+        
+        if update:
+            return self.embedding_manager.update_vector_store(chunks)
+        return self.embedding_manager.create_vector_store(chunks)
+    
     def build_knowledge_base(self, force_rebuild: bool = False) -> bool:
         """
         Builds the complete knowledge base
@@ -60,42 +126,78 @@ class RAGPipeline:
         Returns:
             bool: True if successful, False otherwise
         """
+        with start_trace() as trace:
+            with span("build.total"):
+                success = self._build_knowledge_base(force_rebuild)
+            logger.info(f"Knowledge base build timings: {trace.as_dict()}")
+        return success
+
+    def _build_knowledge_base(self, force_rebuild: bool) -> bool:
+        """Run the extraction, chunking and embedding stages of build_knowledge_base"""
         try:
             logger.info("Starting knowledge base construction")
             
             # Checks if vector store already exists
             if not force_rebuild:
                 vector_store_info = self.embedding_manager.get_vector_store_info()
-                if vector_store_info.get("status") == "loaded":
+                if vector_store_info.get("status") == "loaded" and (self.parent_store is None or self.parent_store.exists()):
                     logger.info("Vector store already exists, loading...")
                     vector_store = self.embedding_manager.load_vector_store()
                     if vector_store:
-                        self.search_engine = SearchEngine(vector_store)
-                        self.chatbot = RAGChatbot(self.search_engine)
+                        self._init_components(vector_store)
                         logger.info("Knowledge base loaded successfully")
                         return True
             
-            # Step 1: Extraction
-            logger.info("Step 1: Extracting documents...")
-            documents = self.extractor.extract_documents()
-            if not documents:
-                logger.error("No documents found to process")
-                return False
-            
-            logger.info(f"Extracted {len(documents)} documents")
-            
-            # Step 2: Chunking
-            logger.info("Step 2: Chunking documents...")
-            chunks = self.chunker.chunk_documents(documents)
-            if not chunks:
-                logger.error("Error creating chunks of documents")
-                return False
-            
-            logger.info(f"Created {len(chunks)} chunks")
+            if isinstance(self.chunker, DocumentChunker) and self.retrieval_mode == "chunks":
+                # Slotted page/chunk records with shared per-document metadata; the
+                # metadata dicts are only built in batches at the vector store boundary
+                logger.info("Step 1: Extracting documents...")
+                with span("build.extraction"):
+                    sources, pages = self.extractor.extract_page_records()
+                if not pages:
+                    logger.error("No documents found to process")
+                    return False
+                
+                logger.info(f"Extracted {len(pages)} documents")
+                
+                logger.info("Step 2: Chunking documents...")
+                with span("build.chunking"):
+                    records = self.chunker.chunk_records(pages)
+                if not records:
+                    logger.error("Error creating chunks of documents")
+                    return False
+                
+                logger.info(f"Created {len(records)} chunks")
+                
+                logger.info("Step 3: Creating embeddings and vector store...")
+                with span("build.embedding"):
+                    vector_store = self.embedding_manager.create_vector_store_from_records(records, pages, sources)
+            else:
+                # Step 1: Extraction
+                logger.info("Step 1: Extracting documents...")
+                with span("build.extraction"):
+                    documents = self.extractor.extract_documents()
+                if not documents:
+                    logger.error("No documents found to process")
+                    return False
+                
+                logger.info(f"Extracted {len(documents)} documents")
+                
+                # Step 2: Chunking
+                logger.info("Step 2: Chunking documents...")
+                with span("build.chunking"):
+                    chunks = self.chunker.chunk_documents(documents)
+                if not chunks:
+                    logger.error("Error creating chunks of documents")
+                    return False
+                
+                logger.info(f"Created {len(chunks)} chunks")
+                
+                # Step 3: Embedding
+                logger.info("Step 3: Creating embeddings and vector store...")
+                with span("build.embedding"):
+                    vector_store = self._index_chunks(chunks)
             
-            # Step 3: Embedding
-            logger.info("Step 3: Creating embeddings and vector store...")
-            vector_store = self.embedding_manager.create_vector_store(chunks)
             if not vector_store:
                 logger.error("Error creating vector store")
                 return False
@@ -103,8 +205,7 @@ class RAGPipeline:
             logger.info("Vector store created successfully")
             
             # Initializes search and chat components
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            self._init_components(vector_store)
             
             logger.info("Knowledge base built successfully")
             return True
@@ -127,9 +228,11 @@ class RAGPipeline:
             if not vector_store:
                 logger.error("Vector store not found")
                 return False
+            if self.parent_store is not None and not self.parent_store.exists():
+                logger.error("Parent document store not found, rebuild the knowledge base in parent_child mode")
+                return False
             
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            self._init_components(vector_store)
             
             logger.info("Knowledge base loaded successfully")
             return True
@@ -199,14 +302,24 @@ class RAGPipeline:
             "documents_path": self.documents_path,
             "collection_name": self.collection_name,
             "persist_directory": self.persist_directory,
+            "chunking_strategy": self.chunking_strategy,
+            "retrieval_mode": self.retrieval_mode,
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap
         }
+        if self.chunking_strategy == "legal":
+            stats.update({"chunk_tokens": self.chunk_tokens, "chunk_overlap_tokens": self.chunk_overlap_tokens})
         
         # Vector store information
         vector_store_info = self.embedding_manager.get_vector_store_info()
         stats.update(vector_store_info)
         
+        if self.parent_store is not None:
+            stats["parent_sections"] = len(self.parent_store)
+        
+        if self.search_engine:
+            stats["retrieval_cache"] = self.search_engine.get_cache_statistics()
+        
         return stats
     
     def update_knowledge_base(self, new_documents_path: str = None) -> bool:
@@ -234,14 +347,13 @@ class RAGPipeline:
             new_chunks = self.chunker.chunk_documents(new_documents)
             
             # Updates vector store
-            vector_store = self.embedding_manager.update_vector_store(new_chunks)
+            vector_store = self._index_chunks(new_chunks, update=True)
             if not vector_store:
                 logger.error("Error updating vector store")
                 return False
             
             # Updates components
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            self._init_components(vector_store)
             
             logger.info("Knowledge base updated successfully")
             return True
@@ -255,7 +367,8 @@ class RAGPipeline:
                                         difficulty: str,
                                         type: str,
                                         k: int = 10, 
-                                        score_threshold: float = 0.7) -> Dict[str, Any]:
+                                        score_threshold: float = 0.7,
+                                        program: Optional[str] = None) -> Dict[str, Any]:
         """
         Generates a set of challenges and questions based on the topic, difficulty and type.
         
@@ -265,6 +378,7 @@ class RAGPipeline:
             type (str): Type of challenge (Calculation, Discursive).
             k (int): Number of documents to search.
             score_threshold (float): Minimum similarity score.
+            program (Optional[str]): Program whose documents the search is restricted to.
             
         Returns:
             Dict[str, Any]: Challenges and questions generated.
@@ -275,7 +389,7 @@ class RAGPipeline:
                 "error": "Knowledge base not loaded. Execute build_knowledge_base() or load_knowledge_base() first."
             }
         
-        return self.chatbot.generate_challenges_and_questions(topic, difficulty, type, k, score_threshold)
+        return self.chatbot.generate_challenges_and_questions(topic, difficulty, type, k, score_threshold, program)
 
     def generate_multiple_choice_question(self, 
                                         topic: str, 
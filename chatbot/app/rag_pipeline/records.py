@@ -0,0 +1,155 @@
+"""
+Records Module - Compact page and chunk records passed between pipeline stages
+
+During a knowledge-base build, pages and chunks travel as slotted records that
+reference their document by an integer id instead of carrying a metadata dict.
+Per-document metadata (source path, file name, directory, program, PDF
+properties, ...) is stored once in a SourceTable with interned strings, and the
+full per-chunk metadata dict is only built at the vector store boundary.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+import sys
+
+# Page-level keys kept on the page record instead of the shared document metadata
+PAGE_KEYS = ("page", "page_label", "page_index", "article", "articles")
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SourceTable:
+    """Per-document metadata, stored once and referenced by integer id"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+
+    def add(self, source: str, metadata: Dict[str, Any]) -> int:
+        """
+        Register a document (or return its id if already registered)
+
+        Args:
+            source (str): Document path
+            metadata (Dict[str, Any]): Document-level metadata (page keys are ignored)
+
+        Returns:
+            int: Document id
+        """
+        source_id = self._ids.get(source)
+        if source_id is None:
+            source_id = len(self._metadata)
+            self._ids[sys.intern(source)] = source_id
+            self._metadata.append({
+                sys.intern(key): _intern(value) for key, value in metadata.items() if key not in PAGE_KEYS
+            })
+        return source_id
+
+    def metadata(self, source_id: int) -> Dict[str, Any]:
+        """
+        Return the shared metadata of a document (do not mutate)
+
+        Args:
+            source_id (int): Document id
+
+        Returns:
+            Dict[str, Any]: Document-level metadata
+        """
+        return self._metadata[source_id]
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+
+@dataclass(slots=True)
+class PageRecord:
+    """A page of an extracted document"""
+    source_id: int
+    text: str
+    page: Optional[int] = None
+    page_label: Optional[str] = None
+    article: Optional[str] = None
+    articles: Optional[str] = None
+
+    @classmethod
+    def from_document(cls, document, sources: SourceTable) -> "PageRecord":
+        """
+        Build a page record from a page Document, registering its source
+
+        Args:
+            document (Document): Page document
+            sources (SourceTable): Table of documents
+
+        Returns:
+            PageRecord: Page record
+        """
+        metadata = document.metadata
+        return cls(
+            source_id=sources.add(metadata.get('source', ''), metadata),
+            text=document.page_content,
+            page=metadata.get('page'),
+            page_label=_intern(metadata.get('page_label')),
+            article=_intern(metadata.get('article')),
+            articles=metadata.get('articles')
+        )
+
+
+@dataclass(slots=True)
+class ChunkRecord:
+    """A chunk of a page, referencing its page and document by index"""
+    source_id: int
+    page_index: int
+    chunk_index: int
+    total_chunks: int
+    start_index: int
+    text: str
+    article: Optional[str] = None
+    articles: Optional[str] = None
+
+    def metadata(self, pages: List[PageRecord], sources: SourceTable) -> Dict[str, Any]:
+        """
+        Build the vector store metadata of the chunk
+
+        Args:
+            pages (List[PageRecord]): Pages the chunks were created from
+            sources (SourceTable): Table of documents
+
+        Returns:
+            Dict[str, Any]: Chunk metadata (same keys as DocumentChunker.chunk_documents)
+        """
+        page = pages[self.page_index]
+        metadata = dict(sources.metadata(self.source_id))
+        if page.page is not None:
+            metadata['page'] = page.page
+        if page.page_label is not None:
+            metadata['page_label'] = page.page_label
+        metadata.update({
+            'start_index': self.start_index,
+            'chunk_id': f"{self.page_index}_{self.chunk_index}",
+            'original_document_index': self.page_index,
+            'chunk_index': self.chunk_index,
+            'total_chunks_in_doc': self.total_chunks,
+            'chunk_size': len(self.text)
+        })
+        if self.article:
+            metadata['article'] = self.article
+        if self.articles:
+            metadata['articles'] = self.articles
+        return metadata
+
+
+def iter_batches(records: List[ChunkRecord], batch_size: int) -> Iterator[List[ChunkRecord]]:
+    """
+    Yield consecutive batches of records
+
+    Args:
+        records (List[ChunkRecord]): Records
+        batch_size (int): Maximum records per batch
+
+    Yields:
+        List[ChunkRecord]: Batch of records
+    """
+    for start in range(0, len(records), batch_size):
+        yield records[start:start + batch_size]
@@ -0,0 +1,120 @@
+"""
+Retrieval Cache Module - LRU + TTL cache of ranked retrieval results
+
+Stores the ranked chunk ids and scores produced by a search (never Document
+objects), keyed by the normalized query, k, filters and the knowledge-base
+version. The search engine re-hydrates the chunks from the vector store by id,
+so retrieval can be reused while the LLM step varies.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import re
+import threading
+import time
+import unicodedata
+
+# (chunk id, distance, similarity) for every ranked result
+CacheEntries = Tuple[Tuple[str, Optional[float], Optional[float]], ...]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups (Unicode NFC and whitespace)
+
+    Case is preserved: the embedding model is case-sensitive, so queries that
+    differ only in case can retrieve different chunks.
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        str: Normalized query
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", query or "")).strip()
+
+
+class RetrievalCache:
+    """Thread-safe LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Maximum number of cached searches (least recently used are evicted)
+            ttl_seconds (float): Time to live of an entry in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, CacheEntries]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CacheEntries]:
+        """
+        Look up a cached search
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Optional[CacheEntries]: Ranked (id, distance, similarity) entries, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, entries: CacheEntries):
+        """
+        Store a search result
+
+        Args:
+            key (Hashable): Cache key
+            entries (CacheEntries): Ranked (id, distance, similarity) entries
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, entries)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry (e.g. when its chunks no longer exist)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics
+
+        Returns:
+            Dict[str, Any]: Size, hits, misses, hit ratio and evictions
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,335 @@
+"""
+Schemas Module - Structured output schemas, validation and JSON repair for generation
+
+Defines the JSON schemas of the quiz and challenge generators, sends them to the
+model as a strict `response_format`, and validates the model output with
+validators compiled once from the same schemas. Near-valid outputs (markdown
+fences, surrounding text, trailing commas, truncated JSON) are repaired locally
+instead of triggering a new LLM round trip.
+
+Used by both the RAG pipeline (step5_chat) and the chatbot API views.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import copy
+import json
+import re
+
+# Local-only keywords: enforced by the compiled validators but stripped from the
+# schema sent to the API (strict structured outputs do not accept them)
+_LOCAL_ONLY_KEYWORDS = ("minItems", "maxItems", "minLength")
+
+MAX_ERRORS = 20
+
+OPTION_LETTERS = ["A", "B", "C", "D", "E"]
+
+_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {letter: {"type": "string", "minLength": 1} for letter in OPTION_LETTERS},
+    "required": OPTION_LETTERS,
+    "additionalProperties": False
+}
+
+QUIZ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string", "minLength": 1},
+        "options": _OPTIONS_SCHEMA,
+        "answer": {"type": "string", "enum": OPTION_LETTERS},
+        "explanation": {"type": "string"}
+    },
+    "required": ["question", "options", "answer", "explanation"],
+    "additionalProperties": False
+}
+
+CHALLENGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "challenges": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "challenge": {"type": "string", "minLength": 1},
+                    "challenge_answer": {"type": "string", "minLength": 1},
+                    "challenge_justification": {"type": "string", "minLength": 1}
+                },
+                "required": ["challenge", "challenge_answer", "challenge_justification"],
+                "additionalProperties": False
+            }
+        },
+        "questions": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string", "minLength": 1},
+                    "options": _OPTIONS_SCHEMA,
+                    "correct_answer": {"type": "string", "enum": OPTION_LETTERS},
+                    "question_justification": {"type": "string", "minLength": 1}
+                },
+                "required": ["question", "options", "correct_answer", "question_justification"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["challenges", "questions"],
+    "additionalProperties": False
+}
+
+_TYPE_CHECKS = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+}
+
+Validator = Callable[[Any], List[str]]
+
+
+def _compile(schema: Dict[str, Any]) -> Callable[[Any, str, List[str]], None]:
+    """Compile a schema node into a closure that appends errors for a value"""
+    checks: List[Callable[[Any, str, List[str]], bool]] = []
+
+    expected_type = schema.get("type")
+    if expected_type:
+        type_check = _TYPE_CHECKS[expected_type]
+
+        def check_type(value, path, errors):
+            if not type_check(value):
+                errors.append(f"{path}: expected {expected_type}, got {type(value).__name__}")
+                return False
+            return True
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: '{value}' is not one of {allowed}")
+            return True
+        checks.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_min_length(value, path, errors):
+            if len(value.strip()) < min_length:
+                errors.append(f"{path}: must not be empty")
+            return True
+        checks.append(check_min_length)
+
+    if expected_type == "object":
+        properties = {name: _compile(node) for name, node in schema.get("properties", {}).items()}
+        required = list(schema.get("required", []))
+        closed = schema.get("additionalProperties") is False
+
+        def check_object(value, path, errors):
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}: missing required field '{name}'")
+            for name, item in value.items():
+                validator = properties.get(name)
+                if validator is not None:
+                    validator(item, f"{path}.{name}", errors)
+                elif closed:
+                    errors.append(f"{path}: unexpected field '{name}'")
+            return True
+        checks.append(check_object)
+
+    if expected_type == "array":
+        items = _compile(schema["items"]) if "items" in schema else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+
+        def check_array(value, path, errors):
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path}: expected at least {min_items} item(s), got {len(value)}")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path}: expected at most {max_items} item(s), got {len(value)}")
+            if items is not None:
+                for index, item in enumerate(value):
+                    items(item, f"{path}[{index}]", errors)
+            return True
+        checks.append(check_array)
+
+    def validate(value, path, errors):
+        for check in checks:
+            if len(errors) >= MAX_ERRORS or not check(value, path, errors):
+                return
+    return validate
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """
+    Compile a JSON schema (subset: type, properties, required, additionalProperties,
+    items, enum, minItems, maxItems, minLength) into a single-pass validator
+
+    Args:
+        schema (Dict[str, Any]): JSON schema
+
+    Returns:
+        Validator: Function returning the list of validation errors (empty when valid)
+    """
+    root = _compile(schema)
+
+    def validator(value: Any) -> List[str]:
+        errors: List[str] = []
+        root(value, "$", errors)
+        return errors
+    return validator
+
+
+validate_quiz = compile_schema(QUIZ_SCHEMA)
+validate_challenge_set = compile_schema(CHALLENGE_SCHEMA)
+
+
+def _strip_local_keywords(node: Any) -> Any:
+    if isinstance(node, dict):
+        return {key: _strip_local_keywords(value) for key, value in node.items() if key not in _LOCAL_ONLY_KEYWORDS}
+    if isinstance(node, list):
+        return [_strip_local_keywords(value) for value in node]
+    return node
+
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the strict structured-output response_format for a schema
+
+    Args:
+        name (str): Schema name, e.g. "quiz"
+        schema (Dict[str, Any]): JSON schema
+
+    Returns:
+        Dict[str, Any]: Value for the `response_format` completion parameter
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": _strip_local_keywords(copy.deepcopy(schema))}
+    }
+
+
+QUIZ_RESPONSE_FORMAT = response_format("quiz", QUIZ_SCHEMA)
+CHALLENGE_RESPONSE_FORMAT = response_format("challenge_set", CHALLENGE_SCHEMA)
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _truncated_candidates(text: str, max_candidates: int = 16) -> List[str]:
+    """
+    Close the strings, arrays and objects left open by a truncated output
+
+    Returns the text closed as-is, then cut back to the last complete
+    elements (before a comma), so a dangling key or half-written value can be dropped.
+    """
+    stack: List[str] = []
+    cut_points: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+        elif char == ",":
+            cut_points.append((index, "".join(reversed(stack))))
+
+    closed = text + ('"' if in_string else "")
+    closed = re.sub(r"[,:]\s*$", "", closed.rstrip())
+    candidates = [closed + "".join(reversed(stack))]
+    for index, closers in reversed(cut_points[-max_candidates:]):
+        candidates.append(text[:index] + closers)
+    return candidates
+
+
+def _repair_attempts(text: str) -> Iterator[str]:
+    """Yield the raw text followed by progressively more aggressive repairs"""
+    yield text
+
+    candidate = _FENCE_RE.sub("", text.strip())
+    start = candidate.find("{")
+    if start == -1:
+        return
+    end = candidate.rfind("}")
+    options = [candidate[start:end + 1]] if end > start else []
+    options.append(candidate[start:])
+
+    for option in options:
+        yield option
+        yield _TRAILING_COMMA_RE.sub(r"\1", option)
+
+    for option in _truncated_candidates(candidate[start:]):
+        yield _TRAILING_COMMA_RE.sub(r"\1", option)
+
+
+def _parsed_attempts(text: str) -> Iterator[Any]:
+    """Yield every repair attempt that parses as JSON"""
+    for attempt in _repair_attempts(text or ""):
+        try:
+            yield json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse model output as JSON, repairing common near-valid outputs
+
+    Tries, in order: the raw text, the text without markdown fences and
+    surrounding prose, without trailing commas, and with truncated strings and
+    brackets closed.
+
+    Args:
+        text (str): Model output
+
+    Returns:
+        Any: Parsed JSON value
+
+    Raises:
+        ValueError: When the text cannot be repaired
+    """
+    for data in _parsed_attempts(text):
+        return data
+    raise ValueError("Could not repair the model output as JSON")
+
+
+def parse_structured_output(text: str, validator: Validator) -> Tuple[Optional[Any], List[str]]:
+    """
+    Parse (repairing if needed) and validate a structured model output
+
+    For truncated outputs, the first repair that passes validation wins (e.g.
+    dropping a half-written last item); otherwise the errors of the first
+    parseable repair are returned.
+
+    Args:
+        text (str): Model output
+        validator (Validator): Compiled schema validator
+
+    Returns:
+        Tuple[Optional[Any], List[str]]: Parsed data (None if unparseable) and validation errors
+    """
+    first: Optional[Tuple[Any, List[str]]] = None
+    for data in _parsed_attempts(text):
+        errors = validator(data)
+        if not errors:
+            return data, errors
+        if first is None:
+            first = (data, errors)
+    if first is None:
+        return None, ["Could not repair the model output as JSON"]
+    return first
@@ -5,9 +5,12 @@ Extraction Module - Responsável por carregar documentos de diferentes fontes
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import logging
 
+from .document_metadata import derive_path_metadata, find_article_headings
+from .records import PageRecord, SourceTable
+
 # OCR imports
 from pdf2image import convert_from_path
 import pytesseract
@@ -26,6 +29,28 @@ class DocumentExtractor:
         """
         self.base_directory = base_directory
     
+    def _add_structured_metadata(self, file_path: str, pages: List[Document]):
+        """
+        Add program, decree, annex and article metadata to the pages of a document
+        
+        Each page records the article in force at its start ('article', carried over
+        from the previous page) and the articles whose headings it contains.
+        
+        Args:
+            file_path (str): Path of the document
+            pages (List[Document]): Pages of the document, in order
+        """
+        path_metadata = derive_path_metadata(file_path, self.base_directory)
+        current_article = None
+        for page in pages:
+            page.metadata.update(path_metadata)
+            if current_article:
+                page.metadata['article'] = current_article
+            headings = find_article_headings(page.page_content)
+            if headings:
+                page.metadata['articles'] = ",".join(headings)
+                current_article = headings[-1]
+    
     def _ocr_pdf(self, file_path: str) -> List[Document]:
         """
         Perform OCR on a PDF file and return a list of page Documents.
@@ -45,6 +70,7 @@ class DocumentExtractor:
                         'directory': os.path.dirname(file_path),
                         'document_type': 'pdf',
                         'extraction': 'ocr',
+                        'page': page_index,
                         'page_index': page_index
                     }
                 )
@@ -63,10 +89,40 @@ class DocumentExtractor:
             List[Document]: List of extracted documents
         """
         documents = []
+        for pdf_documents in self._iter_pdfs():
+            documents.extend(pdf_documents)
+        
+        logger.info(f"Total of {len(documents)} documents extracted")
+        return documents
+    
+    def extract_page_records(self) -> Tuple[SourceTable, List[PageRecord]]:
+        """
+        Extract all PDFs as compact page records
         
+        Each file's page Documents are converted as soon as the file is loaded, so
+        the document-level metadata is stored once per file instead of once per page.
+        
+        Returns:
+            Tuple[SourceTable, List[PageRecord]]: Table of documents and the page records
+        """
+        sources = SourceTable()
+        pages: List[PageRecord] = []
+        for pdf_documents in self._iter_pdfs():
+            pages.extend(PageRecord.from_document(doc, sources) for doc in pdf_documents)
+        
+        logger.info(f"Total of {len(pages)} pages extracted from {len(sources)} documents")
+        return sources, pages
+    
+    def _iter_pdfs(self) -> Iterator[List[Document]]:
+        """
+        Load the PDFs of base_directory and subdirectories, one file at a time
+        
+        Yields:
+            List[Document]: Page documents of a file, with structured metadata
+        """
         if not os.path.isdir(self.base_directory):
             logger.error(f"Diretório base não encontrado: {self.base_directory}")
-            return documents
+            return
             
         logger.info(f"Iniciando extração de PDFs em: {self.base_directory}")
         
@@ -100,15 +156,14 @@ class DocumentExtractor:
                             if ocr_docs:
                                 pdf_documents = ocr_docs
                         
-                        documents.extend(pdf_documents)
+                        self._add_structured_metadata(file_path, pdf_documents)
                         logger.info(f"  - {len(pdf_documents)} pages extracted from {file_name}")
                         
                     except Exception as e:
                         logger.error(f"Error while processing file: {file_path}: {e}")
                         continue
-        
-        logger.info(f"Total of {len(documents)} documents extracted")
-        return documents
+                    
+                    yield pdf_documents
     
     def extract_documents(self) -> List[Document]:
         """
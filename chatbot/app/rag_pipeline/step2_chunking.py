@@ -4,18 +4,85 @@ Chunking Module - Responsible for dividing documents into smaller chunks for pro
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+import os
+
+from .document_metadata import article_at, find_article_headings
+from .records import ChunkRecord, PageRecord
 
 logger = logging.getLogger(__name__)
 
+# Split returned by the workers (plain tuples pickle compactly): (page index, chunk index,
+# chunks in page, start offset, text, article in force, article headings)
+_Split = Tuple[int, int, int, int, str, Optional[str], Optional[str]]
+
+# Shard work: (document index, page text, article in force at the start of the page)
+_ShardItem = Tuple[int, str, Optional[str]]
+
+
+def _chunk_shard(chunk_size: int,
+                 chunk_overlap: int,
+                 separators: List[str],
+                 shard: List[_ShardItem]) -> List[_Split]:
+    """
+    Split a shard of pages into compact splits (runs in the worker processes)
+    
+    Args:
+        chunk_size (int): Maximum size of each chunk
+        chunk_overlap (int): Overlap between consecutive chunks
+        separators (List[str]): Separators to divide the text
+        shard (List[_ShardItem]): Pages to split
+        
+    Returns:
+        List[_Split]: Splits, in page order
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=separators,
+        is_separator_regex=False
+    )
+    splits: List[_Split] = []
+    for doc_index, text, page_article in shard:
+        try:
+            pieces = splitter.split_text(text)
+        except Exception as e:
+            logger.error(f"Error chunking document {doc_index}: {e}")
+            continue
+        
+        # Same start offsets as the splitter's add_start_index
+        index, previous_len = 0, 0
+        for chunk_index, piece in enumerate(pieces):
+            index = text.find(piece, max(0, index + previous_len - chunk_overlap))
+            previous_len = len(piece)
+            
+            headings = find_article_headings(piece)
+            article = article_at(text, index, default=page_article) or (headings[0] if headings else None)
+            splits.append((doc_index, chunk_index, len(pieces), index, piece, article, ",".join(headings) or None))
+    return splits
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (respects container/affinity limits)"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
 class DocumentChunker:
     """Class to divide documents into smaller chunks"""
     
     def __init__(self, 
                  chunk_size: int = 1500,
                  chunk_overlap: int = 200,
-                 separators: List[str] = None):
+                 separators: List[str] = None,
+                 workers: int = 1,
+                 parallel_min_documents: int = 200):
         """
         Initialize document chunker
         
@@ -23,21 +90,104 @@ class DocumentChunker:
             chunk_size (int): Maximum size of each chunk
             chunk_overlap (int): Overlap between consecutive chunks
             separators (List[str]): Separators to divide the text
+            workers (int): Worker processes for chunking (1 = in-process, 0 = one per CPU)
+            parallel_min_documents (int): Below this number of documents chunking stays in-process
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.workers = workers if workers > 0 else _available_cpus()
+        self.parallel_min_documents = parallel_min_documents
         
         # Default separators if not provided
         if separators is None:
             separators = ["\n\n", "\n", " ", ""]
+        self.separators = separators
+    
+    def chunk_records(self, pages: List[PageRecord]) -> List[ChunkRecord]:
+        """
+        Divide page records into slotted chunk records
+        
+        Args:
+            pages (List[PageRecord]): Pages to divide (see DocumentExtractor.extract_page_records)
+            
+        Returns:
+            List[ChunkRecord]: Chunk records, in page order (metadata is built by ChunkRecord.metadata)
+        """
+        if not pages:
+            logger.warning("No documents provided for chunking")
+            return []
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=separators,
-            is_separator_regex=False
-        )
+        logger.info(f"Starting chunking of {len(pages)} pages")
+        splits = self._split([(i, page.text, page.article) for i, page in enumerate(pages)])
+        records = [
+            ChunkRecord(pages[page_index].source_id, page_index, chunk_index, total, start, text, article, articles)
+            for page_index, chunk_index, total, start, text, article, articles in splits
+        ]
+        logger.info(f"Total of {len(records)} chunks created")
+        return records
+    
+    def _split(self, items: List[_ShardItem]) -> List[_Split]:
+        """
+        Split pages, sharding them across a process pool for large corpora
+        
+        Only the page text and article (not the metadata) is sent to the workers.
+        
+        Args:
+            items (List[_ShardItem]): Pages to split
+            
+        Returns:
+            List[_Split]: Splits, in page order
+        """
+        if self.workers <= 1 or len(items) < self.parallel_min_documents:
+            return _chunk_shard(self.chunk_size, self.chunk_overlap, self.separators, items)
+        
+        shards = self._make_shards(items, self.workers * 4)
+        logger.info(f"Chunking {len(items)} documents in {len(shards)} shards with {self.workers} processes")
+        splits: List[_Split] = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for shard_splits in executor.map(
+                partial(_chunk_shard, self.chunk_size, self.chunk_overlap, self.separators), shards
+            ):
+                splits.extend(shard_splits)
+        return splits
+    
+    @staticmethod
+    def _make_shards(items: List[_ShardItem], count: int) -> List[List[_ShardItem]]:
+        """Split the pages into contiguous shards of similar total text length"""
+        total = sum(len(text) for _, text, _ in items) or 1
+        target = total / max(count, 1)
+        shards, current, size = [], [], 0
+        for item in items:
+            current.append(item)
+            size += len(item[1])
+            if size >= target:
+                shards.append(current)
+                current, size = [], 0
+        if current:
+            shards.append(current)
+        return shards
+    
+    @staticmethod
+    def _chunk_metadata(split: _Split, documents: List[Document]) -> Dict[str, Any]:
+        """Build the metadata of a split (source page metadata + chunking metadata)"""
+        doc_index, chunk_index, total, start_index, text, article, articles = split
+        metadata = {
+            key: value for key, value in documents[doc_index].metadata.items()
+            if key not in ('article', 'articles')
+        }
+        metadata.update({
+            'start_index': start_index,
+            'chunk_id': f"{doc_index}_{chunk_index}",
+            'original_document_index': doc_index,
+            'chunk_index': chunk_index,
+            'total_chunks_in_doc': total,
+            'chunk_size': len(text)
+        })
+        if article:
+            metadata['article'] = article
+        if articles:
+            metadata['articles'] = articles
+        return metadata
     
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """
@@ -54,40 +204,27 @@ class DocumentChunker:
             return []
         
         logger.info(f"Starting chunking of {len(documents)} documents")
-
         
-        all_chunks = []
-        
-        for i, doc in enumerate(documents):
-            try:
-                # Divide the document into chunks
-                chunks = self.text_splitter.split_documents([doc])
-                
-                # Add specific chunking metadata
-                for j, chunk in enumerate(chunks):
-                    chunk.metadata.update({
-                        'chunk_id': f"{i}_{j}",
-                        'original_document_index': i,
-                        'chunk_index': j,
-                        'total_chunks_in_doc': len(chunks),
-                        'chunk_size': len(chunk.page_content)
-                    })
-                
-                if len(chunks) == 0:
-                    logger.warning(
-                        f"Document {i+1} produced 0 chunks | file_name={doc.metadata.get('file_name')} | source={doc.metadata.get('source')}"
-                    )
-                
-                all_chunks.extend(chunks)
-                logger.info(f"  - Document {i+1}: {len(chunks)} chunks created")
-                
-            except Exception as e:
-                logger.error(f"Error chunking document {i}: {e}")
-                continue
+        splits = self._split([(i, doc.page_content, doc.metadata.get('article')) for i, doc in enumerate(documents)])
+        all_chunks = [
+            Document(page_content=split[4], metadata=self._chunk_metadata(split, documents))
+            for split in splits
+        ]
+        self._log_empty_documents(splits, documents)
         
         logger.info(f"Total of {len(all_chunks)} chunks created")
         return all_chunks
     
+    @staticmethod
+    def _log_empty_documents(splits: List[_Split], documents: List[Document]):
+        """Warn about documents that produced no chunks"""
+        chunked = {split[0] for split in splits}
+        for i, doc in enumerate(documents):
+            if i not in chunked:
+                logger.warning(
+                    f"Document {i+1} produced 0 chunks | file_name={doc.metadata.get('file_name')} | source={doc.metadata.get('source')}"
+                )
+    
     def chunk_single_document(self, document: Document) -> List[Document]:
         """
         Divide a single document into chunks
@@ -8,14 +8,20 @@ from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from typing import List, Dict, Any, Optional
 import os
+import uuid
 import logging
 from dotenv import load_dotenv
 
+from .records import ChunkRecord, PageRecord, SourceTable, iter_batches
+
 # Uncomment to use with OpenAIEmbeddings
 # load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# File in the persistence directory holding the knowledge-base version stamp
+INDEX_VERSION_FILE = "index_version"
+
 class EmbeddingManager:
     """Class to manage embeddings and vector store"""
     
@@ -78,6 +84,54 @@ class EmbeddingManager:
             )
             
             logger.info(f"Vector store '{self.collection_name}' created and persisted successfully")
+            self._bump_index_version()
+            
+            return vector_store
+            
+        except Exception as e:
+            logger.error(f"Error creating vector store: {e}")
+            return None
+    
+    def create_vector_store_from_records(self, 
+                                         records: List[ChunkRecord], 
+                                         pages: List[PageRecord], 
+                                         sources: SourceTable,
+                                         batch_size: int = 512) -> Optional[Chroma]:
+        """
+        Create a new vector store from compact chunk records
+        
+        Metadata dicts are built one batch at a time, right before insertion, so
+        they never exist for the whole corpus at once.
+        
+        Args:
+            records (List[ChunkRecord]): Chunk records
+            pages (List[PageRecord]): Pages the records were created from
+            sources (SourceTable): Table of documents
+            batch_size (int): Chunks embedded and inserted per batch
+            
+        Returns:
+            Optional[Chroma]: Vector store created or None if there is an error
+        """
+        if not records:
+            logger.warning("No chunks provided to create vector store")
+            return None
+        
+        logger.info(f"Creating vector store with {len(records)} chunks")
+        
+        try:
+            vector_store = Chroma(
+                collection_name=self.collection_name,
+                embedding_function=self.embeddings,
+                persist_directory=self.persist_directory
+            )
+            for batch in iter_batches(records, batch_size):
+                vector_store.add_texts(
+                    texts=[record.text for record in batch],
+                    metadatas=[record.metadata(pages, sources) for record in batch]
+                )
+            
+            logger.info(f"Vector store '{self.collection_name}' created and persisted successfully")
+            self._bump_index_version()
             
             return vector_store
             
@@ -134,6 +188,7 @@ class EmbeddingManager:
         try:
             # Add the new chunks
             vector_store.add_documents(new_chunks)
+            self._bump_index_version()
             
             logger.info("Vector store updated successfully")
             return vector_store
@@ -142,6 +197,27 @@ class EmbeddingManager:
             logger.error(f"Error updating vector store: {e}")
             return None
     
+    def _bump_index_version(self):
+        """Write a new knowledge-base version stamp (invalidates retrieval caches)"""
+        try:
+            with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE), "w", encoding="utf-8") as f:
+                f.write(uuid.uuid4().hex)
+        except OSError as e:
+            logger.error(f"Error writing the index version: {e}")
+    
+    def get_index_version(self) -> Optional[str]:
+        """
+        Return the knowledge-base version stamp
+        
+        Returns:
+            Optional[str]: Version written on the last create/update, or None if unknown
+        """
+        try:
+            with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+    
     def get_vector_store_info(self) -> Dict[str, Any]:
         """
         Return information about the vector store
@@ -164,7 +240,8 @@ class EmbeddingManager:
                 "collection_name": self.collection_name,
                 "persist_directory": self.persist_directory,
                 "embedding_model": self.embedding_model,
-                "document_count": count
+                "document_count": count,
+                "index_version": self.get_index_version()
             }
             
             return info
@@ -3,27 +3,131 @@ Search Module - Responsible for performing semantic searches in the vector store
 """
 
 from langchain_core.documents import Document
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Hashable
+import json
 import logging
 
+from .retrieval_cache import CacheEntries, RetrievalCache, normalize_query
+from .tracing import span, traced
+
 logger = logging.getLogger(__name__)
 
 class SearchEngine:
     """Class to perform semantic searches in the vector store"""
     
-    def __init__(self, vector_store):
+    def __init__(self, 
+                 vector_store,
+                 index_version: Optional[str] = None,
+                 cache_size: int = 512,
+                 cache_ttl: float = 3600.0,
+                 parent_store=None):
         """
         Initialize the search engine
         
         Args:
             vector_store: Loaded vector store (Chroma)
+            index_version (Optional[str]): Knowledge-base version stamp, part of every cache key
+            cache_size (int): Maximum number of cached searches (0 disables the retrieval cache)
+            cache_ttl (float): Time to live of a cached search in seconds
+            parent_store (Optional[ParentDocumentStore]): Parent sections of a parent-child index;
+                when set, the vector store holds child passages and parent_child_search is available
         """
         self.vector_store = vector_store
+        self.index_version = index_version
+        self.cache = RetrievalCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.parent_store = parent_store
+    
+    def _cached_search(self, 
+                       kind: str, 
+                       query: str, 
+                       k: int, 
+                       params: Hashable, 
+                       search: Callable[[], List[Document]]) -> List[Document]:
+        """
+        Run a search through the retrieval cache
+        
+        Args:
+            kind (str): Search method name
+            query (str): Query to be searched
+            k (int): Maximum number of results
+            params (Hashable): Other parameters that change the result (filters, keywords, threshold)
+            search (Callable[[], List[Document]]): Uncached search
+            
+        Returns:
+            List[Document]: List of relevant documents
+        """
+        if self.cache is None:
+            return search()
+        
+        key = (kind, normalize_query(query), k, params, self.index_version)
+        entries = self.cache.get(key)
+        if entries is not None:
+            with span("search.cache_hydrate"):
+                documents = self._hydrate(entries)
+            if documents is not None:
+                return documents
+            # Chunks disappeared from the vector store: recompute
+            self.cache.invalidate(key)
+        
+        documents = search()
+        entries = self._to_cache_entries(documents)
+        if entries:
+            self.cache.put(key, entries)
+        return documents
+    
+    @staticmethod
+    def _to_cache_entries(documents: List[Document]) -> Optional[CacheEntries]:
+        """Ranked (id, distance, similarity) entries, or None if a chunk has no id"""
+        entries = []
+        for doc in documents:
+            if not getattr(doc, "id", None):
+                return None
+            entries.append((doc.id, doc.metadata.get('distance'), doc.metadata.get('similarity')))
+        return tuple(entries)
+    
+    def _hydrate(self, entries: CacheEntries) -> Optional[List[Document]]:
+        """
+        Load cached chunks by id, in ranked order, restoring their scores
+        
+        Returns:
+            Optional[List[Document]]: Documents, or None if any chunk is missing
+        """
+        ids = list(dict.fromkeys(chunk_id for chunk_id, _, _ in entries))
+        try:
+            documents = self.vector_store.get_by_ids(ids)
+        except Exception as e:
+            logger.error(f"Error loading cached chunks: {e}")
+            return None
+        
+        by_id = {doc.id: doc for doc in documents}
+        if len(by_id) != len(ids):
+            return None
+        
+        results = []
+        for chunk_id, distance, similarity in entries:
+            source = by_id[chunk_id]
+            doc = Document(page_content=source.page_content, metadata=dict(source.metadata), id=chunk_id)
+            if distance is not None:
+                doc.metadata['distance'] = distance
+            if similarity is not None:
+                doc.metadata['similarity'] = similarity
+            results.append(doc)
+        return results
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """
+        Return retrieval cache statistics
+        
+        Returns:
+            Dict[str, Any]: Cache statistics (empty if the cache is disabled)
+        """
+        return self.cache.stats() if self.cache else {}
     
     def similarity_search(self, 
                         query: str, 
                         k: int = 4, 
-                        score_threshold: Optional[float] = None) -> List[Document]:
+                        score_threshold: Optional[float] = None,
+                        metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
         """
         Perform similarity search
         
@@ -31,10 +135,29 @@ class SearchEngine:
             query (str): Query to be searched
             k (int): Maximum number of results
             score_threshold (Optional[float]): Optional maximum distance threshold (lower is better)
+            metadata_filter (Optional[Dict[str, Any]]): Optional Chroma filter applied before ranking
+                (see document_metadata.build_metadata_filter)
             
         Returns:
             List[Document]: List of relevant documents
         """
+        return self._cached_search(
+            "similarity", query, k, (score_threshold, self._filter_key(metadata_filter)),
+            lambda: self._similarity_search(query, k, score_threshold, metadata_filter)
+        )
+    
+    @staticmethod
+    def _filter_key(metadata_filter: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Hashable representation of a metadata filter for cache keys"""
+        return json.dumps(metadata_filter, sort_keys=True, default=str) if metadata_filter else None
+    
+    @traced("search.vector")
+    def _similarity_search(self, 
+                           query: str, 
+                           k: int, 
+                           score_threshold: Optional[float],
+                           metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Uncached similarity search"""
         if not self.vector_store:
             logger.error("Vector store not available for search")
             return []
@@ -42,11 +165,18 @@ class SearchEngine:
         try:
             logger.info(f"Performing search for: '{query}'")
             
-            # Perform similarity search;
-            results = self.vector_store.similarity_search_with_score(
-                query, 
-                k=k
-            )
+            # Perform similarity search (pre-filtered by metadata when requested)
+            if metadata_filter:
+                results = self.vector_store.similarity_search_with_score(
+                    query, 
+                    k=k,
+                    filter=metadata_filter
+                )
+            else:
+                results = self.vector_store.similarity_search_with_score(
+                    query, 
+                    k=k
+                )
             
             # Sort by ascending distance
             results = sorted(results, key=lambda pair: pair[1])
@@ -88,12 +218,16 @@ class SearchEngine:
         try:
             logger.info(f"Searching by metadata: {metadata_filter}")
             
-            # Search with metadata filters
-            results = self.vector_store.similarity_search(
-                "",  # Empty query for metadata-only search
-                k=k,
-                filter=metadata_filter
+            # Metadata-only lookup: no query embedding or ranking needed
+            data = self.vector_store.get(
+                where=metadata_filter,
+                limit=k,
+                include=["documents", "metadatas"]
             )
+            results = [
+                Document(page_content=content or "", metadata=metadata or {}, id=chunk_id)
+                for chunk_id, content, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+            ]
             
             logger.info(f"Found {len(results)} documents with the specified filters")
             return results
@@ -119,6 +253,17 @@ class SearchEngine:
         Returns:
             List[Document]: List of relevant documents
         """
+        return self._cached_search(
+            "hybrid", query, k, (self._filter_key(metadata_filter), score_threshold),
+            lambda: self._hybrid_search(query, metadata_filter, k, score_threshold)
+        )
+    
+    def _hybrid_search(self, 
+                       query: str, 
+                       metadata_filter: Optional[Dict[str, Any]], 
+                       k: int, 
+                       score_threshold: Optional[float]) -> List[Document]:
+        """Uncached hybrid search (similarity + metadata)"""
         if not self.vector_store:
             logger.error("Vector store not available for search")
             return []
@@ -160,7 +305,8 @@ class SearchEngine:
                                   query: str, 
                                   keywords: List[str] = None,
                                   k: int = 16, 
-                                  score_threshold: Optional[float] = None) -> List[Document]:
+                                  score_threshold: Optional[float] = None,
+                                  metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
         """
         Perform hybrid search combining semantic and keyword search
         
@@ -169,10 +315,22 @@ class SearchEngine:
             keywords (List[str]): Additional keywords to search for
             k (int): Maximum number of results
             score_threshold (Optional[float]): Optional maximum distance threshold (ignored for hybrid search)
+            metadata_filter (Optional[Dict[str, Any]]): Optional Chroma filter applied to every sub-search
             
         Returns:
             List[Document]: List of relevant documents
         """
+        return self._cached_search(
+            "hybrid_keywords", query, k, (tuple(keywords or ()), self._filter_key(metadata_filter)),
+            lambda: self._hybrid_search_with_keywords(query, keywords, k, metadata_filter)
+        )
+    
+    def _hybrid_search_with_keywords(self, 
+                                     query: str, 
+                                     keywords: Optional[List[str]], 
+                                     k: int,
+                                     metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Uncached hybrid search combining semantic and keyword search"""
         if not self.vector_store:
             logger.error("Vector store not available for search")
             return []
@@ -181,36 +339,39 @@ class SearchEngine:
             logger.info(f"Performing hybrid search for: '{query}' with keywords: {keywords}")
             
             # First, do semantic search without threshold filtering
-            semantic_results = self.similarity_search(query, k=k//2, score_threshold=None)
+            with span("search.semantic"):
+                semantic_results = self.similarity_search(query, k=k//2, score_threshold=None, metadata_filter=metadata_filter)
             
             # Then, do keyword search if keywords provided (also without threshold filtering)
             keyword_results = []
             if keywords:
-                for keyword in keywords:
-                    keyword_docs = self.similarity_search(keyword, k=k//4, score_threshold=None)
-                    keyword_results.extend(keyword_docs)
+                with span("search.keywords"):
+                    for keyword in keywords:
+                        keyword_docs = self.similarity_search(keyword, k=k//4, score_threshold=None, metadata_filter=metadata_filter)
+                        keyword_results.extend(keyword_docs)
             
             # Combine all results
             all_results = semantic_results + keyword_results
             
-            # Less aggressive deduplication - only remove exact duplicates
-            seen_contents = set()
-            unique_results = []
-            for doc in all_results:
-                # Use a more lenient hash to avoid removing similar but different chunks
-                content_hash = hash(doc.page_content[:50])  # Use first 50 chars as hash
-                if content_hash not in seen_contents:
-                    seen_contents.add(content_hash)
-                    unique_results.append(doc)
-            
-            # Score chunks based on relevance to user query
-            scored_results = []
-            for doc in unique_results:
-                score = self._calculate_chunk_relevance_score(doc, query, keywords)
-                scored_results.append((doc, score))
-            
-            # Sort by relevance score (higher is better)
-            scored_results.sort(key=lambda x: x[1], reverse=True)
+            with span("search.rescore"):
+                # Less aggressive deduplication - only remove exact duplicates
+                seen_contents = set()
+                unique_results = []
+                for doc in all_results:
+                    # Use a more lenient hash to avoid removing similar but different chunks
+                    content_hash = hash(doc.page_content[:50])  # Use first 50 chars as hash
+                    if content_hash not in seen_contents:
+                        seen_contents.add(content_hash)
+                        unique_results.append(doc)
+                
+                # Score chunks based on relevance to user query
+                scored_results = []
+                for doc in unique_results:
+                    score = self._calculate_chunk_relevance_score(doc, query, keywords)
+                    scored_results.append((doc, score))
+                
+                # Sort by relevance score (higher is better)
+                scored_results.sort(key=lambda x: x[1], reverse=True)
             
             # Take top k results
             final_results = [doc for doc, score in scored_results[:k]]
@@ -222,6 +383,63 @@ class SearchEngine:
             logger.error(f"Error in hybrid search: {e}")
             return []
     
+    def parent_child_search(self, 
+                            query: str, 
+                            k: int = 4, 
+                            child_k: int = 24,
+                            keywords: Optional[List[str]] = None,
+                            metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search the child passages and return their deduplicated parent sections
+        
+        Args:
+            query (str): Query to be searched
+            k (int): Maximum number of parent sections
+            child_k (int): Number of child passages to rank
+            keywords (Optional[List[str]]): Keywords for a hybrid child search
+            metadata_filter (Optional[Dict[str, Any]]): Optional Chroma filter applied to the children
+            
+        Returns:
+            List[Document]: Parent sections ranked by their best child, with the child's
+                distance/similarity and the number of matched children
+        """
+        if keywords:
+            children = self.hybrid_search_with_keywords(query, keywords=keywords, k=child_k, metadata_filter=metadata_filter)
+        else:
+            children = self.similarity_search(query, k=child_k, metadata_filter=metadata_filter)
+        
+        if self.parent_store is None:
+            logger.warning("Parent-child search without a parent store, returning the matched passages")
+            return children[:k]
+        
+        with span("search.parents"):
+            ranked: Dict[str, Dict[str, Any]] = {}
+            orphans = []
+            for child in children:
+                parent_id = child.metadata.get('parent_id')
+                if not parent_id:
+                    orphans.append(child)
+                    continue
+                if parent_id not in ranked:
+                    if len(ranked) >= k:
+                        continue
+                    ranked[parent_id] = {
+                        "distance": child.metadata.get('distance'),
+                        "similarity": child.metadata.get('similarity'),
+                        "matched_children": 0
+                    }
+                ranked[parent_id]["matched_children"] += 1
+            
+            parents = self.parent_store.get(list(ranked))
+            for parent in parents:
+                info = ranked[parent.id]
+                for key, value in info.items():
+                    if value is not None:
+                        parent.metadata[key] = value
+        
+        logger.info(f"Expanded {len(children)} child passages into {len(parents)} parent sections")
+        return (parents + orphans)[:k]
+    
     def _calculate_chunk_relevance_score(self, doc: Document, query: str, keywords: List[str] = None) -> float:
         """
         Calculate a relevance score for a chunk based on multiple factors
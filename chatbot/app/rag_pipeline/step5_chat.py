@@ -2,20 +2,85 @@
 Chat Module - Responsible for integrating search with AI model to generate responses
 """
 
-from openai import OpenAI
 from langchain_core.documents import Document
-from typing import List, Dict, Any, Optional
-import os
+from typing import List, Dict, Any, Optional, Tuple
+import time
 import logging
 import unicodedata
 from dotenv import load_dotenv
 import re
 
+from .tracing import span, start_trace
+from .debug_trace import trace_payload
+from .document_metadata import build_metadata_filter
+from .llm_gateway import LLMGateway, get_llm_gateway
+from .prompts import (
+    CHALLENGE_SYSTEM_PROMPT,
+    CHALLENGE_USER_TEMPLATE,
+    CHAT_SYSTEM_PROMPT,
+    CHAT_USER_TEMPLATE,
+    QUIZ_SYSTEM_PROMPT,
+    QUIZ_USER_TEMPLATE
+)
+from .schemas import (
+    CHALLENGE_RESPONSE_FORMAT,
+    QUIZ_RESPONSE_FORMAT,
+    parse_structured_output,
+    validate_challenge_set,
+    validate_quiz
+)
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+def extract_keywords(query: str) -> List[str]:
+    """
+    Extract relevant keywords from the query for hybrid search
+    
+    Args:
+        query (str): User's question
+        
+    Returns:
+        List[str]: List of relevant keywords with case variations
+    """
+    
+    # Remove punctuation and split into words
+    words = re.findall(r'\b\w+\b', query.lower())
+    
+    # Filter out common stop words and very short words
+    stop_words = {
+        'a', 'o', 'e', 'de', 'da', 'do', 'em', 'um', 'uma', 'com', 'para', 'por', 'se', 'que', 
+        'não', 'na', 'no', 'meu', 'minha', 'me', 'eu', 'você', 'seu', 'sua', 'está', 'estou',
+        'qual', 'quem', 'onde', 'quando', 'como', 'porque', 'qual', 'meu', 'minha',
+        'se', 'está', 'localizado', 'na', 'no', 'em', 'do', 'da', 'de', 'com', 'para', 'por'
+    }
+    
+    # Keep meaningful words (longer than 2 characters and not stop words)
+    meaningful_words = [word for word in words if len(word) > 2 and word not in stop_words]
+    
+    # Generate case variations for each meaningful word
+    keywords = []
+    for word in meaningful_words:
+        # Add original word and common case variations
+        variations = [
+            word,  # original lowercase
+            word.capitalize(),  # first letter uppercase
+            word.upper(),  # all uppercase
+        ]
+        keywords.extend(variations)
+    
+    # Remove duplicates while preserving order
+    unique_keywords = []
+    seen = set()
+    for keyword in keywords:
+        if keyword not in seen:
+            seen.add(keyword)
+            unique_keywords.append(keyword)
+    
+    return unique_keywords
+
 class RAGChatbot:
     """Class responsible for integrating RAG with AI model for chat"""
     
@@ -23,7 +88,9 @@ class RAGChatbot:
                  search_engine,
                  model: str = "gpt-4o-mini",
                  max_tokens: int = 1000,
-                 temperature: float = 0.7):
+                 temperature: float = 0.7,
+                 gateway: Optional[LLMGateway] = None,
+                 max_parent_sections: int = 6):
         """
         Initialize the RAG chatbot
         
@@ -32,18 +99,19 @@ class RAGChatbot:
             model (str): AI model to be used
             max_tokens (int): Maximum number of tokens in the response
             temperature (float): Temperature for response generation
+            gateway (Optional[LLMGateway]): LLM backend (defaults to the shared gateway, see LLM_BACKEND)
+            max_parent_sections (int): Parent sections sent as context when the search engine
+                has a parent-child index (the `k` of each flow is then the number of child passages)
         """
         self.search_engine = search_engine
+        self.max_parent_sections = max_parent_sections
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
         
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        
-        self.client = OpenAI(api_key=api_key)
+        # Shared gateway: pooled connections, retries, deadlines and circuit breaker
+        self.gateway = gateway or get_llm_gateway()
+        self.client = self.gateway.client
         logger.info(f"RAG chatbot initialized with model: {model}")
     
     def _create_context_from_documents(self, documents: List[Document]) -> str:
@@ -60,7 +128,6 @@ class RAGChatbot:
             return ""
         
         context_parts = []
-        agreste_chunks = []
         
         for i, doc in enumerate(documents):
             # Add document information
@@ -71,29 +138,9 @@ class RAGChatbot:
             context_parts.append(f"Source: {source}")
             context_parts.append(f"Content: {doc.page_content}")
             context_parts.append("-" * 50)
-            
-            # Check if this chunk contains "agreste"
-            if "agreste" in doc.page_content.lower():
-                agreste_chunks.append({
-                    "index": i+1,
-                    "source": source,
-                    "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "similarity": similarity
-                })
         
         context = "\n".join(context_parts)
         
-        # Log agreste chunks if found
-        if agreste_chunks:
-            logger.info(f"Found {len(agreste_chunks)} chunks containing 'agreste':")
-            for chunk in agreste_chunks:
-                logger.info(f"  Chunk {chunk['index']} (similarity: {chunk['similarity']}): {chunk['content']}")
-        else:
-            logger.warning("No chunks containing 'agreste' found in the retrieved documents")
-        
-        # Temporary logging for debugging (increased to 2000 chars)
-        logger.info(f"Context being sent to GPT (first 2000 chars): {context[:2000]}...")
-        
         return context
     
     def _create_system_prompt(self) -> str:
@@ -101,29 +148,9 @@ class RAGChatbot:
         Create the system prompt
         
         Returns:
-            str: System prompt
+            str: System prompt (static, shared by every request)
         """
-        return """Você é o "Agente Compet - ICMS", um assistente de IA ultra especializado e rigoroso em legislação tributária da SEFAZ-PE.
-
-# REGRAS DE CONDUTA INVIOLÁVEIS
-
-1. **Regra de Ouro: Fidelidade Absoluta às Fontes.** Suas respostas devem ser 100% derivadas dos documentos fornecidos no contexto. Você NUNCA deve usar seu conhecimento prévio ou informações externas.
-
-2. **Busca Ativa e Interpretação Correta:** Analise cuidadosamente todo o contexto fornecido para encontrar a informação solicitada. Considere que:
-   - Informações negativas (como "não se aplica", "não é permitido", "não há") SÃO respostas válidas
-   - Se o documento diz que algo "não se aplica" ou "não é permitido", isso é uma resposta direta à pergunta
-   - Não confunda "não encontrei a informação" com "a informação diz que não é permitido"
-
-3. **Resposta Direta:** Se encontrar informação que responde diretamente à pergunta (mesmo que seja uma resposta negativa), forneça a resposta completa e precisa.
-
-4. **Recusa Apenas Quando Realmente Não Encontrou:** Só responda "A informação solicitada não foi encontrada na documentação fornecida" quando realmente não houver nenhuma informação relevante nos documentos.
-
-5. **Citação de Fontes:** Ao formular uma resposta, você deve, sempre que possível, indicar qual documento forneceu a informação. Exemplo: "De acordo com o documento 'Decreto 44.650.2017 - Anexo 33.pdf'..."
-
-6. **Clareza e Acessibilidade:** Mantenha um tom profissional, claro e direto. Explique conceitos tributários complexos de forma acessível, mas evite simplificar excessivamente.
-
-# OBJETIVO FINAL
-Seu propósito é atuar como uma ferramenta de consulta precisa sobre a legislação da SEFAZ-PE. A exatidão e a aderência estrita aos documentos fornecidos são mais importantes do que fornecer uma resposta a qualquer custo."""
+        return CHAT_SYSTEM_PROMPT
     
     def _create_user_prompt(self, query: str, context: str) -> str:
         """
@@ -134,17 +161,9 @@ Seu propósito é atuar como uma ferramenta de consulta precisa sobre a legisla
             context (str): Context of the documents
             
         Returns:
-            str: User prompt
+            str: User prompt (static instructions, then context, then question)
         """
-        return f"""Pergunta do usuário: {query}
-
-Contexto dos documentos:
-{context}
-
-Analise cuidadosamente o contexto fornecido e responda à pergunta do usuário baseando-se APENAS nas informações contidas nos documentos acima. 
-Se encontrar a informação, forneça uma resposta completa e precisa, citando a fonte.
-Se a informação não estiver presente nos documentos, responda: 'A informação solicitada não foi encontrada na documentação fornecida.'"""
-    
+        return CHAT_USER_TEMPLATE.render(context=context, query=query)
 
     def _create_system_prompt_for_quiz(self) -> str:
         """
@@ -153,31 +172,7 @@ Se a informação não estiver presente nos documentos, responda: 'A informaçã
         Returns:
             str: The system prompt.
         """
-        return """Você é um tutor e elaborador de materiais de estudo especializado em legislação tributária e assuntos da SEFAZ-PE.
-        
-Sua responsabilidade é criar uma questão de múltipla escolha (com 5 alternativas: A, B, C, D, E) que teste o conhecimento do usuário sobre o contexto fornecido.
-
-REGRAS IMPORTANTES:
-1. Crie a questão baseando-se ESTRITAMENTE no contexto de documentos fornecido. Não use nenhum conhecimento externo.
-2. A pergunta deve ser clara, relevante e desafiadora.
-3. Deve haver apenas UMA alternativa correta.
-4. As quatro alternativas incorretas (distratores) devem ser plausíveis, mas erradas de acordo com o contexto.
-5. Sua resposta final deve ser APENAS um objeto JSON, sem nenhum texto adicional antes ou depois.
-6. A questão deve testar conhecimento específico sobre legislação tributária, ICMS, incentivos fiscais ou assuntos da SEFAZ-PE.
-
-O formato do JSON deve ser exatamente o seguinte:
-{
-  "question": "O texto da pergunta que você elaborou.",
-  "options": {
-    "A": "Texto da alternativa A.",
-    "B": "Texto da alternativa B.",
-    "C": "Texto da alternativa C.",
-    "D": "Texto da alternativa D.",
-    "E": "Texto da alternativa E."
-  },
-  "answer": "A",
-  "explanation": "Breve explicação de por que a resposta está correta, baseada no contexto fornecido."
-}"""
+        return QUIZ_SYSTEM_PROMPT
 
     def _create_user_prompt_for_quiz(self, topic: str, context: str) -> str:
         """
@@ -190,14 +185,7 @@ O formato do JSON deve ser exatamente o seguinte:
         Returns:
             str: The user prompt.
         """
-        return f"""Tópico Sugerido para a Questão: "{topic}"
-
-Contexto dos Documentos:
----
-{context}
----
-
-Por favor, com base APENAS no contexto acima, crie uma questão de múltipla escolha que avalie o entendimento sobre o tópico sugerido. Siga estritamente as regras e o formato JSON definidos nas suas instruções de sistema."""
+        return QUIZ_USER_TEMPLATE.render(context=context, topic=topic)
 
     def _create_system_prompt_for_challenge(self) -> str:
         """
@@ -206,68 +194,7 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
         Returns:
             str: The system prompt.
         """
-        return """Você é um especialista em legislação tributária da SEFAZ-PE e um criador de conteúdo educacional. Sua tarefa é criar um conjunto de desafios e questões de contextualização com base estritamente em um contexto de documentos fornecido.
-
-# REGRAS GERAIS E INVIOLÁVEIS
-1.  **FIDELIDADE ABSOLUTA AO CONTEXTO:** Todo o conteúdo gerado (cenários, respostas, justificativas, questões, alternativas) deve ser 100% derivado dos documentos fornecidos. NÃO utilize nenhum conhecimento externo.
-2.  **SAÍDA EM JSON PURO:** Sua resposta final deve ser APENAS um objeto JSON, sem nenhum texto, markdown ou explicação adicional antes ou depois.
-3.  **SEMPRE GERE O CONTEÚDO COMPLETO:** Você deve gerar 2 desafios e 5 questões de contextualização.
-
-# ESTRUTURA DE SAÍDA JSON OBRIGATÓRIA
-Sua saída DEVE seguir exatamente esta estrutura:
-{
-  "challenges": [
-    {
-      "challenge": "[Aqui vai o texto completo do desafio contextualizado. Deve ter aproximadamente 1000 caracteres.]",
-      "challenge_answer": "[Se o Tipo de Desafio for 'Discursiva', aqui vai a resposta discursiva e completa. Se for 'Cálculo', aqui vai APENAS o resultado numérico final (ex: '1500.00').]",
-      "challenge_justification": "[Aqui vai a justificativa detalhada para a resposta, explicando o raciocínio ou o cálculo passo a passo. Deve ter aproximadamente 500 caracteres.]"
-    },
-    {
-      "challenge": "[Segundo desafio...]",
-      "challenge_answer": "[Resposta do segundo desafio...]",
-      "challenge_justification": "[Justificativa do segundo desafio...]"
-    }
-  ],
-  "questions": [
-    {
-      "question": "[Texto da pergunta de múltipla escolha 1.]",
-      "options": {
-        "A": "[Alternativa A]",
-        "B": "[Alternativa B]",
-        "C": "[Alternativa C]",
-        "D": "[Alternativa D]",
-        "E": "[Alternativa E]"
-      },
-      "correct_answer": "[Letra da alternativa correta, ex: 'A']",
-      "question_justification": "[Justificativa para a resposta da questão 1.]"
-    },
-    {
-      "question": "[Texto da pergunta de múltipla escolha 2.]",
-      "options": { "A": "...", "B": "...", "C": "...", "D": "...", "E": "..." },
-      "correct_answer": "[Letra]",
-      "question_justification": "[Justificativa...]"
-    },
-    {
-      "question": "[Texto da pergunta de múltipla escolha 3.]",
-      "options": { "A": "...", "B": "...", "C": "...", "D": "...", "E": "..." },
-      "correct_answer": "[Letra]",
-      "question_justification": "[Justificativa...]"
-    },
-    {
-      "question": "[Texto da pergunta de múltipla escolha 4.]",
-      "options": { "A": "...", "B": "...", "C": "...", "D": "...", "E": "..." },
-      "correct_answer": "[Letra]",
-      "question_justification": "[Justificativa...]"
-    },
-    {
-      "question": "[Texto da pergunta de múltipla escolha 5.]",
-      "options": { "A": "...", "B": "...", "C": "...", "D": "...", "E": "..." },
-      "correct_answer": "[Letra]",
-      "question_justification": "[Justificativa...]"
-    }
-  ]
-}
-"""
+        return CHALLENGE_SYSTEM_PROMPT
 
     def _create_user_prompt_for_challenge(self, topic: str, difficulty: str, type: str, context: str) -> str:
         """
@@ -282,21 +209,62 @@ Sua saída DEVE seguir exatamente esta estrutura:
         Returns:
             str: The user prompt.
         """
-        return f"""Com base ESTRITAMENTE no contexto de documentos fornecido abaixo, gere o conjunto completo de desafios e questões de contextualização.
-
-# PARÂMETROS PARA GERAÇÃO
-- Tópico Principal: "{topic}"
-- Dificuldade dos Desafios: "{difficulty}"
-- Tipo dos Desafios: "{type}"
-
-# CONTEXTO DOS DOCUMENTOS
----
-{context}
----
-
-Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas instruções de sistema. Se não encontrar informações suficientes sobre o tema '{topic}' no contexto fornecido, você deve indicar isso na sua resposta final, mas ainda assim tentar gerar o que for possível com a informação disponível.
-"""
-
+        return CHALLENGE_USER_TEMPLATE.render(context=context, topic=topic, difficulty=difficulty, type=type)
+
+    def _create_completion(self,
+                           endpoint: str,
+                           system_prompt: str,
+                           user_prompt: str,
+                           context: str,
+                           **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Call the chat completion API and collect the usage of the call
+        
+        Args:
+            endpoint (str): Name of the feature making the call (chat, quiz, challenge)
+            system_prompt (str): System prompt
+            user_prompt (str): User prompt
+            context (str): Retrieved context embedded in the user prompt
+            **kwargs: Extra completion parameters (override the defaults)
+            
+        Returns:
+            Tuple[Any, Dict[str, Any]]: API response and usage record
+        """
+        params = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
+        params.update(kwargs)
+        
+        start = time.perf_counter()
+        response = self.gateway.chat_completion(**params)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        
+        usage = getattr(response, "usage", None)
+        # Prompt tokens served from the provider's prompt cache (static prefix hits)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        usage_record = {
+            "endpoint": endpoint,
+            "model": getattr(response, "model", None) or params["model"],
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "cached_tokens": getattr(prompt_details, "cached_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            "latency_ms": round(latency_ms, 3),
+            "context_chars": len(context)
+        }
+        logger.info(
+            f"LLM usage ({endpoint}): {usage_record['prompt_tokens']} prompt "
+            f"({usage_record['cached_tokens']} cached) + "
+            f"{usage_record['completion_tokens']} completion tokens in {usage_record['latency_ms']:.0f} ms"
+        )
+        return response, usage_record
+    
     def _extract_keywords(self, query: str) -> List[str]:
         """
         Extract relevant keywords from the query for hybrid search
@@ -307,46 +275,69 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
         Returns:
             List[str]: List of relevant keywords with case variations
         """
+        return extract_keywords(query)
+
+    def _search_documents(self, 
+                          query: str, 
+                          keywords: List[str], 
+                          k: int, 
+                          score_threshold: Optional[float], 
+                          program: Optional[str] = None) -> List[Document]:
+        """
+        Retrieve the documents of a query, restricted to a program when given
         
-        # Remove punctuation and split into words
-        words = re.findall(r'\b\w+\b', query.lower())
+        Falls back to the whole knowledge base when the program has no indexed
+        documents, so an unknown program never leaves the model without context.
         
-        # Filter out common stop words and very short words
-        stop_words = {
-            'a', 'o', 'e', 'de', 'da', 'do', 'em', 'um', 'uma', 'com', 'para', 'por', 'se', 'que', 
-            'não', 'na', 'no', 'meu', 'minha', 'me', 'eu', 'você', 'seu', 'sua', 'está', 'estou',
-            'qual', 'quem', 'onde', 'quando', 'como', 'porque', 'qual', 'meu', 'minha',
-            'se', 'está', 'localizado', 'na', 'no', 'em', 'do', 'da', 'de', 'com', 'para', 'por'
-        }
+        Args:
+            query (str): Normalized query
+            keywords (List[str]): Keywords for the hybrid search
+            k (int): Number of documents to search
+            score_threshold (Optional[float]): Optional maximum distance threshold
+            program (Optional[str]): Program (e.g. "PROIND") to pre-filter the search
+            
+        Returns:
+            List[Document]: Relevant documents
+        """
+        metadata_filter = build_metadata_filter(program)
+        
+        def search(where):
+            if getattr(self.search_engine, 'parent_store', None) is not None:
+                # Parent-child index: k child passages expand into a few whole sections
+                return self.search_engine.parent_child_search(
+                    query,
+                    k=self.max_parent_sections,
+                    child_k=k,
+                    keywords=keywords,
+                    metadata_filter=where
+                )
+            if hasattr(self.search_engine, 'hybrid_search_with_keywords'):
+                return self.search_engine.hybrid_search_with_keywords(
+                    query,
+                    keywords=keywords,
+                    k=k,
+                    score_threshold=score_threshold,
+                    metadata_filter=where
+                )
+            # Fallback to regular search
+            return self.search_engine.similarity_search(
+                query,
+                k=k,
+                score_threshold=score_threshold,
+                metadata_filter=where
+            )
         
-        # Keep meaningful words (longer than 2 characters and not stop words)
-        meaningful_words = [word for word in words if len(word) > 2 and word not in stop_words]
-        
-        # Generate case variations for each meaningful word
-        keywords = []
-        for word in meaningful_words:
-            # Add original word and common case variations
-            variations = [
-                word,  # original lowercase
-                word.capitalize(),  # first letter uppercase
-                word.upper(),  # all uppercase
-            ]
-            keywords.extend(variations)
-        
-        # Remove duplicates while preserving order
-        unique_keywords = []
-        seen = set()
-        for keyword in keywords:
-            if keyword not in seen:
-                seen.add(keyword)
-                unique_keywords.append(keyword)
-        
-        return unique_keywords
+        documents = search(metadata_filter)
+        if not documents and metadata_filter:
+            logger.warning(f"No documents indexed for program '{program}', searching the whole knowledge base")
+            documents = search(None)
+        return documents
 
     def chat(self, 
              query: str, 
              k: int = 24, 
-             score_threshold: Optional[float] = None) -> Dict[str, Any]:
+             score_threshold: Optional[float] = None,
+             program: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user's question and return a response
         
@@ -354,10 +345,19 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
             query (str): User's question
             k (int): Number of documents to search
             score_threshold (Optional[float]): Optional maximum distance threshold for filtering (lower is better)
+            program (Optional[str]): Program being studied; restricts the search to its documents
             
         Returns:
-            Dict[str, Any]: Response with detailed information
+            Dict[str, Any]: Response with detailed information and per-stage timings
         """
+        with start_trace() as trace:
+            with span("chat.total"):
+                result = self._chat(query, k, score_threshold, program)
+            result["timings"] = trace.as_dict()
+        return result
+
+    def _chat(self, query: str, k: int, score_threshold: Optional[float], program: Optional[str] = None) -> Dict[str, Any]:
+        """Run the chat stages (keywords, search, context, LLM call) for a question"""
         try:
             # Normalize the query
             normalized_query = unicodedata.normalize('NFC', query)
@@ -372,24 +372,13 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
             # )
 
             # Extract keywords for hybrid search
-            keywords = self._extract_keywords(normalized_query)
-            logger.info(f"Extracted keywords: {keywords}")
+            with span("chat.keywords"):
+                keywords = self._extract_keywords(normalized_query)
+            logger.debug("Extracted keywords: %s", keywords)
             
             # Search relevant documents using hybrid search
-            if hasattr(self.search_engine, 'hybrid_search_with_keywords'):
-                relevant_docs = self.search_engine.hybrid_search_with_keywords(
-                    normalized_query, 
-                    keywords=keywords,
-                    k=k, 
-                    score_threshold=score_threshold
-                )
-            else:
-                # Fallback to regular search
-                relevant_docs = self.search_engine.similarity_search(
-                    normalized_query, 
-                    k=k, 
-                    score_threshold=score_threshold
-                )
+            with span("chat.search"):
+                relevant_docs = self._search_documents(normalized_query, keywords, k, score_threshold, program)
             
             if not relevant_docs:
                 logger.warning("No relevant documents found")
@@ -400,22 +389,16 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                 }
             
             # Create context from the documents
-            context = self._create_context_from_documents(relevant_docs)
-            
-            # Create prompts
-            system_prompt = self._create_system_prompt()
-            user_prompt = self._create_user_prompt(normalized_query, context)
+            with span("chat.context"):
+                context = self._create_context_from_documents(relevant_docs)
+                
+                # Create prompts
+                system_prompt = self._create_system_prompt()
+                user_prompt = self._create_user_prompt(normalized_query, context)
             
             # Generate response
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
-            )
+            with span("chat.llm"):
+                response, usage = self._create_completion("chat", system_prompt, user_prompt, context)
             
             # Extract response
             if response.choices and response.choices[0].message:
@@ -429,6 +412,8 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                 source_info = {
                     "source": doc.metadata.get('source', 'Unknown source'),
                     "file_name": doc.metadata.get('file_name', 'N/A'),
+                    "program": doc.metadata.get('program'),
+                    "article": doc.metadata.get('article'),
                     "distance": doc.metadata.get('distance', 'N/A'),
                     "similarity": doc.metadata.get('similarity', 'N/A')
                 }
@@ -451,9 +436,23 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                 "sources": sources,
                 "confidence": confidence,
                 "avg_score": avg_similarity,  # keep key name for compatibility; now represents similarity in [0,1]
-                "documents_used": len(relevant_docs)
+                "documents_used": len(relevant_docs),
+                "usage": usage
             }
             
+            # Sampled payload trace (no-op unless RAG_DEBUG_TRACE is enabled)
+            trace_payload(
+                "chat.request",
+                query=normalized_query,
+                keywords=keywords,
+                chunks=lambda: [
+                    {"source": doc.metadata.get('source'), "similarity": doc.metadata.get('similarity')}
+                    for doc in relevant_docs
+                ],
+                context=context,
+                response=ai_response
+            )
+            
             logger.info(f"Response generated with confidence: {confidence}")
             return result
             
@@ -513,14 +512,12 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
             user_prompt = self._create_user_prompt_for_quiz(normalized_topic, context)
             
             # Generate question
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            response, usage = self._create_completion(
+                "quiz",
+                system_prompt,
+                user_prompt,
+                context,
+                response_format=QUIZ_RESPONSE_FORMAT
             )
             
             # Extract response
@@ -536,32 +533,10 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                     "sources": []
                 }
             
-            # Parse JSON response
-            import json
-            try:
-                question_data = json.loads(ai_response)
-                
-                # Validate required fields
-                required_fields = ["question", "options", "answer"]
-                for field in required_fields:
-                    if field not in question_data:
-                        raise ValueError(f"Campo obrigatório '{field}' não encontrado na resposta")
-                
-                # Validate options
-                if not isinstance(question_data["options"], dict):
-                    raise ValueError("Campo 'options' deve ser um objeto")
-                
-                expected_options = ["A", "B", "C", "D", "E"]
-                for option in expected_options:
-                    if option not in question_data["options"]:
-                        raise ValueError(f"Alternativa '{option}' não encontrada")
-                
-                # Validate answer
-                if question_data["answer"] not in expected_options:
-                    raise ValueError(f"Resposta '{question_data['answer']}' não é uma alternativa válida")
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing JSON response: {e}")
+            # Parse (repairing near-valid JSON) and validate against the quiz schema
+            question_data, errors = parse_structured_output(ai_response, validate_quiz)
+            if question_data is None:
+                logger.error(f"Error parsing JSON response: {errors[0]}")
                 return {
                     "error": "Erro ao processar a resposta do modelo de IA.",
                     "raw_response": ai_response,
@@ -569,18 +544,20 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                     "options": None,
                     "answer": None,
                     "explanation": None,
-                    "sources": []
+                    "sources": [],
+                    "usage": usage
                 }
-            except ValueError as e:
-                logger.error(f"Error validating question data: {e}")
+            if errors:
+                logger.error(f"Error validating question data: {errors}")
                 return {
-                    "error": f"Erro na validação dos dados da questão: {str(e)}",
+                    "error": f"Erro na validação dos dados da questão: {'; '.join(errors)}",
                     "raw_response": ai_response,
                     "question": None,
                     "options": None,
                     "answer": None,
                     "explanation": None,
-                    "sources": []
+                    "sources": [],
+                    "usage": usage
                 }
             
             # Prepare source information
@@ -606,7 +583,8 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                 "confidence": confidence,
                 "avg_score": avg_score,
                 "documents_used": len(relevant_docs),
-                "topic": normalized_topic
+                "topic": normalized_topic,
+                "usage": usage
             }
             
             logger.info(f"Multiple choice question generated with confidence: {confidence}")
@@ -628,66 +606,74 @@ Lembre-se de seguir TODAS as regras e a estrutura JSON exata definida em suas in
                                           difficulty: str, 
                                           type: str, 
                                           k: int = 10, 
-                                          score_threshold: float = 0.7) -> Dict[str, Any]:
+                                          score_threshold: float = 0.7,
+                                          program: Optional[str] = None) -> Dict[str, Any]:
         """
         Generates a set of challenges and questions of contextualization based on the topic.
+        The search is restricted to the documents of `program` when given.
         """
+        with start_trace() as trace:
+            with span("challenge.total"):
+                result = self._generate_challenges_and_questions(topic, difficulty, type, k, score_threshold, program)
+            result["timings"] = trace.as_dict()
+        return result
+
+    def _generate_challenges_and_questions(self,
+                                           topic: str,
+                                           difficulty: str,
+                                           type: str,
+                                           k: int,
+                                           score_threshold: float,
+                                           program: Optional[str] = None) -> Dict[str, Any]:
+        """Run the challenge generation stages (keywords, search, context, LLM call, parsing)"""
         try:
             normalized_topic = unicodedata.normalize('NFC', topic)
             logger.info(f"Generating challenges for the topic: '{normalized_topic}' with difficulty '{difficulty}' and type '{type}'")
 
             # Use hybrid search for better accuracy with specific terms
-            keywords = self._extract_keywords(normalized_topic)
-            logger.info(f"Extracted keywords for challenge generation: {keywords}")
+            with span("challenge.keywords"):
+                keywords = self._extract_keywords(normalized_topic)
+            logger.debug("Extracted keywords for challenge generation: %s", keywords)
 
-            if hasattr(self.search_engine, 'hybrid_search_with_keywords'):
-                relevant_docs = self.search_engine.hybrid_search_with_keywords(
-                    normalized_topic,
-                    keywords=keywords,
-                    k=k,
-                    score_threshold=score_threshold
-                )
-            else:
-                # Fallback to regular search
-                relevant_docs = self.search_engine.similarity_search(
-                    normalized_topic,
-                    k=k,
-                    score_threshold=score_threshold
-                )
+            with span("challenge.search"):
+                relevant_docs = self._search_documents(normalized_topic, keywords, k, score_threshold, program)
 
             if not relevant_docs:
                 logger.warning("No relevant document found for challenge generation.")
                 return {"error": f"I couldn't find enough information about the topic '{topic}' in the provided documents."}
 
-            context = self._create_context_from_documents(relevant_docs)
-            
-            system_prompt = self._create_system_prompt_for_challenge()
-            user_prompt = self._create_user_prompt_for_challenge(normalized_topic, difficulty, type, context)
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=4096,
-                temperature=self.temperature,
-                response_format={"type": "json_object"}
-            )
+            with span("challenge.context"):
+                context = self._create_context_from_documents(relevant_docs)
+                
+                system_prompt = self._create_system_prompt_for_challenge()
+                user_prompt = self._create_user_prompt_for_challenge(normalized_topic, difficulty, type, context)
+
+            with span("challenge.llm"):
+                response, usage = self._create_completion(
+                    "challenge",
+                    system_prompt,
+                    user_prompt,
+                    context,
+                    max_tokens=4096,
+                    response_format=CHALLENGE_RESPONSE_FORMAT
+                )
 
             ai_response = response.choices[0].message.content.strip() if response.choices and response.choices[0].message else "{}"
             
-            import json
-            try:
-                challenge_data = json.loads(ai_response)
-            except json.JSONDecodeError as e:
-                logger.error(f"Error  Erro ao decodificar a resposta JSON: {e}")
-                return {"error": "Erro ao processar a resposta do modelo de IA.", "raw_response": ai_response}
+            with span("challenge.parse"):
+                challenge_data, errors = parse_structured_output(ai_response, validate_challenge_set)
+            if challenge_data is None:
+                logger.error(f"Error  Erro ao decodificar a resposta JSON: {errors[0]}")
+                return {"error": "Erro ao processar a resposta do modelo de IA.", "raw_response": ai_response, "usage": usage}
+            if errors:
+                logger.error(f"Resposta do modelo fora do schema de desafios: {errors}")
+                return {"error": f"Resposta do modelo fora do formato esperado: {'; '.join(errors)}", "raw_response": ai_response, "usage": usage}
 
             sources = [{"file_name": doc.metadata.get('file_name', 'N/A')} for doc in relevant_docs]
             unique_sources = [dict(t) for t in {tuple(d.items()) for d in sources}]
 
             challenge_data["sources"] = unique_sources
+            challenge_data["usage"] = usage
             
             return challenge_data
 
@@ -0,0 +1,220 @@
+"""
+Tracing Module - Lightweight per-stage timing for the RAG pipeline
+
+Provides a span API (context manager and decorator) that times each stage of a
+request. Durations are collected in the current request trace, when one is
+active, and aggregated in a process-wide registry that can be exported in the
+Prometheus text exposition format.
+
+Example:
+    with start_trace() as trace:
+        with span("chat.search"):
+            ...
+    trace.as_dict()
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, List, Optional, Callable
+import threading
+import time
+
+# Histogram buckets in seconds, from fast in-memory stages up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Trace:
+    """Collects the stage timings of a single request"""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float):
+        """
+        Add a stage duration to the trace
+
+        Args:
+            name (str): Stage name
+            seconds (float): Duration in seconds
+        """
+        stage = self._stages.setdefault(name, {"count": 0, "seconds": 0.0})
+        stage["count"] += 1
+        stage["seconds"] += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the trace as a JSON-serializable dict
+
+        Returns:
+            Dict[str, Any]: Total elapsed time and per-stage timings in milliseconds
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000.0, 3),
+            "stages": [
+                {"name": name, "ms": round(stage["seconds"] * 1000.0, 3), "count": stage["count"]}
+                for name, stage in self._stages.items()
+            ]
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of stage duration histograms"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[str, Any]] = {}
+        self._errors: Dict[str, int] = {}
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        """
+        Record a stage duration
+
+        Args:
+            name (str): Stage name
+            seconds (float): Duration in seconds
+            error (bool): Whether the stage raised an exception
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._histograms[name] = histogram
+
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+            if error:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return a copy of the collected histograms
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Histograms and error counters by stage name
+        """
+        with self._lock:
+            return {
+                name: {
+                    "buckets": list(histogram["buckets"]),
+                    "sum": histogram["sum"],
+                    "count": histogram["count"],
+                    "errors": self._errors.get(name, 0)
+                }
+                for name, histogram in self._histograms.items()
+            }
+
+    def reset(self):
+        """Discard every collected metric (useful for tests and benchmarks)"""
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = [
+            "# HELP rag_stage_duration_seconds Duration of each RAG pipeline stage.",
+            "# TYPE rag_stage_duration_seconds histogram",
+        ]
+        for name in sorted(snapshot):
+            histogram = snapshot[name]
+            label = _escape_label(name)
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                lines.append(f'rag_stage_duration_seconds_bucket{{stage="{label}",le="{bound}"}} {count}')
+            lines.append(f'rag_stage_duration_seconds_bucket{{stage="{label}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'rag_stage_duration_seconds_sum{{stage="{label}"}} {histogram["sum"]:.6f}')
+            lines.append(f'rag_stage_duration_seconds_count{{stage="{label}"}} {histogram["count"]}')
+
+        lines.append("# HELP rag_stage_errors_total Number of RAG pipeline stages that raised an exception.")
+        lines.append("# TYPE rag_stage_errors_total counter")
+        for name in sorted(snapshot):
+            lines.append(f'rag_stage_errors_total{{stage="{_escape_label(name)}"}} {snapshot[name]["errors"]}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# Process-wide registry shared by every pipeline instance
+metrics_registry = MetricsRegistry()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("rag_current_trace", default=None)
+
+
+def get_current_trace() -> Optional[Trace]:
+    """Return the trace of the current request, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace():
+    """
+    Start a request trace that collects every span opened inside the block
+
+    Yields:
+        Trace: The active trace
+    """
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a stage of the pipeline
+
+    Args:
+        name (str): Stage name, e.g. "chat.search"
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics_registry.observe(name, elapsed, error=error)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(name, elapsed)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator that wraps a function call in a span
+
+    Args:
+        name (Optional[str]): Stage name (defaults to the function's qualified name)
+    """
+    def decorator(func: Callable) -> Callable:
+        stage_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
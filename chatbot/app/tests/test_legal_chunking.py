@@ -0,0 +1,61 @@
+"""
+Tests for the structure-aware legal chunker
+
+Run from the project root:
+    python -m unittest chatbot.app.tests.test_legal_chunking
+"""
+
+from unittest import TestCase, mock
+
+from langchain_core.documents import Document
+
+from ..rag_pipeline import legal_chunking
+from ..rag_pipeline.legal_chunking import LegalDocumentChunker
+
+
+def _estimate_tokens(encoding_name):
+    # Deterministic counting (~4 characters per token), independent of tiktoken downloads
+    return lambda text: max(1, len(text) // 4)
+
+
+class LegalChunkOverlapTests(TestCase):
+
+    def setUp(self):
+        with mock.patch.object(legal_chunking, "_token_counter", _estimate_tokens):
+            self.chunker = LegalDocumentChunker(chunk_tokens=150, chunk_overlap_tokens=60, min_chunk_tokens=80)
+
+    def _chunk(self, text):
+        return self.chunker.chunk_documents([Document(page_content=text, metadata={"source": "decreto.pdf", "page": 1})])
+
+    def test_soft_split_overlap_stays_inside_the_current_article(self):
+        # Art. 1 is short, so it is merged with the header of Art. 2; the long § 1 of
+        # Art. 2 then forces a soft split whose overlap must not reach back into Art. 1
+        text = (
+            "Art. 1º Fica instituído o programa de incentivo.\n"
+            "§ 1º O programa alcança as indústrias do estado.\n"
+            "§ 2º O benefício primeiro vale por dez anos contados da habilitação.\n"
+            "Art. 2º O crédito presumido será calculado sobre o saldo devedor.\n"
+            "§ 1º " + "O percentual do crédito presumido varia conforme a localização. " * 12 + "\n"
+            "§ 2º " + "A fruição fica condicionada à regularidade fiscal do contribuinte. " * 12 + "\n"
+        )
+        chunks = self._chunk(text)
+
+        article_2_chunks = [chunk for chunk in chunks if chunk.metadata.get("article") == "2"]
+        self.assertTrue(article_2_chunks)
+        for chunk in article_2_chunks:
+            self.assertNotIn("Art. 1º", chunk.page_content)
+            self.assertNotIn("O benefício primeiro", chunk.page_content)
+            self.assertIn("2", chunk.metadata["articles"].split(","))
+
+        merged = chunks[0]
+        self.assertEqual(merged.metadata["article"], "1")
+        self.assertEqual(merged.metadata["articles"], "1,2")
+
+    def test_every_chunk_lists_its_own_article(self):
+        text = "Art. 7º Disposições gerais.\n" + "".join(
+            f"§ {i}º " + "O contribuinte deverá manter a escrituração fiscal em dia. " * 6 + "\n"
+            for i in range(1, 6)
+        )
+        for chunk in self._chunk(text):
+            self.assertEqual(chunk.metadata["article"], "7")
+            self.assertEqual(chunk.metadata["articles"], "7")
@@ -0,0 +1,102 @@
+"""
+Tests for the LLM gateway circuit breaker
+
+Run from the project root:
+    python -m unittest chatbot.app.tests.test_llm_gateway
+"""
+
+import time
+from unittest import TestCase
+
+import httpx
+import openai
+
+from ..rag_pipeline.llm_gateway import CircuitBreaker, LLMGateway
+
+
+def _status_error(status_code):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    error_class = openai.AuthenticationError if status_code == 401 else openai.InternalServerError
+    return error_class("error", response=response, body=None)
+
+
+class _FakeClient:
+    """Minimal stand-in for the OpenAI client: raises (or returns) the queued outcomes in order"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.chat = self
+        self.completions = self
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, **params):
+        outcome = self.outcomes.pop(0)
+        if callable(outcome):
+            outcome = outcome()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class ClientErrorBreakerTests(TestCase):
+
+    def _gateway(self, outcomes):
+        return LLMGateway(client=_FakeClient(outcomes), max_retries=0, failure_threshold=2, reset_timeout=0)
+
+    def test_client_error_does_not_reset_the_failure_streak(self):
+        gateway = self._gateway([_status_error(500), _status_error(401), _status_error(500)])
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                gateway.chat_completion(model="m", messages=[])
+        # 500, 401, 500: the 401 must not clear the first failure, so the circuit opened
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+
+    def test_client_error_on_half_open_probe_keeps_the_circuit_half_open(self):
+        gateway = self._gateway([_status_error(500), _status_error(500), _status_error(401), "ok"])
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                gateway.chat_completion(model="m", messages=[])
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(openai.AuthenticationError):
+            gateway.chat_completion(model="m", messages=[])
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        # The probe slot was released, so the next call can probe and close the circuit
+        self.assertEqual(gateway.chat_completion(model="m", messages=[]), "ok")
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+
+def _slow(outcome, seconds):
+    """Outcome returned (or raised) only after the given delay"""
+    def run():
+        time.sleep(seconds)
+        return outcome
+    return run
+
+
+class DeadlineBreakerTests(TestCase):
+
+    def test_deadline_after_a_retryable_failure_counts_it_once(self):
+        gateway = LLMGateway(client=_FakeClient([_slow(_status_error(500), 0.05)]),
+                             deadline=0.01, max_retries=3, failure_threshold=2, reset_timeout=0)
+        with self.assertRaises(Exception):
+            gateway.chat_completion(model="m", messages=[])
+        self.assertEqual(gateway.breaker._failures, 1)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_deadline_before_the_first_attempt_releases_the_probe(self):
+        gateway = LLMGateway(client=_FakeClient(["ok"]), max_retries=0, failure_threshold=1, reset_timeout=0)
+        gateway.breaker.record_failure()
+
+        # No budget left once the slot is acquired: nothing is sent upstream
+        with self.assertRaises(Exception):
+            gateway.chat_completion(deadline=0, model="m", messages=[])
+        self.assertEqual(gateway.breaker._failures, 1)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        self.assertEqual(gateway.chat_completion(model="m", messages=[]), "ok")
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
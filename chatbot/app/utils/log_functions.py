@@ -1,58 +1,197 @@
 import os
+import json
+import uuid
+import time
+import queue
+import atexit
 import logging
+import threading
+from datetime import datetime, timezone
 from logging.handlers import RotatingFileHandler
 
-logger = logging.getLogger('openai_api_logger')
-logger.setLevel(logging.INFO) # Change to DEBUG if needed
+logger = logging.getLogger(__name__)
 
-# Log message format
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s\n\n')
+DEFAULT_AUDIT_LOG = os.path.join("logs", "openai_response_log.txt")
 
-def setup_logger_handler(filename="openai_response_log.txt", max_bytes=5*1024*1024, backup_count=5):
+# Sentinel that asks the writer thread to drain the queue and stop
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Asynchronous JSON-lines audit log for AI API responses.
+
+    Callers only enqueue the raw response; a single long-lived writer thread
+    builds the compact record, writes it through a per-file rotating handler
+    (created once and kept open) and fsyncs the files in batches.
     """
-    Configures the rotating file handler for the logger.
+
+    def __init__(self, max_bytes=5*1024*1024, backup_count=5, flush_interval=1.0,
+                 max_batch=256, queue_size=10000):
+        """
+        Args:
+            max_bytes (int): The maximum size of a log file in bytes before rotation (e.g., 5MB).
+            backup_count (int): The number of backup files to keep.
+            flush_interval (float): Maximum seconds between fsyncs of pending records.
+            max_batch (int): Maximum number of records written before an fsync.
+            queue_size (int): Maximum number of pending records; extra records are dropped.
+        """
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._handlers = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, payload, filename=DEFAULT_AUDIT_LOG, **fields):
+        """
+        Enqueue a response for the audit log without blocking the caller.
+
+        Args:
+            payload: OpenAI response object, dict or string to record.
+            filename (str): The log file that receives the record.
+            **fields: Extra record fields (request_id, timings, ...).
+        """
+        self._ensure_started()
+        fields.setdefault("request_id", uuid.uuid4().hex)
+        try:
+            self._queue.put_nowait((filename, time.time(), payload, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Write every pending record, fsync and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending = set()
+        last_sync = time.monotonic()
+        written = 0
+
+        while True:
+            timeout = max(self.flush_interval - (time.monotonic() - last_sync), 0.0) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._sync(pending)
+                return
+
+            if item is not None:
+                filename, timestamp, payload, fields = item
+                try:
+                    self._emit(filename, build_audit_record(payload, timestamp, fields))
+                    pending.add(filename)
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Could not write audit record to '{filename}': {e}")
+
+            if pending and (written >= self.max_batch or time.monotonic() - last_sync >= self.flush_interval):
+                self._sync(pending)
+                pending = set()
+                written = 0
+                last_sync = time.monotonic()
+
+    def _emit(self, filename, record):
+        handler = self._handlers.get(filename)
+        if handler is None:
+            log_directory = os.path.dirname(filename)
+            if log_directory:
+                os.makedirs(log_directory, exist_ok=True)
+            handler = RotatingFileHandler(filename, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._handlers[filename] = handler
+
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        handler.emit(logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"}))
+
+    def _sync(self, filenames):
+        for filename in filenames:
+            handler = self._handlers.get(filename)
+            if handler is None or handler.stream is None:
+                continue
+            try:
+                handler.flush()
+                os.fsync(handler.stream.fileno())
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not fsync audit log '{filename}': {e}")
+
+
+def build_audit_record(payload, timestamp, fields):
+    """
+    Build the compact audit record of an AI API response.
+
     Args:
-        filename (str): The base name of the log file.
-        max_bytes (int): The maximum size of the log file in bytes before rotation (e.g., 5MB).
-        backup_count (int): The number of backup files to keep.
+        payload: OpenAI response object, dict or string.
+        timestamp (float): Epoch seconds at which the response was enqueued.
+        fields (dict): Extra fields merged into the record.
+
+    Returns:
+        dict: JSON-serializable record.
     """
-    # Remove existing handlers to avoid duplication if the function is called multiple times
-    if logger.handlers:
-        for handler in logger.handlers:
-            logger.removeHandler(handler)
-
-    log_directory = os.path.dirname(filename)
-    if log_directory and not os.path.exists(log_directory):
-        os.makedirs(log_directory, exist_ok=True)
-
-    # Create a rotating file handler
-    # maxBytes: maximum file size before rotation (here 5MB)
-    # backupCount: number of backup files to keep (here 5 files)
-    file_handler = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-
-def log_AI_api_response_to_file(response_data, filename="openai_response_log.txt"):
+    record = {"ts": datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(timespec="milliseconds")}
+    record.update(fields)
+
+    if hasattr(payload, "model_dump"):
+        payload = payload.model_dump(exclude_none=True)
+
+    if isinstance(payload, dict):
+        for key in ("id", "model"):
+            if payload.get(key) is not None:
+                record[key] = payload[key]
+        if payload.get("usage"):
+            record["usage"] = {
+                key: payload["usage"].get(key)
+                for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+                if payload["usage"].get(key) is not None
+            }
+        choices = payload.get("choices") or []
+        if choices:
+            first = choices[0]
+            if first.get("finish_reason"):
+                record["finish_reason"] = first["finish_reason"]
+            record["content"] = (first.get("message") or {}).get("content")
+    else:
+        record["content"] = str(payload)
+
+    return record
+
+
+# Process-wide writer shared by every caller
+audit_log = AuditLogWriter()
+atexit.register(audit_log.close)
+
+
+def log_AI_api_response_to_file(response_data, filename=DEFAULT_AUDIT_LOG, **fields):
     """
-    Helper function to log the full content of OpenAI API responses using Python's logging module.
+    Record an AI API response in the audit log (one JSON line per response).
+
+    The call only enqueues the response; serialization and file I/O happen on
+    the audit log writer thread.
 
     Args:
-        response_data: The full response object returned by the OpenAI API.
+        response_data: The response object returned by the OpenAI API (or an equivalent dict).
         filename (str): The name of the file where the response will be logged.
+        **fields: Extra record fields, e.g. request_id, timings.
     """
-    try:
-        # This is important if the filename might change between calls
-        setup_logger_handler(filename=filename)
-
-        # Converts the response object to a formatted JSON string.
-        response_json_string = response_data.model_dump_json(indent=2)
-
-        # Logs the complete response as an INFO message
-        logger.info(response_json_string)
-        print(f"DEBUG: API response logged to '{filename}' (via logging module)")
-    except Exception as e:
-        print(f"LOG ERROR: Could not log API response to '{filename}': {e}")
-
-# Initial logger configuration when the module is loaded
-# This ensures the logger is ready even before the first call to the log function.
-setup_logger_handler(filename=os.path.join("logs", "openai_response_log.txt"))
\ No newline at end of file
+    audit_log.write(response_data, filename=filename, **fields)
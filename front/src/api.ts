@@ -1,5 +1,5 @@
 import axios from "axios";
-import { BackendChallenge, Challenge, QuizQuestion } from './types';
+import { BackendChallenge, BackendChallengeListItem, Challenge, QuizQuestion } from './types';
 
 const API_BASE_URL = "http://localhost:8000/api/auth";
 const CHATBOT_API_BASE_URL = "http://localhost:8000/api/chatbot";
@@ -435,16 +435,48 @@ export const updateMultipleChoiceQuestion = async (id: number, data: {
   return response.data;
 };
 
-// Fetch pending challenges
-export const fetchPendingChallenges = async () => {
-  const response = await questionsApi.get('/api/challenges/pending/');
+// Página da paginação por cursor do backend
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+// Percorre a paginação por cursor (seguindo `next`) e junta os `results` de todas as páginas.
+// Só para quem precisa do conjunto inteiro; telas de listagem usam fetchChallengesPage
+const fetchAllPages = async (url: string, params?: Record<string, string>) => {
+  const results: BackendChallengeListItem[] = [];
+  let next: string | null = url;
+  let pageParams = params;
+  while (next) {
+    const response = await questionsApi.get<CursorPage<BackendChallengeListItem>>(next, { params: pageParams });
+    results.push(...response.data.results);
+    next = response.data.next;
+    pageParams = undefined; // o link `next` já carrega os filtros e o cursor
+  }
+  return results;
+};
+
+// Uma página de desafios por status; passe o `next` da página anterior para carregar a seguinte
+export const fetchChallengesPage = async (
+  status: 'PENDING' | 'APPROVED',
+  next?: string | null
+): Promise<CursorPage<BackendChallengeListItem>> => {
+  const response = next
+    ? await questionsApi.get<CursorPage<BackendChallengeListItem>>(next)
+    : await questionsApi.get<CursorPage<BackendChallengeListItem>>('/api/challenges/', { params: { status } });
+  return response.data;
+};
+
+// Contagem de desafios por status (cards de estatísticas do admin)
+export const fetchChallengeCounts = async (): Promise<{ pending: number; approved: number }> => {
+  const response = await questionsApi.get('/api/challenges/counts/');
   return response.data;
 };
 
-// Fetch approved challenges
+// Fetch approved challenges (todas as páginas)
 export const fetchApprovedChallenges = async () => {
-  const response = await questionsApi.get('/api/challenges/');
-  return response.data.filter((challenge: any) => challenge.status === 'APPROVED');
+  return fetchAllPages('/api/challenges/', { status: 'APPROVED' });
 };
 
 // Update challenge status
@@ -548,12 +580,9 @@ export const getCompletedCertificates = async (): Promise<CompletedCertificatesR
   }
 };
 
-// Transformar BackendChallenge para o formato atual do frontend
-export const transformChallengeForList = (backendChallenge: BackendChallenge): Challenge => {
-  const totalQuestions = 
-    (backendChallenge.multiple_choice_questions?.length || 0) +
-    (backendChallenge.discursive_questions?.length || 0) +
-    (backendChallenge.problem_questions?.length || 0);
+// Transformar o item da listagem de desafios para o formato atual do frontend
+export const transformChallengeForList = (backendChallenge: BackendChallengeListItem): Challenge => {
+  const totalQuestions = backendChallenge.questions_count || 0;
 
   return {
     id: backendChallenge.id,
@@ -17,6 +17,10 @@ interface ChallengesGridProps {
   showApproveButton?: boolean;
   onApprove?: (challengeId: number) => void;
   onDelete?: (challengeId: number) => void;
+  // Paginação: mostra "Carregar mais" enquanto houver próxima página
+  hasMore?: boolean;
+  loadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 const SectionContainer = styled.section`
@@ -110,6 +114,20 @@ const DeleteButton = styled.button`
   &:hover { background-color: #c82333; }
 `;
 
+const LoadMoreButton = styled.button`
+  background-color: #fff;
+  color: #2f3a7d;
+  border: 1px solid #2f3a7d;
+  padding: 0.6rem 1.5rem;
+  border-radius: 6px;
+  cursor: pointer;
+  align-self: center;
+  font-weight: 500;
+  transition: background-color 0.2s ease-in-out;
+  &:hover { background-color: #f4f5fa; }
+  &:disabled { cursor: not-allowed; opacity: 0.6; }
+`;
+
 const ButtonContainer = styled.div`
   display: flex;
   gap: 0.5rem;
@@ -121,7 +139,10 @@ const ChallengesGrid: React.FC<ChallengesGridProps> = ({
   challenges, 
   showApproveButton = false, 
   onApprove,
-  onDelete
+  onDelete,
+  hasMore = false,
+  loadingMore = false,
+  onLoadMore
 }) => {
   const navigate = useNavigate();
   const [loadingChallenge, setLoadingChallenge] = useState<number | null>(null);
@@ -185,6 +206,11 @@ const ChallengesGrid: React.FC<ChallengesGridProps> = ({
           </ChallengeCard>
         ))}
       </GridContainer>
+      {hasMore && onLoadMore && (
+        <LoadMoreButton onClick={onLoadMore} disabled={loadingMore}>
+          {loadingMore ? 'Carregando...' : 'Carregar mais'}
+        </LoadMoreButton>
+      )}
     </SectionContainer>
   );
 };
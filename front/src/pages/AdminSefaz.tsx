@@ -7,7 +7,7 @@ import StatsCards from '../components/admin/StatsCards';
 import ChallengesGrid from '../components/admin/ChallengesGrid';
 import { IoIosArrowBack } from 'react-icons/io';
 import { FiPlus } from 'react-icons/fi';
-import { fetchPendingChallenges, fetchApprovedChallenges, updateChallengeStatus, deleteChallenge } from '../api'; 
+import { fetchChallengesPage, fetchChallengeCounts, updateChallengeStatus, deleteChallenge } from '../api'; 
 
 const AdminWrapper = styled.div`
   background-color: #f4f5fa;
@@ -71,30 +71,34 @@ const GenerateButton = styled(Link)`
 `;
 
 
+const formatChallenge = (challenge: any) => ({
+    id: challenge.id,
+    title: `Desafio ${challenge.id} - ${challenge.title}`,
+    tags: [
+        challenge.program_name || 'Programa',
+        challenge.track_name || 'Trilha',
+        `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
+    ]
+});
+
 const AdminSefaz: React.FC = () => {
     const [challenges, setChallenges] = useState<any[]>([]);
-    const [approvedCount, setApprovedCount] = useState(0);
+    const [next, setNext] = useState<string | null>(null);
+    const [counts, setCounts] = useState({ pending: 0, approved: 0 });
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Os totais vêm do endpoint de contagem; a lista carrega uma página por vez
+    const loadCounts = async () => {
+        setCounts(await fetchChallengeCounts());
+    };
 
     useEffect(() => {
         const loadChallenges = async () => {
             try {
-                // Carregar desafios pendentes
-                const pendingData = await fetchPendingChallenges();
-                const formattedChallenges = pendingData.map((challenge: any) => ({
-                    id: challenge.id,
-                    title: `Desafio ${challenge.id} - ${challenge.title}`,
-                    tags: [
-                        challenge.program_name || 'Programa',
-                        challenge.track_name || 'Trilha',
-                        `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
-                    ]
-                }));
-                setChallenges(formattedChallenges);
-
-                // Carregar contagem de desafios aprovados
-                const approvedData = await fetchApprovedChallenges();
-                setApprovedCount(approvedData.length);
+                const [page] = await Promise.all([fetchChallengesPage('PENDING'), loadCounts()]);
+                setChallenges(page.results.map(formatChallenge));
+                setNext(page.next);
             } catch (error) {
                 console.error('Erro ao carregar desafios:', error);
             } finally {
@@ -105,24 +109,26 @@ const AdminSefaz: React.FC = () => {
         loadChallenges();
     }, []);
 
+    const handleLoadMore = async () => {
+        if (!next) return;
+        setLoadingMore(true);
+        try {
+            const page = await fetchChallengesPage('PENDING', next);
+            setChallenges(prev => [...prev, ...page.results.map(formatChallenge)]);
+            setNext(page.next);
+        } catch (error) {
+            console.error('Erro ao carregar mais desafios:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleApproveChallenge = async (challengeId: number) => {
         try {
             await updateChallengeStatus(challengeId, 'APPROVED');
-            // Recarregar ambas as listas
-            const pendingData = await fetchPendingChallenges();
-            const approvedData = await fetchApprovedChallenges();
-            
-            const formattedChallenges = pendingData.map((challenge: any) => ({
-                id: challenge.id,
-                title: `Desafio ${challenge.id} - ${challenge.title}`,
-                tags: [
-                    challenge.program_name || 'Programa',
-                    challenge.track_name || 'Trilha',
-                    `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
-                ]
-            }));
-            setChallenges(formattedChallenges);
-            setApprovedCount(approvedData.length);
+            // Remove só o desafio aprovado da lista e atualiza os totais
+            setChallenges(prev => prev.filter(challenge => challenge.id !== challengeId));
+            await loadCounts();
             alert('Desafio aprovado com sucesso!');
         } catch (error) {
             console.error('Erro ao aprovar desafio:', error);
@@ -134,21 +140,8 @@ const AdminSefaz: React.FC = () => {
         if (window.confirm('Tem certeza que deseja excluir este desafio? Esta ação não pode ser desfeita.')) {
             try {
                 await deleteChallenge(challengeId);
-                // Recarregar ambas as listas
-                const pendingData = await fetchPendingChallenges();
-                const approvedData = await fetchApprovedChallenges();
-                
-                const formattedChallenges = pendingData.map((challenge: any) => ({
-                    id: challenge.id,
-                    title: `Desafio ${challenge.id} - ${challenge.title}`,
-                    tags: [
-                        challenge.program_name || 'Programa',
-                        challenge.track_name || 'Trilha',
-                        `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
-                    ]
-                }));
-                setChallenges(formattedChallenges);
-                setApprovedCount(approvedData.length);
+                setChallenges(prev => prev.filter(challenge => challenge.id !== challengeId));
+                await loadCounts();
                 alert('Desafio excluído com sucesso!');
             } catch (error) {
                 console.error('Erro ao excluir desafio:', error);
@@ -170,8 +163,8 @@ const AdminSefaz: React.FC = () => {
             <div style={{ flexGrow: 1 }}>
                 <StatsCards 
                     activeStat="Desafios Gerados" 
-                    pendingCount={challenges.length}
-                    approvedCount={approvedCount}
+                    pendingCount={counts.pending}
+                    approvedCount={counts.approved}
                 />
             </div>
             <GenerateButton to="/admin/gerador">
@@ -187,6 +180,9 @@ const AdminSefaz: React.FC = () => {
                 showApproveButton={true}
                 onApprove={handleApproveChallenge}
                 onDelete={handleDeleteChallenge}
+                hasMore={next !== null}
+                loadingMore={loadingMore}
+                onLoadMore={handleLoadMore}
             />
         )}
       </MainContent>
@@ -5,7 +5,7 @@ import AdminHeader from '../components/admin/AdminHeader';
 import StatsCards from '../components/admin/StatsCards';
 import ChallengesGrid from '../components/admin/ChallengesGrid';
 import { IoIosArrowBack } from 'react-icons/io';
-import { fetchApprovedChallenges, fetchPendingChallenges, deleteChallenge } from '../api';
+import { fetchChallengesPage, fetchChallengeCounts, deleteChallenge } from '../api';
 
 
 const PageWrapper = styled.div`
@@ -21,30 +21,34 @@ const PageHeader = styled.div`...`; // re-use estilos de AdminSefaz
 const BackLink = styled(Link)`...`; // re-use estilos de AdminSefaz
 const PageTitle = styled.h1`...`; // re-use estilos de AdminSefaz
 
+const formatChallenge = (challenge: any) => ({
+  id: challenge.id,
+  title: `Desafio ${challenge.id} - ${challenge.title}`,
+  tags: [
+      challenge.program_name || 'Programa',
+      challenge.track_name || 'Trilha',
+      `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
+  ]
+});
+
 const ApprovedChallenges: React.FC = () => {
   const [challenges, setChallenges] = useState<any[]>([]);
-  const [pendingCount, setPendingCount] = useState(0);
+  const [next, setNext] = useState<string | null>(null);
+  const [counts, setCounts] = useState({ pending: 0, approved: 0 });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Os totais vêm do endpoint de contagem; a lista carrega uma página por vez
+  const loadCounts = async () => {
+    setCounts(await fetchChallengeCounts());
+  };
 
   useEffect(() => {
     const loadChallenges = async () => {
       try {
-        // Carregar desafios aprovados
-        const approvedData = await fetchApprovedChallenges();
-        const formattedChallenges = approvedData.map((challenge: any) => ({
-          id: challenge.id,
-          title: `Desafio ${challenge.id} - ${challenge.title}`,
-          tags: [
-            challenge.program_name || 'Programa',
-            challenge.track_name || 'Trilha',
-            `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
-          ]
-        }));
-        setChallenges(formattedChallenges);
-
-        // Carregar contagem de desafios pendentes
-        const pendingData = await fetchPendingChallenges();
-        setPendingCount(pendingData.length);
+        const [page] = await Promise.all([fetchChallengesPage('APPROVED'), loadCounts()]);
+        setChallenges(page.results.map(formatChallenge));
+        setNext(page.next);
       } catch (error) {
         console.error('Erro ao carregar desafios aprovados:', error);
       } finally {
@@ -55,25 +59,27 @@ const ApprovedChallenges: React.FC = () => {
     loadChallenges();
   }, []);
 
+  const handleLoadMore = async () => {
+    if (!next) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchChallengesPage('APPROVED', next);
+      setChallenges(prev => [...prev, ...page.results.map(formatChallenge)]);
+      setNext(page.next);
+    } catch (error) {
+      console.error('Erro ao carregar mais desafios aprovados:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDeleteChallenge = async (challengeId: number) => {
     if (window.confirm('Tem certeza que deseja excluir este desafio? Esta ação não pode ser desfeita.')) {
       try {
         await deleteChallenge(challengeId);
-        // Recarregar ambas as listas
-        const approvedData = await fetchApprovedChallenges();
-        const pendingData = await fetchPendingChallenges();
-        
-        const formattedChallenges = approvedData.map((challenge: any) => ({
-          id: challenge.id,
-          title: `Desafio ${challenge.id} - ${challenge.title}`,
-          tags: [
-            challenge.program_name || 'Programa',
-            challenge.track_name || 'Trilha',
-            `Nível: ${challenge.difficulty === 'EASY' ? 'Fácil' : challenge.difficulty === 'MEDIUM' ? 'Médio' : 'Difícil'}`
-          ]
-        }));
-        setChallenges(formattedChallenges);
-        setPendingCount(pendingData.length);
+        // Remove só o desafio excluído da lista e atualiza os totais
+        setChallenges(prev => prev.filter(challenge => challenge.id !== challengeId));
+        await loadCounts();
         alert('Desafio excluído com sucesso!');
       } catch (error) {
         console.error('Erro ao excluir desafio:', error);
@@ -93,8 +99,8 @@ const ApprovedChallenges: React.FC = () => {
             {/* Aqui passamos a prop para destacar o card correto */}
             <StatsCards 
                 activeStat="Desafios Aprovados" 
-                pendingCount={pendingCount}
-                approvedCount={challenges.length}
+                pendingCount={counts.pending}
+                approvedCount={counts.approved}
             />
         </div>
         
@@ -107,6 +113,9 @@ const ApprovedChallenges: React.FC = () => {
             challenges={challenges} 
             showApproveButton={false}
             onDelete={handleDeleteChallenge}
+            hasMore={next !== null}
+            loadingMore={loadingMore}
+            onLoadMore={handleLoadMore}
           />
         )}
 
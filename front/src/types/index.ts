@@ -28,6 +28,22 @@ export interface BackendChallenge {
   multiple_choice_questions: MultipleChoiceQuestion[];
 }
 
+// Item das listagens paginadas de desafios: sem as questões, apenas as contagens
+export interface BackendChallengeListItem {
+  id: number;
+  title: string;
+  difficulty: 'EASY' | 'MEDIUM' | 'HARD';
+  status: 'PENDING' | 'APPROVED';
+  track: number;
+  track_name: string;
+  program_name: string;
+  sources: BackendSource[];
+  problem_questions_count: number;
+  discursive_questions_count: number;
+  multiple_choice_questions_count: number;
+  questions_count: number;
+}
+
 export interface BackendSource {
   id: number;
   file_name: string;